@@ -1,4 +1,10 @@
-from .password import hash_password, verify_password
+from .password import (
+    hash_password, verify_password, hash_password_async, verify_password_async,
+    verify_password_and_rehash
+)
 from .jwt import create_access_token, decode_access_token
 
-__all__ = ['hash_password', 'verify_password', 'create_access_token', 'decode_access_token']
+__all__ = [
+    'hash_password', 'verify_password', 'hash_password_async', 'verify_password_async',
+    'verify_password_and_rehash', 'create_access_token', 'decode_access_token'
+]
@@ -1,8 +1,32 @@
 from fastapi import HTTPException, Header, status
 from typing import Optional
 from .jwt import decode_access_token
+from .principal_cache import admin_key, principal_cache
+from .stream_tickets import redeem_stream_ticket
 from database import admins_collection
 
+async def _load_admin(admin_id: str) -> dict:
+    admin = await admins_collection.find_one({"id": admin_id})
+    if not admin:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Admin not found"
+        )
+    
+    # Determine role - handle both old and new admin formats
+    role = admin.get("role")
+    if not role:
+        # Fallback to is_super_admin field
+        role = "super_admin" if admin.get("is_super_admin", False) else "admin"
+    
+    return {
+        "id": admin["id"],
+        "username": admin.get("username", admin.get("email", "")),
+        "email": admin.get("email", ""),
+        "role": role,
+        "permissions": admin.get("permissions", {})
+    }
+
 async def get_current_admin(authorization: Optional[str] = Header(None)):
     """Get current authenticated admin from JWT token"""
     if not authorization:
@@ -33,27 +57,30 @@ async def get_current_admin(authorization: Optional[str] = Header(None)):
             detail="Invalid or expired token"
         )
     
-    # Get admin from database
-    admin = await admins_collection.find_one({"id": payload.get("id")})
-    if not admin:
+    return await _principal(payload.get("id"))
+
+async def _principal(admin_id: str) -> dict:
+    # Get admin from the principal cache (database on a miss)
+    admin = await principal_cache.get_or_load(admin_key(admin_id), lambda: _load_admin(admin_id))
+    # Cached value is shared between requests
+    return dict(admin)
+
+async def get_stream_admin(ticket: Optional[str] = None, authorization: Optional[str] = Header(None)):
+    """Admin auth for EventSource, which cannot send headers.
+
+    Accepts a single-use ``?ticket=`` from POST /api/chat/stream-ticket (see
+    ``auth/stream_tickets.py``), or the usual Authorization header.
+    """
+    if authorization or not ticket:
+        return await get_current_admin(authorization)
+    
+    admin_id = await redeem_stream_ticket(ticket)
+    if not admin_id:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Admin not found"
+            detail="Invalid or expired stream ticket"
         )
-    
-    # Determine role - handle both old and new admin formats
-    role = admin.get("role")
-    if not role:
-        # Fallback to is_super_admin field
-        role = "super_admin" if admin.get("is_super_admin", False) else "admin"
-    
-    return {
-        "id": admin["id"],
-        "username": admin.get("username", admin.get("email", "")),
-        "email": admin.get("email", ""),
-        "role": role,
-        "permissions": admin.get("permissions", {})
-    }
+    return await _principal(admin_id)
 
 async def require_super_admin(authorization: Optional[str] = Header(None)):
     """Require super admin role"""
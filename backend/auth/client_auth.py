@@ -1,8 +1,26 @@
 from fastapi import HTTPException, Header, status
 from typing import Optional
 from .jwt import decode_access_token
+from .principal_cache import client_key, principal_cache
 from database import clients_collection
 
+async def _load_client(client_id: str) -> dict:
+    client = await clients_collection.find_one({"id": client_id})
+    if not client:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Client not found"
+        )
+    
+    return {
+        "id": client["id"],
+        "name": client["name"],
+        "email": client["email"],
+        "company": client.get("company"),
+        "phone": client.get("phone"),
+        "is_active": client.get("is_active", False)
+    }
+
 async def get_current_client(authorization: Optional[str] = Header(None)):
     """Get current authenticated client from JWT token"""
     if not authorization:
@@ -40,25 +58,15 @@ async def get_current_client(authorization: Optional[str] = Header(None)):
             detail="Invalid token type"
         )
     
-    # Get client from database
-    client = await clients_collection.find_one({"id": payload.get("id")})
-    if not client:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Client not found"
-        )
+    # Get client from the principal cache (database on a miss)
+    client_id = payload.get("id")
+    client = await principal_cache.get_or_load(client_key(client_id), lambda: _load_client(client_id))
     
     # Check if client is active
-    if not client.get("is_active", False):
+    if not client["is_active"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Client account is deactivated"
         )
     
-    return {
-        "id": client["id"],
-        "name": client["name"],
-        "email": client["email"],
-        "company": client.get("company"),
-        "phone": client.get("phone")
-    }
+    return {key: value for key, value in client.items() if key != "is_active"}
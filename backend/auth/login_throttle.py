@@ -0,0 +1,97 @@
+"""
+Brute-force protection for the login endpoints.
+
+Every attempt is counted per client IP and per username (sliding windows,
+see ``utils/rate_limit.py``) before the account is looked up or bcrypt
+runs, so password guessing is turned away with a cheap 429 instead of
+costing a hash each time. A successful login clears the username counter;
+the IP counter only decays, which also limits one address spraying many
+usernames.
+
+With several workers or instances set ``RATE_LIMIT_STORE=mongo`` so they
+share the counts. If the store fails, logins are let through (and logged)
+rather than locking everyone out.
+"""
+import hashlib
+import logging
+import os
+from typing import Any, Dict
+
+from fastapi import HTTPException, Request, status
+
+from utils.rate_limit import client_ip, create_store
+
+logger = logging.getLogger(__name__)
+
+LOGIN_IP_LIMIT = int(os.environ.get('LOGIN_IP_LIMIT', 20))
+LOGIN_IP_WINDOW = float(os.environ.get('LOGIN_IP_WINDOW', 300))
+LOGIN_USERNAME_LIMIT = int(os.environ.get('LOGIN_USERNAME_LIMIT', 10))
+LOGIN_USERNAME_WINDOW = float(os.environ.get('LOGIN_USERNAME_WINDOW', 900))
+
+
+def _username_key(scope: str, username: str) -> str:
+    # Hashed so the counters do not hold whatever was typed into the form
+    digest = hashlib.sha256(username.strip().lower().encode("utf-8")).hexdigest()[:32]
+    return f"login:user:{scope}:{digest}"
+
+
+class LoginThrottle:
+    """Per-IP and per-username login attempt limits"""
+
+    def __init__(self, store):
+        self.store = store
+        self.allowed = 0
+        self.rejected_ip = 0
+        self.rejected_username = 0
+        self.store_errors = 0
+
+    async def check(self, request: Request, scope: str, username: str):
+        """Count a login attempt; 429 with Retry-After when over a limit.
+
+        ``scope`` separates the account types (admin, client, user).
+        """
+        try:
+            result = await self.store.hit(f"login:ip:{client_ip(request)}", LOGIN_IP_LIMIT, LOGIN_IP_WINDOW)
+            if not result.allowed:
+                self.rejected_ip += 1
+            else:
+                result = await self.store.hit(_username_key(scope, username), LOGIN_USERNAME_LIMIT, LOGIN_USERNAME_WINDOW)
+                if not result.allowed:
+                    self.rejected_username += 1
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning(f"⚠️ Login throttle store failed, allowing attempt: {str(e)}")
+            return
+
+        if result.allowed:
+            self.allowed += 1
+            return
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please try again later",
+            headers={"Retry-After": str(result.retry_after)}
+        )
+
+    async def succeeded(self, scope: str, username: str):
+        """Clear the username counter after a successful login"""
+        try:
+            await self.store.reset(_username_key(scope, username), LOGIN_USERNAME_WINDOW)
+        except Exception as e:
+            self.store_errors += 1
+            logger.warning(f"⚠️ Login throttle reset failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "store": self.store.stats(),
+            "ip_limit": LOGIN_IP_LIMIT,
+            "ip_window": LOGIN_IP_WINDOW,
+            "username_limit": LOGIN_USERNAME_LIMIT,
+            "username_window": LOGIN_USERNAME_WINDOW,
+            "allowed": self.allowed,
+            "rejected_ip": self.rejected_ip,
+            "rejected_username": self.rejected_username,
+            "store_errors": self.store_errors,
+        }
+
+
+login_throttle = LoginThrottle(create_store())
@@ -1,8 +1,37 @@
+"""
+Password hashing with bcrypt.
+
+bcrypt is deliberately slow (around 200 ms at cost 12), so request handlers
+use the async functions, which run it on a dedicated, size-limited thread
+pool instead of the event loop. When more work is waiting than
+``BCRYPT_MAX_QUEUE`` allows, new requests get a 503 straight away instead
+of piling up behind a burst of logins.
+
+``verify_password_and_rehash`` also returns a new hash when the stored one
+was made with a different cost than ``BCRYPT_ROUNDS`` (and
+``BCRYPT_REHASH_ON_LOGIN`` is on), so raising the cost upgrades accounts as
+users log in.
+
+The sync functions remain for scripts and startup code.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
 import bcrypt
+from fastapi import HTTPException, status
+
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+BCRYPT_THREADS = int(os.environ.get('BCRYPT_THREADS', min(4, os.cpu_count() or 1)))
+BCRYPT_MAX_QUEUE = int(os.environ.get('BCRYPT_MAX_QUEUE', 64))
+BCRYPT_REHASH_ON_LOGIN = os.environ.get('BCRYPT_REHASH_ON_LOGIN', 'true').lower() == 'true'
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt"""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
@@ -12,3 +41,115 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         plain_password.encode('utf-8'),
         hashed_password.encode('utf-8')
     )
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Whether a bcrypt hash was made with a different cost than BCRYPT_ROUNDS"""
+    # $2b$12$<salt+hash>
+    parts = hashed_password.split('$')
+    try:
+        return int(parts[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+
+class PasswordHasher:
+    """Bounded thread pool for bcrypt, with queue-depth metrics"""
+
+    def __init__(self, threads: int = BCRYPT_THREADS, max_queue: int = BCRYPT_MAX_QUEUE):
+        self.threads = threads
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="bcrypt")
+        # Counters are updated from the pool threads too
+        self._lock = threading.Lock()
+
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self.total_wait_ms = 0.0
+        self.total_run_ms = 0.0
+
+    async def run(self, func, *args):
+        """Run ``func(*args)`` on the pool; 503 when the queue is full"""
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                full = True
+            else:
+                full = False
+                self.queued += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        if full:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many sign-in requests, please try again shortly",
+                headers={"Retry-After": "1"}
+            )
+
+        submitted = time.perf_counter()
+        state = {"started": False, "cancelled": False}
+
+        def timed():
+            started = time.perf_counter()
+            with self._lock:
+                if state["cancelled"]:
+                    return None
+                state["started"] = True
+                self.queued -= 1
+                self.running += 1
+                self.total_wait_ms += (started - submitted) * 1000
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.total_run_ms += (time.perf_counter() - started) * 1000
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        except asyncio.CancelledError:
+            # Client went away: skip the work if it has not started yet
+            with self._lock:
+                if not state["started"] and not state["cancelled"]:
+                    state["cancelled"] = True
+                    self.queued -= 1
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threads": self.threads,
+            "rounds": BCRYPT_ROUNDS,
+            "queue_depth": self.queued,
+            "max_queue": self.max_queue,
+            "max_queue_depth": self.max_queue_depth,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait_ms / self.completed, 2) if self.completed else 0.0,
+            "avg_run_ms": round(self.total_run_ms / self.completed, 2) if self.completed else 0.0,
+        }
+
+
+password_hasher = PasswordHasher()
+
+async def hash_password_async(password: str) -> str:
+    """``hash_password`` on the bcrypt thread pool"""
+    return await password_hasher.run(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """``verify_password`` on the bcrypt thread pool"""
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def verify_password_and_rehash(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; on success also return a new hash if the cost factor changed.
+
+    The caller stores the new hash. It is None when no rehash is needed or
+    BCRYPT_REHASH_ON_LOGIN is off.
+    """
+    if not await verify_password_async(plain_password, hashed_password):
+        return False, None
+    if BCRYPT_REHASH_ON_LOGIN and needs_rehash(hashed_password):
+        return True, await hash_password_async(plain_password)
+    return True, None
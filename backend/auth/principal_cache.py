@@ -0,0 +1,32 @@
+"""
+Short-lived cache of resolved principals (admins and clients).
+
+``get_current_admin`` / ``get_current_client`` used to read the account on
+every authenticated request. The resolved principal (role, permissions,
+active flag) is now cached per account id for ``PRINCIPAL_CACHE_TTL``
+seconds. Admin and client updates, deactivations and deletions invalidate
+the entry, so changes apply to the next request in this process; other
+processes see them after at most the TTL.
+"""
+import os
+
+from utils.cache import AsyncTTLCache
+
+PRINCIPAL_CACHE_TTL = float(os.environ.get('PRINCIPAL_CACHE_TTL', 30))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.environ.get('PRINCIPAL_CACHE_MAX_ENTRIES', 2048))
+
+principal_cache = AsyncTTLCache(default_ttl=PRINCIPAL_CACHE_TTL, max_entries=PRINCIPAL_CACHE_MAX_ENTRIES)
+
+def admin_key(admin_id: str) -> str:
+    return f"admin:{admin_id}"
+
+def client_key(client_id: str) -> str:
+    return f"client:{client_id}"
+
+def invalidate_admin(admin_id: str):
+    """Drop a cached admin after it is updated or deleted"""
+    principal_cache.invalidate(admin_key(admin_id))
+
+def invalidate_client(client_id: str):
+    """Drop a cached client after it is updated, deactivated or deleted"""
+    principal_cache.invalidate(client_key(client_id))
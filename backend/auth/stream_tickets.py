@@ -0,0 +1,45 @@
+"""
+Single-use tickets for the admin Server-Sent Events streams.
+
+EventSource cannot send an Authorization header, and a bearer token in the
+query string ends up in proxy and access logs. The admin client instead
+POSTs (with its bearer token) for a ticket and opens the stream with
+``?ticket=``. A ticket is redeemed once and expires after
+``STREAM_TICKET_TTL`` seconds, so a logged URL is useless by the time
+anyone reads it.
+
+Tickets live in MongoDB (only their hash is stored) so any worker can
+redeem them; a TTL index removes unused ones.
+"""
+import hashlib
+import os
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional
+
+from database import stream_tickets_collection
+
+STREAM_TICKET_TTL = int(os.environ.get('STREAM_TICKET_TTL', 30))
+
+
+def _ticket_id(ticket: str) -> str:
+    return hashlib.sha256(ticket.encode("utf-8")).hexdigest()
+
+
+async def issue_stream_ticket(admin_id: str) -> str:
+    """New ticket for ``admin_id``, valid for one stream request"""
+    ticket = secrets.token_urlsafe(32)
+    await stream_tickets_collection.insert_one({
+        "_id": _ticket_id(ticket),
+        "admin_id": admin_id,
+        "expires_at": datetime.utcnow() + timedelta(seconds=STREAM_TICKET_TTL),
+    })
+    return ticket
+
+
+async def redeem_stream_ticket(ticket: str) -> Optional[str]:
+    """Consume a ticket; the admin id, or None if unknown, used or expired"""
+    doc = await stream_tickets_collection.find_one_and_delete(
+        {"_id": _ticket_id(ticket), "expires_at": {"$gt": datetime.utcnow()}}
+    )
+    return doc["admin_id"] if doc else None
@@ -73,13 +73,24 @@ content_collection = db["content"]
 notes_collection = db["notes"]
 contact_page_collection = db["contact_page"]
 conversations_collection = db["conversations"]
+chat_messages_collection = db["chat_messages"]
 blogs_collection = db["blogs"]
 testimonials_collection = db["testimonials"]
 newsletter_collection = db["newsletter"]
 pricing_collection = db["pricing"]
 analytics_collection = db["analytics"]
+analytics_rollups_collection = db["analytics_rollups"]
 clients_collection = db["clients"]
 client_projects_collection = db["client_projects"]
+project_tasks_collection = db["client_project_tasks"]
+project_comments_collection = db["client_project_comments"]
+project_chat_collection = db["client_project_chat"]
+project_activity_collection = db["client_project_activity"]
+blobs_collection = db["blobs"]
+preview_jobs_collection = db["preview_jobs"]
+jobs_collection = db["jobs"]
+rate_limits_collection = db["rate_limits"]
+stream_tickets_collection = db["stream_tickets"]
 bookings_collection = db["bookings"]
 booking_settings_collection = db["booking_settings"]
 
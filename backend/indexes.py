@@ -0,0 +1,270 @@
+"""
+Declarative index registry for every MongoDB collection.
+
+Indexes are declared here per collection and applied idempotently from the
+startup event. ``scripts/maintenance/sync_indexes.py`` diffs the registry
+against the live database.
+"""
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_RETENTION_DAYS = int(os.environ.get('ANALYTICS_RETENTION_DAYS', 0))
+
+
+@dataclass
+class IndexSpec:
+    """One declared index: key pattern plus options"""
+    keys: List[Tuple[str, int]]
+    unique: bool = False
+    expire_after_seconds: Optional[int] = None
+    partial_filter: Optional[Dict[str, Any]] = None
+    name: Optional[str] = None
+
+    def __post_init__(self):
+        if not self.name:
+            self.name = "_".join(f"{key}_{direction}" for key, direction in self.keys)
+
+    def options(self) -> Dict[str, Any]:
+        """Keyword arguments for create_index"""
+        options: Dict[str, Any] = {"name": self.name}
+        if self.unique:
+            options["unique"] = True
+        if self.expire_after_seconds is not None:
+            options["expireAfterSeconds"] = self.expire_after_seconds
+        if self.partial_filter:
+            options["partialFilterExpression"] = self.partial_filter
+        return options
+
+    def matches(self, live: Dict[str, Any]) -> bool:
+        """Compare against an entry from index_information()"""
+        return (
+            [(key, int(direction)) for key, direction in live.get("key", [])] == self.keys
+            and bool(live.get("unique", False)) == self.unique
+            and live.get("expireAfterSeconds") == self.expire_after_seconds
+            and live.get("partialFilterExpression") == self.partial_filter
+        )
+
+
+def _unique_id() -> IndexSpec:
+    return IndexSpec([("id", ASCENDING)], unique=True)
+
+
+# Only documents that actually carry the field take part in a unique index,
+# so legacy documents without it do not collide on null.
+def _string_field(name: str) -> Dict[str, Any]:
+    return {name: {"$type": "string"}}
+
+
+_analytics_ttl = ANALYTICS_RETENTION_DAYS * 86400 if ANALYTICS_RETENTION_DAYS else None
+
+INDEXES: Dict[str, List[IndexSpec]] = {
+    "users": [
+        IndexSpec([("email", ASCENDING)]),
+    ],
+    "page_content": [
+        IndexSpec([("page", ASCENDING)]),
+    ],
+    "services": [
+        _unique_id(),
+        IndexSpec([("order", ASCENDING)]),
+    ],
+    "projects": [
+        _unique_id(),
+        IndexSpec([("slug", ASCENDING)]),
+        IndexSpec([("created_at", DESCENDING)]),
+    ],
+    "contacts": [
+        _unique_id(),
+        IndexSpec([("created_at", DESCENDING)]),
+    ],
+    "settings": [
+        _unique_id(),
+    ],
+    "admins": [
+        _unique_id(),
+        IndexSpec([("username", ASCENDING)], unique=True, partial_filter=_string_field("username")),
+        IndexSpec([("email", ASCENDING)]),
+        IndexSpec([("role", ASCENDING)]),
+    ],
+    "storage": [
+        _unique_id(),
+    ],
+    "skills": [
+        _unique_id(),
+    ],
+    "content": [
+        _unique_id(),
+    ],
+    "notes": [
+        _unique_id(),
+        IndexSpec([("updated_at", DESCENDING)]),
+    ],
+    "conversations": [
+        _unique_id(),
+        IndexSpec([("customer_email", ASCENDING)]),
+        # Inbox pages: sort and keyset cursor on (last_message_at, id)
+        IndexSpec([("last_message_at", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "chat_messages": [
+        _unique_id(),
+        IndexSpec([("conversation_id", ASCENDING), ("timestamp", ASCENDING), ("id", ASCENDING)]),
+    ],
+    "blogs": [
+        _unique_id(),
+        IndexSpec([("slug", ASCENDING)], unique=True, partial_filter=_string_field("slug")),
+        IndexSpec([("status", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "testimonials": [
+        _unique_id(),
+        IndexSpec([("status", ASCENDING), ("created_at", DESCENDING)]),
+        IndexSpec([("client_id", ASCENDING)]),
+    ],
+    "newsletter": [
+        _unique_id(),
+        IndexSpec([("email", ASCENDING)], unique=True, partial_filter=_string_field("email")),
+        IndexSpec([("created_at", DESCENDING)]),
+    ],
+    "pricing": [
+        _unique_id(),
+    ],
+    "analytics": [
+        IndexSpec([("timestamp", ASCENDING)], expire_after_seconds=_analytics_ttl),
+        IndexSpec([("event_type", ASCENDING), ("timestamp", ASCENDING)]),
+    ],
+    "analytics_rollups": [
+        IndexSpec([("granularity", ASCENDING), ("bucket", ASCENDING)]),
+    ],
+    "clients": [
+        _unique_id(),
+        IndexSpec([("email", ASCENDING)], unique=True, partial_filter=_string_field("email")),
+    ],
+    "client_projects": [
+        _unique_id(),
+        IndexSpec([("client_id", ASCENDING)]),
+        IndexSpec([("status", ASCENDING)]),
+        # Summary pages in their default order, all projects and per client
+        IndexSpec([("last_activity_at", DESCENDING), ("id", DESCENDING)]),
+        IndexSpec([("client_id", ASCENDING), ("last_activity_at", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "client_project_tasks": [
+        _unique_id(),
+        IndexSpec([("project_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)]),
+    ],
+    "client_project_comments": [
+        _unique_id(),
+        IndexSpec([("project_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)]),
+    ],
+    "client_project_chat": [
+        _unique_id(),
+        IndexSpec([("project_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)]),
+        IndexSpec([("project_id", ASCENDING), ("sender_type", ASCENDING), ("read", ASCENDING)]),
+    ],
+    "client_project_activity": [
+        _unique_id(),
+        IndexSpec([("project_id", ASCENDING), ("timestamp", ASCENDING), ("id", ASCENDING)]),
+    ],
+    "preview_jobs": [
+        _unique_id(),
+        IndexSpec([("status", ASCENDING), ("created_at", ASCENDING)]),
+        IndexSpec([("project_id", ASCENDING), ("file_id", ASCENDING)]),
+    ],
+    "jobs": [
+        _unique_id(),
+        IndexSpec([("status", ASCENDING), ("run_at", ASCENDING)]),
+        IndexSpec([("idempotency_key", ASCENDING)], unique=True, partial_filter=_string_field("idempotency_key")),
+        # Only finished jobs carry expires_at (a date); dead letters are kept
+        IndexSpec([("expires_at", ASCENDING)], expire_after_seconds=0),
+    ],
+    "rate_limits": [
+        # Counter documents are keyed by _id; expires_at ends their last window
+        IndexSpec([("expires_at", ASCENDING)], expire_after_seconds=0),
+    ],
+    "stream_tickets": [
+        # Tickets are keyed by _id; unused ones are removed once expired
+        IndexSpec([("expires_at", ASCENDING)], expire_after_seconds=0),
+    ],
+    "bookings": [
+        _unique_id(),
+        IndexSpec([("status", ASCENDING), ("preferred_date", ASCENDING)]),
+        IndexSpec([("created_at", DESCENDING)]),
+    ],
+    "booking_settings": [
+        _unique_id(),
+        IndexSpec([("is_active", ASCENDING)]),
+    ],
+    "credentials": [
+        _unique_id(),
+        IndexSpec([("key", ASCENDING)]),
+    ],
+}
+
+
+async def ensure_indexes() -> Dict[str, List[str]]:
+    """Create every declared index that is missing.
+
+    Safe to run on every startup: existing identical indexes are a no-op.
+    Failures (duplicate data under a unique index, option conflicts) are
+    logged and reported instead of aborting startup.
+    """
+    report: Dict[str, List[str]] = {"created": [], "failed": []}
+
+    for collection_name, specs in INDEXES.items():
+        collection = db[collection_name]
+        try:
+            live = await collection.index_information()
+        except OperationFailure:
+            live = {}
+
+        for spec in specs:
+            if spec.name in live and spec.matches(live[spec.name]):
+                continue
+            label = f"{collection_name}.{spec.name}"
+            try:
+                await collection.create_index(spec.keys, **spec.options())
+                report["created"].append(label)
+            except OperationFailure as e:
+                report["failed"].append(label)
+                logger.warning(f"⚠️ Could not create index {label}: {e}")
+
+    if report["created"]:
+        logger.info(f"✅ Created {len(report['created'])} indexes")
+    return report
+
+
+async def diff_indexes() -> Dict[str, Dict[str, List[str]]]:
+    """Compare declared indexes with the live ones, per collection.
+
+    Returns ``{collection: {"missing": [...], "changed": [...], "extra": [...]}}``
+    for every collection that differs.
+    """
+    diff: Dict[str, Dict[str, List[str]]] = {}
+
+    for collection_name, specs in INDEXES.items():
+        try:
+            live = await db[collection_name].index_information()
+        except OperationFailure:
+            live = {}
+        live.pop("_id_", None)
+
+        declared = {spec.name: spec for spec in specs}
+        entry = {
+            "missing": [name for name in declared if name not in live],
+            "changed": [
+                name for name, spec in declared.items()
+                if name in live and not spec.matches(live[name])
+            ],
+            "extra": [name for name in live if name not in declared],
+        }
+        if any(entry.values()):
+            diff[collection_name] = entry
+
+    return diff
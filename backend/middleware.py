@@ -0,0 +1,149 @@
+"""
+ASGI middleware for the API.
+
+Written against the raw ASGI interface rather than ``BaseHTTPMiddleware``,
+which runs every request in an extra task and passes the response through
+memory streams. These only rewrite the scope and the
+``http.response.start`` message.
+
+- ``HTTPStackMiddleware``: proxy headers, request ID, timing and security
+  headers in one pass, each switchable (``TRUST_PROXY`` and the
+  ``MIDDLEWARE_*`` settings)
+- ``RateLimitMiddleware``: token-bucket rate limits (``utils/rate_limit.py``)
+
+``scripts/benchmarks/bench_middleware_stack.py`` compares the stack with the
+``BaseHTTPMiddleware`` versions it replaced.
+"""
+import logging
+import os
+import time
+import uuid
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.rate_limit import client_ip, rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# Forwarded headers are only honored behind a proxy that sets them, as for
+# the client IP in utils/rate_limit.py; otherwise any client could claim HTTPS
+TRUST_PROXY = os.environ.get('TRUST_PROXY') == 'true'
+MIDDLEWARE_REQUEST_ID = os.environ.get('MIDDLEWARE_REQUEST_ID', 'true').lower() == 'true'
+MIDDLEWARE_TIMING = os.environ.get('MIDDLEWARE_TIMING', 'true').lower() == 'true'
+MIDDLEWARE_SECURITY_HEADERS = os.environ.get('MIDDLEWARE_SECURITY_HEADERS', 'true').lower() == 'true'
+# One log line per request (method, path, status, duration, request ID)
+LOG_REQUESTS = os.environ.get('LOG_REQUESTS', 'false').lower() == 'true'
+
+SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+]
+# Only meaningful (and only honored by browsers) over HTTPS
+HSTS_HEADER = (b"strict-transport-security", b"max-age=31536000; includeSubDomains")
+
+# Longest client-supplied X-Request-ID that is passed through
+MAX_REQUEST_ID_LENGTH = 128
+
+
+class HTTPStackMiddleware:
+    """Proxy headers, request ID, timing and security headers for HTTP requests.
+
+    - proxy headers: ``X-Forwarded-Proto`` / ``X-Forwarded-Host`` set the
+      scheme and host the app sees (with ``TRUST_PROXY=true`` only)
+    - request ID: the caller's ``X-Request-ID`` or a new UUID, in
+      ``request.state.request_id`` and on the response
+    - timing: ``X-Process-Time`` (seconds until the response started), plus
+      a log line per request with ``log_requests``
+    - security headers: added unless the route set them; HSTS on HTTPS only
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        proxy_headers: bool = TRUST_PROXY,
+        request_id: bool = MIDDLEWARE_REQUEST_ID,
+        timing: bool = MIDDLEWARE_TIMING,
+        security_headers: bool = MIDDLEWARE_SECURITY_HEADERS,
+        log_requests: bool = LOG_REQUESTS,
+    ):
+        self.app = app
+        self.proxy_headers = proxy_headers
+        self.request_id = request_id
+        self.timing = timing
+        self.security_headers = security_headers
+        self.log_requests = log_requests
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        request_id = None
+        if self.proxy_headers or self.request_id:
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-proto" and self.proxy_headers:
+                    proto = value.decode("latin-1").split(",")[0].strip().lower()
+                    if proto in ("http", "https"):
+                        scope["scheme"] = proto
+                elif name == b"x-forwarded-host" and self.proxy_headers:
+                    scope["server"] = (value.decode("latin-1").split(",")[0].strip(), None)
+                elif name == b"x-request-id" and self.request_id and 0 < len(value) <= MAX_REQUEST_ID_LENGTH:
+                    request_id = value.decode("latin-1")
+        if self.request_id:
+            request_id = request_id or str(uuid.uuid4())
+            scope.setdefault("state", {})["request_id"] = request_id
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", ()))
+                if request_id:
+                    headers.append((b"x-request-id", request_id.encode("latin-1")))
+                if self.timing:
+                    headers.append((b"x-process-time", f"{time.perf_counter() - started:.4f}".encode()))
+                if self.security_headers:
+                    present = {name.lower() for name, _ in headers}
+                    headers.extend(header for header in SECURITY_HEADERS if header[0] not in present)
+                    if scope["scheme"] == "https" and HSTS_HEADER[0] not in present:
+                        headers.append(HSTS_HEADER)
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if self.log_requests:
+                duration_ms = (time.perf_counter() - started) * 1000
+                logger.info(f"{scope['method']} {scope['path']} {status_code} {duration_ms:.1f}ms [{request_id}]")
+
+
+class RateLimitMiddleware:
+    """Token-bucket rate limits per client IP and route policy (``utils/rate_limit.py``)"""
+
+    def __init__(self, app: ASGIApp, limiter=rate_limiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        result = await self.limiter.check(scope["method"], scope["path"], client_ip(Request(scope)))
+        if result is not None and not result.allowed:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Rate limit exceeded. Please try again later."},
+                headers={"Retry-After": str(result.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
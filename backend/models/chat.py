@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional, List
+from typing import Optional
 from datetime import datetime
 import uuid
 
@@ -10,12 +10,20 @@ class ChatMessage(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     read: bool = False
 
+class ChatMessagePreview(BaseModel):
+    id: str
+    sender: str
+    message: str  # truncated
+    timestamp: str
+
 class Conversation(BaseModel):
+    """Conversation header - messages are stored separately in chat_messages"""
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     customer_name: str
     customer_email: EmailStr
     customer_phone: Optional[str] = None
-    messages: List[ChatMessage] = Field(default_factory=list)
+    last_message: Optional[ChatMessagePreview] = None
+    message_count: int = 0
     unread_count: int = 0
     last_message_at: datetime = Field(default_factory=datetime.utcnow)
     created_at: datetime = Field(default_factory=datetime.utcnow)
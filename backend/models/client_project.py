@@ -12,6 +12,10 @@ class ProjectFile(BaseModel):
     uploaded_by: str  # Admin ID
     file_size: Optional[int] = 0  # Size in bytes
     file_type: Optional[str] = None  # MIME type
+    sha256: Optional[str] = None  # Hex digest, computed while uploading
+    blob_key: Optional[str] = None  # Blob store key; None for files saved before the blob store
+    thumbnail_key: Optional[str] = None  # Blob store keys of the previews (images and PDFs);
+    preview_key: Optional[str] = None    # the serializer builds their client or admin URLs
 
 class ProjectMilestone(BaseModel):
     """Milestone for a project"""
@@ -96,6 +100,8 @@ class ClientProject(BaseModel):
     notes: Optional[str] = None  # Admin notes visible to client
     
     # Enhanced features
+    # tasks, comments, chat_messages and activity_log are stored in their own
+    # collections (see utils/project_store.py) and only filled in for responses
     milestones: List[ProjectMilestone] = []
     tasks: List[ProjectTask] = []
     files: List[ProjectFile] = []
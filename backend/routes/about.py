@@ -4,6 +4,7 @@ from schemas.about import AboutContentUpdate, AboutContentResponse
 from database import db
 from auth.admin_auth import get_current_admin
 from models.about import AboutContent
+from utils.cache import content_cache
 from datetime import datetime
 import uuid
 
@@ -12,9 +13,14 @@ router = APIRouter(prefix="/about", tags=["about"])
 # Collection
 about_collection = db['about_content']
 
+CACHE_KEY = "about"
+
 @router.get("/", response_model=AboutContentResponse)
 async def get_about_content():
     """Get About page content"""
+    return await content_cache.get_or_load(CACHE_KEY, _load_about_content)
+
+async def _load_about_content():
     # Get the about content (should only be one document)
     about_doc = await about_collection.find_one({})
     
@@ -74,6 +80,7 @@ async def update_about_content(
             # Create new content
             content_dict['id'] = str(uuid.uuid4())
             await about_collection.insert_one(content_dict)
+        content_cache.invalidate(CACHE_KEY)
         
         # Return updated content
         content_dict.pop('_id', None)
@@ -102,6 +109,7 @@ async def initialize_about_content(current_admin: dict = Depends(get_current_adm
     content_dict['updated_by'] = current_admin['username']
     
     await about_collection.insert_one(content_dict)
+    content_cache.invalidate(CACHE_KEY)
     
     content_dict.pop('_id', None)
     return AboutContentResponse(**content_dict)
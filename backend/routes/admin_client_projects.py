@@ -1,11 +1,13 @@
-from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Request
+from typing import List, Optional, Union
 from schemas.client_project import (
     ClientProjectCreate, ClientProjectUpdate, ClientProjectResponse, 
-    FileUploadResponse, ProjectFileResponse, MilestoneCreate, MilestoneUpdate,
+    FileUploadResponse, MilestoneCreate, MilestoneUpdate,
     MilestoneResponse, TaskCreate, TaskUpdate, TaskResponse, CommentCreate,
     CommentResponse, TeamMemberAdd, TeamMemberResponse, BudgetUpdate,
-    BudgetResponse, ActivityResponse, ChatMessageCreate, ChatMessageResponse
+    BudgetResponse, ChatMessageCreate, ChatMessageResponse,
+    TaskPage, CommentPage, ChatMessagePage, ActivityPage,
+    ClientProjectSummaryPage
 )
 from database import client_projects_collection, clients_collection, admins_collection
 from auth.admin_auth import get_current_admin
@@ -13,18 +15,27 @@ from models.client_project import (
     ClientProject, ProjectFile, ProjectMilestone, ProjectTask,
     ProjectComment, ProjectActivity, TeamMember, Budget, ChatMessage
 )
+from utils.downloads import file_download_response
+from utils.job_handlers import queue_project_file_cleanup
+from utils.previews import preview_response, preview_workers
+from utils.project_chat import mark_project_chat_read
+from utils.project_serializer import (
+    ACTIVITY_FIELDS, CHAT_MESSAGE_FIELDS, COMMENT_FIELDS, TASK_FIELDS,
+    ADMIN_PROJECTS_PATH, ProjectJSONResponse, convert_entries, convert_entry, convert_project_to_response
+)
+from utils.project_store import (
+    CHILDREN, EXISTS_PROJECTION, add_child, attach_children, count_children, delete_child,
+    delete_children, migrate_project, project_child_page, record_activity,
+    summarize_projects, update_child, update_project_fields
+)
+from utils.blob_store import blob_store
+from utils.uploads import PROJECT_FILE_MAX_BYTES, UploadTooLarge
 from utils.currency_converter import get_all_currencies, convert_currency, format_currency, get_currency_info
 from datetime import datetime
-import os
 import uuid
-import shutil
 
 router = APIRouter(prefix="/admin/client-projects", tags=["admin-client-projects"])
 
-# Directory for storing project files
-UPLOAD_DIR = "/app/backend/uploads/client_projects"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
 def log_activity(project_id: str, action: str, description: str, user_id: str, user_name: str, metadata=None):
     """Helper function to log activity"""
     activity = ProjectActivity(
@@ -36,117 +47,38 @@ def log_activity(project_id: str, action: str, description: str, user_id: str, u
     )
     return activity.model_dump()
 
-def convert_project_to_response(project_doc) -> ClientProjectResponse:
-    """Helper function to convert project document to response"""
-    return ClientProjectResponse(
-        id=project_doc['id'],
-        name=project_doc['name'],
-        client_id=project_doc['client_id'],
-        description=project_doc.get('description'),
-        status=project_doc['status'],
-        priority=project_doc.get('priority', 'medium'),
-        progress=project_doc['progress'],
-        start_date=str(project_doc['start_date']) if project_doc.get('start_date') else None,
-        expected_delivery=str(project_doc['expected_delivery']) if project_doc.get('expected_delivery') else None,
-        actual_delivery=str(project_doc['actual_delivery']) if project_doc.get('actual_delivery') else None,
-        notes=project_doc.get('notes'),
-        milestones=[
-            MilestoneResponse(
-                id=m['id'],
-                title=m['title'],
-                description=m.get('description'),
-                due_date=str(m['due_date']) if m.get('due_date') else None,
-                status=m['status'],
-                completion_date=m.get('completion_date'),
-                order=m.get('order', 0),
-                created_at=m.get('created_at', datetime.utcnow().isoformat()) if isinstance(m.get('created_at'), str) else (m.get('created_at').isoformat() if m.get('created_at') else datetime.utcnow().isoformat())
-            ) for m in project_doc.get('milestones', [])
-        ],
-        tasks=[
-            TaskResponse(
-                id=t['id'],
-                title=t['title'],
-                description=t.get('description'),
-                status=t['status'],
-                priority=t.get('priority', 'medium'),
-                assigned_to=t.get('assigned_to'),
-                due_date=str(t['due_date']) if t.get('due_date') else None,
-                completed_at=t.get('completed_at'),
-                milestone_id=t.get('milestone_id'),
-                created_at=t.get('created_at', datetime.utcnow().isoformat()) if isinstance(t.get('created_at'), str) else (t.get('created_at').isoformat() if t.get('created_at') else datetime.utcnow().isoformat())
-            ) for t in project_doc.get('tasks', [])
-        ],
-        files=[
-            ProjectFileResponse(
-                id=f['id'],
-                filename=f['filename'],
-                file_path=f.get('file_path', ''),
-                uploaded_at=f.get('uploaded_at', datetime.utcnow().isoformat()) if isinstance(f.get('uploaded_at'), str) else (f.get('uploaded_at').isoformat() if f.get('uploaded_at') else datetime.utcnow().isoformat()),
-                uploaded_by=f.get('uploaded_by', 'system'),
-                file_size=f.get('file_size', 0),
-                file_type=f.get('file_type')
-            ) for f in project_doc.get('files', [])
-        ],
-        comments=[
-            CommentResponse(
-                id=c['id'],
-                user_id=c['user_id'],
-                user_name=c['user_name'],
-                user_type=c['user_type'],
-                message=c['message'],
-                created_at=c['created_at'] if isinstance(c['created_at'], str) else c['created_at'].isoformat()
-            ) for c in project_doc.get('comments', [])
-        ],
-        chat_messages=[
-            ChatMessageResponse(
-                id=cm['id'],
-                sender_id=cm['sender_id'],
-                sender_name=cm['sender_name'],
-                sender_type=cm['sender_type'],
-                message=cm['message'],
-                read=cm.get('read', False),
-                created_at=cm['created_at'] if isinstance(cm['created_at'], str) else cm['created_at'].isoformat()
-            ) for cm in project_doc.get('chat_messages', [])
-        ],
-        activity_log=[
-            ActivityResponse(
-                id=a['id'],
-                action=a['action'],
-                description=a['description'],
-                user_id=a['user_id'],
-                user_name=a['user_name'],
-                timestamp=a['timestamp'] if isinstance(a['timestamp'], str) else a['timestamp'].isoformat(),
-                metadata=a.get('metadata')
-            ) for a in project_doc.get('activity_log', [])
-        ],
-        team_members=[
-            TeamMemberResponse(
-                admin_id=tm['admin_id'],
-                admin_name=tm['admin_name'],
-                role=tm.get('role'),
-                added_at=tm['added_at'] if isinstance(tm['added_at'], str) else tm['added_at'].isoformat()
-            ) for tm in project_doc.get('team_members', [])
-        ],
-        budget=BudgetResponse(
-            total_amount=project_doc.get('budget', {}).get('total_amount', 0.0),
-            currency=project_doc.get('budget', {}).get('currency', 'USD'),
-            paid_amount=project_doc.get('budget', {}).get('paid_amount', 0.0),
-            pending_amount=project_doc.get('budget', {}).get('pending_amount', 0.0),
-            payment_terms=project_doc.get('budget', {}).get('payment_terms')
-        ) if project_doc.get('budget') else None,
-        tags=project_doc.get('tags', []),
-        created_at=project_doc['created_at'] if isinstance(project_doc['created_at'], str) else project_doc['created_at'].isoformat(),
-        updated_at=project_doc.get('updated_at'),
-        last_activity_at=project_doc.get('last_activity_at')
-    )
-
-@router.get("/", response_model=List[ClientProjectResponse])
-async def get_all_projects(admin = Depends(get_current_admin)):
-    """Get all client projects (Admin only)"""
-    projects = []
-    async for project_doc in client_projects_collection.find():
-        projects.append(convert_project_to_response(project_doc))
-    return projects
+@router.get("/", response_model=Union[List[ClientProjectResponse], ClientProjectSummaryPage])
+async def get_all_projects(
+    view: str = "full",
+    page: int = 1,
+    limit: int = 20,
+    sort: str = "last_activity_at",
+    order: str = "desc",
+    admin = Depends(get_current_admin)
+):
+    """Get all client projects (Admin only)
+
+    ``view=summary`` returns a page of header fields with open task, unread
+    chat and file counts (``page``/``limit``/``sort``/``order``) instead of
+    every full project.
+    """
+    if view == "summary":
+        try:
+            summary = await summarize_projects(
+                {}, "client", page=page, limit=limit, sort=sort, descending=order != "asc"
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        return ClientProjectSummaryPage(**summary)
+    
+    project_docs = await client_projects_collection.find().to_list(length=None)
+    await attach_children(project_docs)
+    return ProjectJSONResponse([convert_project_to_response(project_doc, ADMIN_PROJECTS_PATH) for project_doc in project_docs])
+
+@router.get("/preview-stats")
+async def get_preview_stats(admin = Depends(get_current_admin)):
+    """Preview job counts by status and worker counters"""
+    return await preview_workers.stats()
 
 @router.get("/{project_id}", response_model=ClientProjectResponse)
 async def get_project(project_id: str, admin = Depends(get_current_admin)):
@@ -159,7 +91,8 @@ async def get_project(project_id: str, admin = Depends(get_current_admin)):
             detail="Project not found"
         )
     
-    return convert_project_to_response(project_doc)
+    await attach_children([project_doc])
+    return ProjectJSONResponse(convert_project_to_response(project_doc, ADMIN_PROJECTS_PATH))
 
 @router.post("/", response_model=ClientProjectResponse)
 async def create_project(project_data: ClientProjectCreate, admin = Depends(get_current_admin)):
@@ -195,7 +128,6 @@ async def create_project(project_data: ClientProjectCreate, admin = Depends(get_
         admin["id"],
         admin.get("username", "Admin")
     )
-    project.activity_log.append(ProjectActivity(**activity))
     project.last_activity_at = datetime.utcnow()
     
     project_dict = project.model_dump()
@@ -206,27 +138,25 @@ async def create_project(project_data: ClientProjectCreate, admin = Depends(get_
     if project_dict['expected_delivery']:
         project_dict['expected_delivery'] = project_dict['expected_delivery'].isoformat()
     
-    # Convert nested objects
-    project_dict['activity_log'] = [
-        {**a, 'timestamp': a['timestamp'].isoformat() if isinstance(a['timestamp'], datetime) else a['timestamp']}
-        for a in project_dict['activity_log']
-    ]
+    # Tasks, comments, chat and activity live in their own collections;
+    # the project only keeps the capped window of recent activity
+    for field, spec in CHILDREN.items():
+        project_dict.pop(field, None)
+        if spec.window_field:
+            project_dict[spec.window_field] = []
     
     await client_projects_collection.insert_one(project_dict)
+    project_dict['activity_log'] = [await record_activity(project.id, activity)]
     
-    return convert_project_to_response(project_dict)
+    return ProjectJSONResponse(convert_project_to_response(project_dict, ADMIN_PROJECTS_PATH))
 
 @router.put("/{project_id}", response_model=ClientProjectResponse)
 async def update_project(project_id: str, project_data: ClientProjectUpdate, admin = Depends(get_current_admin)):
-    """Update a client project (Admin only)"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
-    
-    if not project_doc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Project not found"
-        )
-    
+    """Update a client project (Admin only)
+
+    The fields and the activity entry are written with one
+    ``find_one_and_update`` that also returns the updated project.
+    """
     # Prepare update data
     update_data = {}
     changes = []
@@ -250,6 +180,13 @@ async def update_project(project_id: str, project_data: ClientProjectUpdate, adm
         changes.append("Description updated")
     
     if project_data.status is not None:
+        # Only a status change needs the previous value for the activity log
+        project_doc = await client_projects_collection.find_one({"id": project_id}, {"_id": 0, "status": 1})
+        if not project_doc:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Project not found"
+            )
         old_status = project_doc['status']
         update_data['status'] = project_data.status
         changes.append(f"Status changed from '{old_status}' to '{project_data.status}'")
@@ -286,6 +223,7 @@ async def update_project(project_id: str, project_data: ClientProjectUpdate, adm
     update_data['last_activity_at'] = datetime.utcnow().isoformat()
     
     # Add activity log
+    activity = None
     if changes:
         activity = log_activity(
             project_id,
@@ -294,42 +232,33 @@ async def update_project(project_id: str, project_data: ClientProjectUpdate, adm
             admin["id"],
             admin.get("username", "Admin")
         )
-        activity['timestamp'] = activity['timestamp'].isoformat()
-        await client_projects_collection.update_one(
-            {"id": project_id},
-            {"$push": {"activity_log": activity}}
-        )
-    
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {"$set": update_data}
-    )
     
-    updated_project = await client_projects_collection.find_one({"id": project_id})
-    return convert_project_to_response(updated_project)
+    updated_project = await update_project_fields(project_id, update_data, activity)
+    if not updated_project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    await attach_children([updated_project])
+    return ProjectJSONResponse(convert_project_to_response(updated_project, ADMIN_PROJECTS_PATH))
 
 @router.delete("/{project_id}")
 async def delete_project(project_id: str, admin = Depends(get_current_admin)):
     """Delete a client project (Admin only)"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
-    
-    if project_doc:
-        # Delete associated files from filesystem
-        for file_info in project_doc.get('files', []):
-            file_path = file_info.get('file_path')
-            if file_path and os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                except Exception:
-                    pass
+    # One round trip, and the files queued below are the ones actually deleted
+    project_doc = await client_projects_collection.find_one_and_delete({"id": project_id}, {"files": 1})
     
-    result = await client_projects_collection.delete_one({"id": project_id})
-    
-    if result.deleted_count == 0:
+    if not project_doc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
+    await delete_children(project_id)
+    await preview_workers.discard(project_id)
+    
+    # Associated files are removed in the background once the project is gone
+    for file_info in project_doc.get('files', []):
+        await queue_project_file_cleanup(project_id, file_info)
     
     return {"message": "Project deleted successfully"}
 
@@ -340,7 +269,7 @@ async def delete_project(project_id: str, admin = Depends(get_current_admin)):
 @router.post("/{project_id}/milestones", response_model=MilestoneResponse)
 async def add_milestone(project_id: str, milestone_data: MilestoneCreate, admin = Depends(get_current_admin)):
     """Add a milestone to project"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
+    project_doc = await client_projects_collection.find_one({"id": project_id}, EXISTS_PROJECTION)
     if not project_doc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
     
@@ -358,18 +287,15 @@ async def add_milestone(project_id: str, milestone_data: MilestoneCreate, admin
         admin["id"],
         admin.get("username", "Admin")
     )
-    activity['timestamp'] = activity['timestamp'].isoformat()
     
     await client_projects_collection.update_one(
         {"id": project_id},
         {
-            "$push": {
-                "milestones": milestone_dict,
-                "activity_log": activity
-            },
+            "$push": {"milestones": milestone_dict},
             "$set": {"last_activity_at": datetime.utcnow().isoformat()}
         }
     )
+    await record_activity(project_id, activity)
     
     return MilestoneResponse(**{**milestone_dict, 'created_at': milestone_dict['created_at']})
 
@@ -417,7 +343,6 @@ async def update_milestone(
         admin["id"],
         admin.get("username", "Admin")
     )
-    activity['timestamp'] = activity['timestamp'].isoformat()
     
     await client_projects_collection.update_one(
         {"id": project_id},
@@ -425,10 +350,10 @@ async def update_milestone(
             "$set": {
                 "milestones": milestones,
                 "last_activity_at": datetime.utcnow().isoformat()
-            },
-            "$push": {"activity_log": activity}
+            }
         }
     )
+    await record_activity(project_id, activity)
     
     updated_milestone = milestones[idx]
     return MilestoneResponse(**updated_milestone)
@@ -444,19 +369,18 @@ async def delete_milestone(project_id: str, milestone_id: str, admin = Depends(g
         admin["id"],
         admin.get("username", "Admin")
     )
-    activity['timestamp'] = activity['timestamp'].isoformat()
     
     result = await client_projects_collection.update_one(
-        {"id": project_id},
+        {"id": project_id, "milestones.id": milestone_id},
         {
             "$pull": {"milestones": {"id": milestone_id}},
-            "$push": {"activity_log": activity},
             "$set": {"last_activity_at": datetime.utcnow().isoformat()}
         }
     )
     
     if result.modified_count == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Milestone not found")
+    await record_activity(project_id, activity)
     
     return {"message": "Milestone deleted successfully"}
 
@@ -467,7 +391,7 @@ async def delete_milestone(project_id: str, milestone_id: str, admin = Depends(g
 @router.post("/{project_id}/tasks", response_model=TaskResponse)
 async def add_task(project_id: str, task_data: TaskCreate, admin = Depends(get_current_admin)):
     """Add a task to project"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
+    project_doc = await client_projects_collection.find_one({"id": project_id}, EXISTS_PROJECTION)
     if not project_doc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
     
@@ -487,16 +411,8 @@ async def add_task(project_id: str, task_data: TaskCreate, admin = Depends(get_c
     )
     activity['timestamp'] = activity['timestamp'].isoformat()
     
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$push": {
-                "tasks": task_dict,
-                "activity_log": activity
-            },
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
-    )
+    await add_child("tasks", project_id, task_dict)
+    await record_activity(project_id, activity, touch=True)
     
     return TaskResponse(**task_dict)
 
@@ -508,35 +424,31 @@ async def update_task(
     admin = Depends(get_current_admin)
 ):
     """Update a task"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
+    project_doc = await client_projects_collection.find_one({"id": project_id}, EXISTS_PROJECTION)
     if not project_doc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
     
-    tasks = project_doc.get('tasks', [])
-    task_found = False
-    
-    for idx, task in enumerate(tasks):
-        if task['id'] == task_id:
-            task_found = True
-            if task_data.title is not None:
-                tasks[idx]['title'] = task_data.title
-            if task_data.description is not None:
-                tasks[idx]['description'] = task_data.description
-            if task_data.status is not None:
-                tasks[idx]['status'] = task_data.status
-                if task_data.status == "completed":
-                    tasks[idx]['completed_at'] = datetime.utcnow().isoformat()
-            if task_data.priority is not None:
-                tasks[idx]['priority'] = task_data.priority
-            if task_data.assigned_to is not None:
-                tasks[idx]['assigned_to'] = task_data.assigned_to
-            if task_data.due_date is not None:
-                tasks[idx]['due_date'] = task_data.due_date.isoformat()
-            if task_data.milestone_id is not None:
-                tasks[idx]['milestone_id'] = task_data.milestone_id
-            break
-    
-    if not task_found:
+    # Only the changed fields of the one task are written
+    task_fields = {}
+    if task_data.title is not None:
+        task_fields['title'] = task_data.title
+    if task_data.description is not None:
+        task_fields['description'] = task_data.description
+    if task_data.status is not None:
+        task_fields['status'] = task_data.status
+        if task_data.status == "completed":
+            task_fields['completed_at'] = datetime.utcnow().isoformat()
+    if task_data.priority is not None:
+        task_fields['priority'] = task_data.priority
+    if task_data.assigned_to is not None:
+        task_fields['assigned_to'] = task_data.assigned_to
+    if task_data.due_date is not None:
+        task_fields['due_date'] = task_data.due_date.isoformat()
+    if task_data.milestone_id is not None:
+        task_fields['milestone_id'] = task_data.milestone_id
+    
+    updated_task = await update_child("tasks", project_id, task_id, task_fields)
+    if not updated_task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
     
     # Add activity log
@@ -549,22 +461,16 @@ async def update_task(
     )
     activity['timestamp'] = activity['timestamp'].isoformat()
     
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$set": {
-                "tasks": tasks,
-                "last_activity_at": datetime.utcnow().isoformat()
-            },
-            "$push": {"activity_log": activity}
-        }
-    )
+    await record_activity(project_id, activity, touch=True)
     
-    return TaskResponse(**tasks[idx])
+    return convert_entry(TASK_FIELDS, updated_task)
 
 @router.delete("/{project_id}/tasks/{task_id}")
 async def delete_task(project_id: str, task_id: str, admin = Depends(get_current_admin)):
     """Delete a task"""
+    if not await delete_child("tasks", project_id, task_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    
     activity = log_activity(
         project_id,
         "task_deleted",
@@ -574,17 +480,7 @@ async def delete_task(project_id: str, task_id: str, admin = Depends(get_current
     )
     activity['timestamp'] = activity['timestamp'].isoformat()
     
-    result = await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$pull": {"tasks": {"id": task_id}},
-            "$push": {"activity_log": activity},
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
-    )
-    
-    if result.modified_count == 0:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    await record_activity(project_id, activity, touch=True)
     
     return {"message": "Task deleted successfully"}
 
@@ -595,7 +491,7 @@ async def delete_task(project_id: str, task_id: str, admin = Depends(get_current
 @router.post("/{project_id}/comments", response_model=CommentResponse)
 async def add_comment(project_id: str, comment_data: CommentCreate, admin = Depends(get_current_admin)):
     """Add a comment to project"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
+    project_doc = await client_projects_collection.find_one({"id": project_id}, EXISTS_PROJECTION)
     if not project_doc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
     
@@ -619,33 +515,22 @@ async def add_comment(project_id: str, comment_data: CommentCreate, admin = Depe
     )
     activity['timestamp'] = activity['timestamp'].isoformat()
     
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$push": {
-                "comments": comment_dict,
-                "activity_log": activity
-            },
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
-    )
+    await add_child("comments", project_id, comment_dict)
+    await record_activity(project_id, activity, touch=True)
     
     return CommentResponse(**comment_dict)
 
 @router.delete("/{project_id}/comments/{comment_id}")
 async def delete_comment(project_id: str, comment_id: str, admin = Depends(get_current_admin)):
     """Delete a comment"""
-    result = await client_projects_collection.update_one(
+    if not await delete_child("comments", project_id, comment_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found")
+    
+    await client_projects_collection.update_one(
         {"id": project_id},
-        {
-            "$pull": {"comments": {"id": comment_id}},
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
+        {"$set": {"last_activity_at": datetime.utcnow().isoformat()}}
     )
     
-    if result.modified_count == 0:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found")
-    
     return {"message": "Comment deleted successfully"}
 
 # ============================================================================
@@ -655,7 +540,7 @@ async def delete_comment(project_id: str, comment_id: str, admin = Depends(get_c
 @router.post("/{project_id}/team", response_model=TeamMemberResponse)
 async def add_team_member(project_id: str, member_data: TeamMemberAdd, admin = Depends(get_current_admin)):
     """Add a team member to project"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
+    project_doc = await client_projects_collection.find_one({"id": project_id}, EXISTS_PROJECTION)
     if not project_doc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
     
@@ -676,13 +561,11 @@ async def add_team_member(project_id: str, member_data: TeamMemberAdd, admin = D
     await client_projects_collection.update_one(
         {"id": project_id},
         {
-            "$push": {
-                "team_members": member_dict,
-                "activity_log": activity
-            },
+            "$push": {"team_members": member_dict},
             "$set": {"last_activity_at": datetime.utcnow().isoformat()}
         }
     )
+    await record_activity(project_id, activity)
     
     return TeamMemberResponse(**member_dict)
 
@@ -746,10 +629,10 @@ async def update_budget(project_id: str, budget_data: BudgetUpdate, admin = Depe
             "$set": {
                 "budget": current_budget,
                 "last_activity_at": datetime.utcnow().isoformat()
-            },
-            "$push": {"activity_log": activity}
+            }
         }
     )
+    await record_activity(project_id, activity)
     
     return BudgetResponse(**current_budget)
 
@@ -764,44 +647,40 @@ async def upload_project_file(
     admin = Depends(get_current_admin)
 ):
     """Upload a file to a project (Admin only)"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
+    project_doc = await client_projects_collection.find_one({"id": project_id}, EXISTS_PROJECTION)
     if not project_doc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
     
-    # Create project-specific directory
-    project_dir = os.path.join(UPLOAD_DIR, project_id)
-    os.makedirs(project_dir, exist_ok=True)
-    
-    # Generate unique filename
     file_id = str(uuid.uuid4())
-    file_extension = os.path.splitext(file.filename)[1]
-    safe_filename = f"{file_id}{file_extension}"
-    file_path = os.path.join(project_dir, safe_filename)
     
-    # Save file
+    # Stream the file into the blob store (identical content is stored once)
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Get file size
-        file_size = os.path.getsize(file_path)
+        stored = await blob_store.store_upload(file, PROJECT_FILE_MAX_BYTES, route="project_file")
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to save file: {str(e)}"
         )
+    file_size = stored.size
     
     # Create file metadata
     project_file = ProjectFile(
         id=file_id,
         filename=file.filename,
-        file_path=file_path,
+        file_path=stored.location,
         uploaded_by=admin["id"],
         file_size=file_size,
-        file_type=file.content_type
+        file_type=file.content_type,
+        sha256=stored.key,
+        blob_key=stored.key
     )
     
     file_dict = project_file.model_dump()
@@ -821,19 +700,82 @@ async def upload_project_file(
     await client_projects_collection.update_one(
         {"id": project_id},
         {
-            "$push": {
-                "files": file_dict,
-                "activity_log": activity
-            },
+            "$push": {"files": file_dict},
             "$set": {"last_activity_at": datetime.utcnow().isoformat()}
         }
     )
+    await record_activity(project_id, activity)
+    
+    # Thumbnail and preview are rendered in the background
+    await preview_workers.enqueue(project_id, file_dict)
     
     return FileUploadResponse(
         id=file_id,
         filename=file.filename,
-        message="File uploaded successfully"
+        message="File uploaded successfully",
+        file_size=file_size,
+        sha256=stored.key
+    )
+
+@router.get("/{project_id}/files/{file_id}/download")
+async def download_project_file(
+    project_id: str,
+    file_id: str,
+    request: Request,
+    admin = Depends(get_current_admin)
+):
+    """Download a file from a project (super admins and admins on the project team)
+
+    Supports Range/If-Range, so interrupted downloads can resume.
+    """
+    project_doc = await client_projects_collection.find_one(
+        {"id": project_id},
+        {"_id": 0, "files": 1, "team_members": 1}
+    )
+    if not project_doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
+        )
+    
+    if admin.get("role") != "super_admin" and not any(
+        member.get("admin_id") == admin["id"] for member in project_doc.get("team_members", [])
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not assigned to this project"
+        )
+    
+    file_info = next((f for f in project_doc.get("files", []) if f["id"] == file_id), None)
+    if not file_info:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    
+    return await file_download_response(request, file_info)
+
+@router.get("/{project_id}/files/{file_id}/thumbnail")
+async def get_file_thumbnail(project_id: str, file_id: str, admin = Depends(get_current_admin)):
+    """Small JPEG thumbnail of an image or PDF file"""
+    return await _file_preview(project_id, file_id, "thumbnail")
+
+@router.get("/{project_id}/files/{file_id}/preview")
+async def get_file_preview(project_id: str, file_id: str, admin = Depends(get_current_admin)):
+    """Larger JPEG preview of an image or the first page of a PDF"""
+    return await _file_preview(project_id, file_id, "preview")
+
+async def _file_preview(project_id: str, file_id: str, kind: str):
+    project_doc = await client_projects_collection.find_one(
+        {"id": project_id, "files.id": file_id},
+        {"_id": 0, "files": {"$elemMatch": {"id": file_id}}}
     )
+    if not project_doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    return preview_response(project_doc['files'][0], kind)
 
 @router.delete("/{project_id}/files/{file_id}")
 async def delete_project_file(
@@ -862,16 +804,26 @@ async def delete_project_file(
             detail="File not found"
         )
     
-    # Delete file from filesystem
-    file_path = file_to_delete['file_path']
-    if os.path.exists(file_path):
-        try:
-            os.remove(file_path)
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to delete file: {str(e)}"
-            )
+    # Remove file from project; only the request that removed it cleans up
+    # its blobs, using the entry as it was removed (previews may have been
+    # added since it was read)
+    removed = await client_projects_collection.find_one_and_update(
+        {"id": project_id, "files.id": file_id},
+        {
+            "$pull": {"files": {"id": file_id}},
+            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
+        },
+        projection={"_id": 0, "files": {"$elemMatch": {"id": file_id}}}
+    )
+    if not removed or not removed.get('files'):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    await preview_workers.discard(project_id, file_id)
+    
+    # Delete file from storage in the background
+    await queue_project_file_cleanup(project_id, removed['files'][0])
     
     # Add activity log
     activity = log_activity(
@@ -882,16 +834,7 @@ async def delete_project_file(
         admin.get("username", "Admin")
     )
     activity['timestamp'] = activity['timestamp'].isoformat()
-    
-    # Remove file from project
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$pull": {"files": {"id": file_id}},
-            "$push": {"activity_log": activity},
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
-    )
+    await record_activity(project_id, activity)
     
     return {"message": "File deleted successfully"}
 
@@ -902,7 +845,7 @@ async def delete_project_file(
 @router.post("/{project_id}/chat", response_model=ChatMessageResponse)
 async def send_chat_message(project_id: str, message_data: ChatMessageCreate, admin = Depends(get_current_admin)):
     """Send a chat message to client (Admin)"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
+    project_doc = await client_projects_collection.find_one({"id": project_id}, EXISTS_PROJECTION)
     if not project_doc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
     
@@ -927,61 +870,127 @@ async def send_chat_message(project_id: str, message_data: ChatMessageCreate, ad
     )
     activity['timestamp'] = activity['timestamp'].isoformat()
     
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$push": {
-                "chat_messages": message_dict,
-                "activity_log": activity
-            },
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
-    )
+    await add_child("chat_messages", project_id, message_dict)
+    await record_activity(project_id, activity, touch=True)
     
     return ChatMessageResponse(**message_dict)
 
 @router.get("/{project_id}/chat", response_model=List[ChatMessageResponse])
-async def get_chat_messages(project_id: str, admin = Depends(get_current_admin)):
-    """Get all chat messages for a project (Admin)"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
-    if not project_doc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
-    
-    # Mark admin messages as read
-    chat_messages = project_doc.get('chat_messages', [])
-    updated = False
-    for msg in chat_messages:
-        if msg['sender_type'] == 'client' and not msg.get('read', False):
-            msg['read'] = True
-            updated = True
-    
-    if updated:
-        await client_projects_collection.update_one(
-            {"id": project_id},
-            {"$set": {"chat_messages": chat_messages}}
+async def get_chat_messages(
+    project_id: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    admin = Depends(get_current_admin)
+):
+    """Get the most recent chat messages for a project (Admin)
+
+    Pass ``before`` (a cursor from /chat/messages) to load older messages.
+    """
+    # Mark the client's messages as read in one atomic update
+    try:
+        chat_messages = await mark_project_chat_read({"id": project_id}, "client", limit=limit, before=before)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if chat_messages is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found"
         )
     
-    return [
-        ChatMessageResponse(
-            id=cm['id'],
-            sender_id=cm['sender_id'],
-            sender_name=cm['sender_name'],
-            sender_type=cm['sender_type'],
-            message=cm['message'],
-            read=cm.get('read', False),
-            created_at=cm['created_at'] if isinstance(cm['created_at'], str) else cm['created_at'].isoformat()
-        ) for cm in chat_messages
-    ]
+    return convert_entries(CHAT_MESSAGE_FIELDS, chat_messages)
 
 @router.get("/{project_id}/unread-count")
 async def get_unread_count(project_id: str, admin = Depends(get_current_admin)):
     """Get count of unread messages from client (Admin)"""
-    project_doc = await client_projects_collection.find_one({"id": project_id})
+    project_doc = await client_projects_collection.find_one({"id": project_id}, {"_id": 0, "id": 1})
     if not project_doc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
     
-    chat_messages = project_doc.get('chat_messages', [])
-    unread_count = sum(1 for msg in chat_messages if msg['sender_type'] == 'client' and not msg.get('read', False))
+    await migrate_project(project_id)
+    unread_count = await count_children(
+        "chat_messages", project_id, {"sender_type": "client", "read": {"$ne": True}}
+    )
     
     return {"unread_count": unread_count}
 
+# ============================================================================
+# PAGINATED HISTORY (Admin)
+# ============================================================================
+
+async def _child_page(project_id: str, kind: str, limit: Optional[int], before: Optional[str], after: Optional[str]):
+    """Cursor page of a project sub-entity, 404/400 on unknown project or bad cursor"""
+    try:
+        page = await project_child_page({"id": project_id}, kind, limit=limit, before=before, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if page is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    return page
+
+@router.get("/{project_id}/tasks", response_model=TaskPage)
+async def list_tasks(
+    project_id: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    admin = Depends(get_current_admin)
+):
+    """Cursor-paginated tasks, oldest first within a page"""
+    page = await _child_page(project_id, "tasks", limit, before, after)
+    return TaskPage(
+        items=convert_entries(TASK_FIELDS, page['items']),
+        next_cursor=page['next_cursor'],
+        has_more=page['has_more']
+    )
+
+@router.get("/{project_id}/comments", response_model=CommentPage)
+async def list_comments(
+    project_id: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    admin = Depends(get_current_admin)
+):
+    """Cursor-paginated comments"""
+    page = await _child_page(project_id, "comments", limit, before, after)
+    return CommentPage(
+        items=convert_entries(COMMENT_FIELDS, page['items']),
+        next_cursor=page['next_cursor'],
+        has_more=page['has_more']
+    )
+
+@router.get("/{project_id}/chat/messages", response_model=ChatMessagePage)
+async def list_chat_messages(
+    project_id: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    admin = Depends(get_current_admin)
+):
+    """Cursor-paginated chat history (does not mark messages as read)"""
+    page = await _child_page(project_id, "chat_messages", limit, before, after)
+    return ChatMessagePage(
+        items=convert_entries(CHAT_MESSAGE_FIELDS, page['items']),
+        next_cursor=page['next_cursor'],
+        has_more=page['has_more']
+    )
+
+@router.get("/{project_id}/activity", response_model=ActivityPage)
+async def list_activity(
+    project_id: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    admin = Depends(get_current_admin)
+):
+    """Cursor-paginated activity archive.
+
+    Project responses only carry the most recent activity entries; page
+    back through the full history here with ``before``.
+    """
+    page = await _child_page(project_id, "activity_log", limit, before, after)
+    return ActivityPage(
+        items=convert_entries(ACTIVITY_FIELDS, page['items']),
+        next_cursor=page['next_cursor'],
+        has_more=page['has_more']
+    )
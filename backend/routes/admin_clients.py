@@ -2,10 +2,13 @@ from fastapi import APIRouter, HTTPException, status, Depends
 from typing import List
 from schemas.client import ClientCreate, ClientUpdate, ClientResponse
 from database import clients_collection
-from auth.password import hash_password
+from auth.password import hash_password_async
 from auth.admin_auth import get_current_admin
+from auth.principal_cache import invalidate_client
 from models.client import Client
 from datetime import datetime
+from pymongo.errors import DuplicateKeyError
+from utils.repository import update_document
 
 router = APIRouter(prefix="/admin/clients", tags=["admin-clients"])
 
@@ -61,7 +64,7 @@ async def create_client(client_data: ClientCreate, admin = Depends(get_current_a
     client = Client(
         name=client_data.name,
         email=client_data.email,
-        password_hash=hash_password(client_data.password),
+        password_hash=await hash_password_async(client_data.password),
         company=client_data.company,
         phone=client_data.phone,
         is_active=client_data.is_active,
@@ -71,7 +74,14 @@ async def create_client(client_data: ClientCreate, admin = Depends(get_current_a
     client_dict = client.model_dump()
     client_dict['created_at'] = client_dict['created_at'].isoformat()
     
-    await clients_collection.insert_one(client_dict)
+    try:
+        await clients_collection.insert_one(client_dict)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent create - the unique index caught it
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     
     return ClientResponse(
         id=client.id,
@@ -86,14 +96,6 @@ async def create_client(client_data: ClientCreate, admin = Depends(get_current_a
 @router.put("/{client_id}", response_model=ClientResponse)
 async def update_client(client_id: str, client_data: ClientUpdate, admin = Depends(get_current_admin)):
     """Update a client (Admin only)"""
-    client_doc = await clients_collection.find_one({"id": client_id})
-    
-    if not client_doc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Client not found"
-        )
-    
     # Prepare update data
     update_data = {}
     if client_data.name is not None:
@@ -108,7 +110,7 @@ async def update_client(client_id: str, client_data: ClientUpdate, admin = Depen
             )
         update_data['email'] = client_data.email
     if client_data.password is not None:
-        update_data['password_hash'] = hash_password(client_data.password)
+        update_data['password_hash'] = await hash_password_async(client_data.password)
     if client_data.company is not None:
         update_data['company'] = client_data.company
     if client_data.phone is not None:
@@ -118,13 +120,25 @@ async def update_client(client_id: str, client_data: ClientUpdate, admin = Depen
     
     update_data['updated_at'] = datetime.utcnow().isoformat()
     
-    await clients_collection.update_one(
-        {"id": client_id},
-        {"$set": update_data}
-    )
+    try:
+        updated_client = await update_document(
+            clients_collection,
+            {"id": client_id},
+            {"$set": update_data},
+            projection={"_id": 0, "password_hash": 0}
+        )
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already in use"
+        )
+    invalidate_client(client_id)
     
-    # Fetch updated client
-    updated_client = await clients_collection.find_one({"id": client_id})
+    if not updated_client:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Client not found"
+        )
     
     return ClientResponse(
         id=updated_client['id'],
@@ -140,6 +154,7 @@ async def update_client(client_id: str, client_data: ClientUpdate, admin = Depen
 async def delete_client(client_id: str, admin = Depends(get_current_admin)):
     """Delete a client (Admin only)"""
     result = await clients_collection.delete_one({"id": client_id})
+    invalidate_client(client_id)
     
     if result.deleted_count == 0:
         raise HTTPException(
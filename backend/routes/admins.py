@@ -1,17 +1,25 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends
 from typing import List
 from schemas.admin import AdminCreate, AdminUpdate, AdminLogin, AdminResponse, TokenResponse
 from database import admins_collection
-from auth import hash_password, verify_password, create_access_token
+from pymongo.errors import DuplicateKeyError
+from auth import hash_password_async, verify_password_and_rehash, create_access_token
 from auth.admin_auth import get_current_admin, require_super_admin
+from auth.login_throttle import login_throttle
+from auth.password import password_hasher
+from auth.principal_cache import invalidate_admin, principal_cache
 from models.admin import Admin, AdminPermissions
 from utils import serialize_document
+from utils.rate_limit import rate_limiter
 
 router = APIRouter(prefix="/admins", tags=["admins"])
 
 @router.post("/login", response_model=TokenResponse)
-async def admin_login(credentials: AdminLogin):
+async def admin_login(credentials: AdminLogin, request: Request):
     """Admin login endpoint - supports both username and email"""
+    # Reject brute-force attempts before any lookup or bcrypt work
+    await login_throttle.check(request, "admin", credentials.username)
+    
     # Find admin by username or email
     admin_doc = await admins_collection.find_one({
         "$or": [
@@ -27,11 +35,21 @@ async def admin_login(credentials: AdminLogin):
     
     # Verify password - handle both password and password_hash fields
     password_hash = admin_doc.get('password_hash', admin_doc.get('password'))
-    if not password_hash or not verify_password(credentials.password, password_hash):
+    if not password_hash:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid credentials"
+        )
+    valid, new_hash = await verify_password_and_rehash(credentials.password, password_hash)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
+    if new_hash:
+        # Cost factor changed since this hash was made
+        await admins_collection.update_one({"id": admin_doc['id']}, {"$set": {"password_hash": new_hash}})
+    await login_throttle.succeeded("admin", credentials.username)
     
     # Determine role - handle both role and is_super_admin fields
     role = admin_doc.get("role")
@@ -62,6 +80,26 @@ async def verify_token(current_admin: dict = Depends(get_current_admin)):
     """Verify JWT token"""
     return {"user": current_admin}
 
+@router.get("/password-hasher-stats")
+async def get_password_hasher_stats(current_admin: dict = Depends(get_current_admin)):
+    """bcrypt thread pool queue depth, rejections and timings"""
+    return password_hasher.stats()
+
+@router.get("/principal-cache-stats")
+async def get_principal_cache_stats(current_admin: dict = Depends(get_current_admin)):
+    """Hit rate of the cache behind get_current_admin / get_current_client"""
+    return principal_cache.stats()
+
+@router.get("/login-throttle-stats")
+async def get_login_throttle_stats(current_admin: dict = Depends(get_current_admin)):
+    """Login attempts allowed and rejected by the brute-force limits"""
+    return login_throttle.stats()
+
+@router.get("/rate-limit-stats")
+async def get_rate_limit_stats(current_admin: dict = Depends(get_current_admin)):
+    """Requests allowed and rejected per rate limit policy"""
+    return rate_limiter.stats()
+
 @router.post("/init")
 async def initialize_super_admin():
     """Initialize first super admin (only works if no super admin exists)"""
@@ -75,7 +113,7 @@ async def initialize_super_admin():
     # Create default super admin with all permissions
     admin = Admin(
         username="admin",
-        password_hash=hash_password("admin123"),
+        password_hash=await hash_password_async("admin123"),
         role="super_admin",
         permissions=AdminPermissions(
             canManageAdmins=True,
@@ -188,7 +226,7 @@ async def create_admin(
     # Create admin
     admin = Admin(
         username=admin_data.username,
-        password_hash=hash_password(admin_data.password),
+        password_hash=await hash_password_async(admin_data.password),
         role=admin_data.role,
         permissions=permissions,
         created_by=current_admin['username']
@@ -198,7 +236,14 @@ async def create_admin(
     admin_dict['created_at'] = admin_dict['created_at'].isoformat()
     admin_dict['permissions'] = admin_dict['permissions'].model_dump() if hasattr(admin_dict['permissions'], 'model_dump') else admin_dict['permissions']
     
-    await admins_collection.insert_one(admin_dict)
+    try:
+        await admins_collection.insert_one(admin_dict)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent create - the unique index caught it
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already exists"
+        )
     
     return {
         "id": admin.id,
@@ -238,16 +283,23 @@ async def update_admin(
         update_data['username'] = admin_data.username
     
     if admin_data.password:
-        update_data['password_hash'] = hash_password(admin_data.password)
+        update_data['password_hash'] = await hash_password_async(admin_data.password)
     
     if admin_data.permissions:
         update_data['permissions'] = admin_data.permissions.model_dump()
     
     if update_data:
-        await admins_collection.update_one(
-            {"id": admin_id},
-            {"$set": update_data}
-        )
+        try:
+            await admins_collection.update_one(
+                {"id": admin_id},
+                {"$set": update_data}
+            )
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Username already exists"
+            )
+        invalidate_admin(admin_id)
     
     return {"message": "Admin updated successfully"}
 
@@ -280,4 +332,5 @@ async def delete_admin(
         )
     
     await admins_collection.delete_one({"id": admin_id})
+    invalidate_admin(admin_id)
     return {"message": "Admin deleted successfully"}
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends
-from typing import Optional
-from datetime import datetime, timedelta
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
 import uuid
 import logging
 
@@ -10,16 +10,25 @@ from schemas.analytics import (
     AnalyticsEventResponse,
     AnalyticsSummary,
     PageViewStats,
-    BlogViewStats
+    BlogViewStats,
+    AnalyticsBufferStats,
+    AnalyticsTimeSeries,
+    TimeSeriesPoint
 )
 from auth.admin_auth import get_current_admin
+from utils.analytics_buffer import analytics_buffer
+from utils.analytics_rollups import bucket_start, summarize_rollups
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 logger = logging.getLogger(__name__)
 
 @router.post("/event", status_code=201)
 async def track_event(event: AnalyticsEventCreate):
-    """Track an analytics event - public endpoint, fails silently"""
+    """Track an analytics event - public endpoint, fails silently.
+
+    The event is only queued here; the analytics buffer writes it to MongoDB
+    in a batch so the request never waits on a database round trip.
+    """
     try:
         event_data = {
             "_id": str(uuid.uuid4()),
@@ -30,109 +39,241 @@ async def track_event(event: AnalyticsEventCreate):
             "timestamp": datetime.utcnow()
         }
         
-        await analytics_collection.insert_one(event_data)
+        analytics_buffer.enqueue(event_data)
         return {"status": "success", "message": "Event tracked"}
     except Exception as e:
         # Fail silently - don't block user actions
         logger.warning(f"Analytics tracking failed: {str(e)}")
         return {"status": "success", "message": "Event received"}
 
-@router.get("/summary", response_model=AnalyticsSummary)
-async def get_analytics_summary(
-    period: str = "7days",
-    current_admin: dict = Depends(get_current_admin)
-):
-    """Get analytics summary - admin only"""
-    try:
-        # Calculate date range
-        now = datetime.utcnow()
-        
-        if period == "today":
-            start_date = datetime(now.year, now.month, now.day)
-        elif period == "7days":
-            start_date = now - timedelta(days=7)
-        elif period == "30days":
-            start_date = now - timedelta(days=30)
-        else:
-            start_date = now - timedelta(days=7)
-        
-        # Query filter
-        date_filter = {"timestamp": {"$gte": start_date}}
-        
-        # Get total page views
-        total_page_views = await analytics_collection.count_documents({
-            **date_filter,
-            "event_type": "page_view"
-        })
-        
-        # Get contact submissions
-        contact_submissions = await analytics_collection.count_documents({
-            **date_filter,
-            "event_type": "contact_submission"
-        })
-        
-        # Get calculator usage
-        calculator_opened = await analytics_collection.count_documents({
-            **date_filter,
-            "event_type": "calculator_opened"
-        })
-        
-        calculator_estimates = await analytics_collection.count_documents({
-            **date_filter,
-            "event_type": "calculator_estimate"
-        })
-        
-        # Get page views by page
-        page_views_pipeline = [
-            {"$match": {**date_filter, "event_type": "page_view"}},
-            {"$group": {
-                "_id": "$page_name",
-                "count": {"$sum": 1}
-            }},
+@router.get("/buffer-stats", response_model=AnalyticsBufferStats)
+async def get_buffer_stats(current_admin: dict = Depends(get_current_admin)):
+    """Get ingestion buffer depth, flush latency and drop counters - admin only"""
+    return AnalyticsBufferStats(**analytics_buffer.stats())
+
+def _period_start(period: str, now: datetime) -> datetime:
+    """Start of the reporting window for a summary period"""
+    if period == "today":
+        return datetime(now.year, now.month, now.day)
+    elif period == "30days":
+        return now - timedelta(days=30)
+    # Default: 7days
+    return now - timedelta(days=7)
+
+async def _summary_from_rollups(start_date: datetime, now: datetime, period: str) -> AnalyticsSummary:
+    """Build the summary from pre-aggregated hourly/daily counters"""
+    rows = await summarize_rollups(start_date, now)
+
+    totals = {}
+    page_views = {}
+    blog_views = {}
+    for row in rows:
+        key = row["_id"]
+        event_type = key.get("event_type")
+        totals[event_type] = totals.get(event_type, 0) + row["count"]
+
+        if event_type == "page_view" and key.get("page_name"):
+            page_name = key["page_name"]
+            page_views[page_name] = page_views.get(page_name, 0) + row["count"]
+        elif event_type == "blog_view" and key.get("blog_id"):
+            blog_id = key["blog_id"]
+            title, count = blog_views.get(blog_id, (None, 0))
+            blog_views[blog_id] = (row.get("blog_title") or title, count + row["count"])
+
+    page_views_by_page = [
+        PageViewStats(page_name=page_name, count=count)
+        for page_name, count in sorted(page_views.items(), key=lambda item: -item[1])
+    ]
+    top_blogs = sorted(blog_views.items(), key=lambda item: -item[1][1])[:10]
+
+    return AnalyticsSummary(
+        total_page_views=totals.get("page_view", 0),
+        contact_submissions=totals.get("contact_submission", 0),
+        calculator_opened=totals.get("calculator_opened", 0),
+        calculator_estimates=totals.get("calculator_estimate", 0),
+        page_views_by_page=page_views_by_page,
+        blog_views=[
+            BlogViewStats(blog_id=blog_id, blog_title=title or "Untitled", count=count)
+            for blog_id, (title, count) in top_blogs
+        ],
+        period=period
+    )
+
+SUMMARY_EVENT_TYPES = {
+    "page_view": "total_page_views",
+    "contact_submission": "contact_submissions",
+    "calculator_opened": "calculator_opened",
+    "calculator_estimate": "calculator_estimates",
+}
+SERIES_FIELDS = {
+    **SUMMARY_EVENT_TYPES,
+    "blog_view": "blog_views",
+}
+MAX_SERIES_POINTS = 1000
+
+def _raw_facet_pipeline(date_filter: dict, granularity: Optional[str] = None) -> list:
+    """One $match on the window followed by a $facet branch per statistic"""
+    facets = {
+        "totals": [
+            {"$group": {"_id": "$event_type", "count": {"$sum": 1}}}
+        ],
+        "page_views": [
+            {"$match": {"event_type": "page_view"}},
+            {"$group": {"_id": "$page_name", "count": {"$sum": 1}}},
             {"$sort": {"count": -1}}
-        ]
-        
-        page_views_cursor = analytics_collection.aggregate(page_views_pipeline)
-        page_views_list = await page_views_cursor.to_list(length=None)
-        
-        page_views_by_page = [
-            PageViewStats(page_name=item["_id"], count=item["count"])
-            for item in page_views_list if item["_id"]
-        ]
-        
-        # Get blog views
-        blog_views_pipeline = [
-            {"$match": {**date_filter, "event_type": "blog_view"}},
+        ],
+        "blog_views": [
+            {"$match": {"event_type": "blog_view"}},
             {"$group": {
                 "_id": {"blog_id": "$blog_id", "blog_title": "$blog_title"},
                 "count": {"$sum": 1}
             }},
             {"$sort": {"count": -1}},
             {"$limit": 10}
+        ],
+    }
+    if granularity:
+        facets["series"] = [
+            {"$group": {
+                "_id": {
+                    "bucket": {"$dateTrunc": {"date": "$timestamp", "unit": granularity}},
+                    "event_type": "$event_type"
+                },
+                "count": {"$sum": 1}
+            }}
         ]
-        
-        blog_views_cursor = analytics_collection.aggregate(blog_views_pipeline)
-        blog_views_list = await blog_views_cursor.to_list(length=None)
-        
-        blog_views = [
-            BlogViewStats(
-                blog_id=item["_id"]["blog_id"],
-                blog_title=item["_id"]["blog_title"] or "Untitled",
-                count=item["count"]
-            )
-            for item in blog_views_list if item["_id"]["blog_id"]
-        ]
-        
-        return AnalyticsSummary(
-            total_page_views=total_page_views,
-            contact_submissions=contact_submissions,
-            calculator_opened=calculator_opened,
-            calculator_estimates=calculator_estimates,
-            page_views_by_page=page_views_by_page,
-            blog_views=blog_views,
-            period=period
+    return [
+        {"$match": {"timestamp": date_filter}},
+        {"$facet": facets}
+    ]
+
+def _summary_from_facets(result: dict, period: str) -> AnalyticsSummary:
+    totals = {item["_id"]: item["count"] for item in result["totals"]}
+
+    page_views_by_page = [
+        PageViewStats(page_name=item["_id"], count=item["count"])
+        for item in result["page_views"] if item["_id"]
+    ]
+    blog_views = [
+        BlogViewStats(
+            blog_id=item["_id"]["blog_id"],
+            blog_title=item["_id"].get("blog_title") or "Untitled",
+            count=item["count"]
         )
+        for item in result["blog_views"] if item["_id"].get("blog_id")
+    ]
+
+    return AnalyticsSummary(
+        **{field: totals.get(event_type, 0) for event_type, field in SUMMARY_EVENT_TYPES.items()},
+        page_views_by_page=page_views_by_page,
+        blog_views=blog_views,
+        period=period
+    )
+
+async def _run_facets(date_filter: dict, granularity: Optional[str] = None) -> dict:
+    cursor = analytics_collection.aggregate(_raw_facet_pipeline(date_filter, granularity))
+    results = await cursor.to_list(length=1)
+    return results[0]
+
+async def _summary_from_raw(date_filter: dict, period: str) -> AnalyticsSummary:
+    """Build the summary from raw events in a single aggregation round trip"""
+    return _summary_from_facets(await _run_facets(date_filter), period)
+
+def _series_points(rows: list, start: datetime, end: datetime, granularity: str) -> List[TimeSeriesPoint]:
+    """Pivot (bucket, event_type) counts into one zero-filled point per bucket"""
+    step = timedelta(hours=1) if granularity == "hour" else timedelta(days=1)
+    bucket = bucket_start(start, granularity)
+
+    points = {}
+    while bucket < end:
+        points[bucket] = {field: 0 for field in SERIES_FIELDS.values()}
+        bucket += step
+
+    for row in rows:
+        field = SERIES_FIELDS.get(row["_id"].get("event_type"))
+        counts = points.get(row["_id"]["bucket"])
+        if field and counts is not None:
+            counts[field] = row["count"]
+
+    return [TimeSeriesPoint(bucket=bucket, **counts) for bucket, counts in points.items()]
+
+def _parse_range(start: Optional[datetime], end: Optional[datetime], now: datetime):
+    """Normalise an optional start/end pair to naive UTC datetimes"""
+    end = end or now
+    start = start or end - timedelta(days=7)
+    if start.tzinfo:
+        start = start.astimezone(timezone.utc).replace(tzinfo=None)
+    if end.tzinfo:
+        end = end.astimezone(timezone.utc).replace(tzinfo=None)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return start, end
+
+@router.get("/summary", response_model=AnalyticsSummary)
+async def get_analytics_summary(
+    period: str = "7days",
+    source: str = "rollup",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Get analytics summary - admin only
+
+    Reads the hourly/daily rollups by default; ``source=raw`` scans the raw
+    events instead (useful to verify rollups after a backfill). Passing
+    ``start``/``end`` summarises an arbitrary window from raw events and
+    reports ``period="custom"``.
+    """
+    try:
+        now = datetime.utcnow()
+
+        if start or end:
+            start, end = _parse_range(start, end, now)
+            return await _summary_from_raw({"$gte": start, "$lt": end}, "custom")
+
+        start_date = _period_start(period, now)
+        if source == "raw":
+            return await _summary_from_raw({"$gte": start_date}, period)
+        return await _summary_from_rollups(start_date, now, period)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching analytics summary: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/timeseries", response_model=AnalyticsTimeSeries)
+async def get_analytics_timeseries(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    granularity: str = "day",
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Get the summary plus per-hour/per-day event counts for charting - admin only
+
+    Defaults to the last 7 days. Both the summary and the series come from the
+    same single aggregation over raw events.
+    """
+    if granularity not in ("hour", "day"):
+        raise HTTPException(status_code=400, detail="granularity must be 'hour' or 'day'")
+
+    start, end = _parse_range(start, end, datetime.utcnow())
+    step = timedelta(hours=1) if granularity == "hour" else timedelta(days=1)
+    if (end - start) / step > MAX_SERIES_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range too large for {granularity} granularity (max {MAX_SERIES_POINTS} points)"
+        )
+
+    try:
+        result = await _run_facets({"$gte": start, "$lt": end}, granularity)
+        return AnalyticsTimeSeries(
+            start=start,
+            end=end,
+            granularity=granularity,
+            summary=_summary_from_facets(result, "custom"),
+            points=_series_points(result["series"], start, end, granularity)
+        )
+    except Exception as e:
+        logger.error(f"Error fetching analytics time series: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
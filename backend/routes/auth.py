@@ -1,7 +1,8 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
 from schemas.user import UserCreate, UserLogin, UserResponse, TokenResponse
 from database import users_collection
-from auth import hash_password, verify_password, create_access_token
+from auth import hash_password_async, verify_password_and_rehash, create_access_token
+from auth.login_throttle import login_throttle
 from utils import serialize_document
 from models import User
 
@@ -22,7 +23,7 @@ async def register(user_data: UserCreate):
     user = User(
         name=user_data.name,
         email=user_data.email,
-        password_hash=hash_password(user_data.password),
+        password_hash=await hash_password_async(user_data.password),
         role=user_data.role
     )
     
@@ -39,8 +40,11 @@ async def register(user_data: UserCreate):
     )
 
 @router.post("/login", response_model=TokenResponse)
-async def login(credentials: UserLogin):
+async def login(credentials: UserLogin, request: Request):
     """Login and receive JWT token"""
+    # Reject brute-force attempts before any lookup or bcrypt work
+    await login_throttle.check(request, "user", credentials.email)
+    
     # Find user
     user_doc = await users_collection.find_one({"email": credentials.email})
     if not user_doc:
@@ -50,11 +54,16 @@ async def login(credentials: UserLogin):
         )
     
     # Verify password
-    if not verify_password(credentials.password, user_doc['password_hash']):
+    valid, new_hash = await verify_password_and_rehash(credentials.password, user_doc['password_hash'])
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
+    if new_hash:
+        # Cost factor changed since this hash was made
+        await users_collection.update_one({"id": user_doc['id']}, {"$set": {"password_hash": new_hash}})
+    await login_throttle.succeeded("user", credentials.email)
     
     # Create access token
     access_token = create_access_token(
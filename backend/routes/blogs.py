@@ -3,9 +3,12 @@ from typing import List
 from schemas.blog import BlogCreate, BlogUpdate, BlogResponse
 from database import blogs_collection
 from utils import serialize_document, create_slug
+from utils.repository import update_document
 from models import Blog
 from datetime import datetime
+from pymongo.errors import DuplicateKeyError
 from auth.admin_auth import get_current_admin
+from utils.http_cache import ConditionalGet, conditional_get, PUBLIC_LIST_POLICY, PUBLIC_DETAIL_POLICY
 
 router = APIRouter(prefix="/blogs", tags=["blogs"])
 
@@ -14,14 +17,16 @@ router = APIRouter(prefix="/blogs", tags=["blogs"])
 # ====================================
 
 @router.get("/", response_model=List[BlogResponse])
-async def get_published_blogs():
+async def get_published_blogs(cache: ConditionalGet = Depends(conditional_get(PUBLIC_LIST_POLICY))):
     """Get all published blogs (public endpoint)"""
     cursor = blogs_collection.find({"status": "published"}).sort("created_at", -1)
     blogs = await cursor.to_list(length=100)
+    if cache.is_fresh(blogs):
+        return cache.not_modified()
     return [serialize_document(blog) for blog in blogs]
 
 @router.get("/{slug}", response_model=BlogResponse)
-async def get_blog_by_slug(slug: str):
+async def get_blog_by_slug(slug: str, cache: ConditionalGet = Depends(conditional_get(PUBLIC_DETAIL_POLICY))):
     """Get a single published blog by slug (public endpoint)"""
     blog = await blogs_collection.find_one({"slug": slug, "status": "published"})
     if not blog:
@@ -29,6 +34,8 @@ async def get_blog_by_slug(slug: str):
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Blog not found"
         )
+    if cache.is_fresh(blog):
+        return cache.not_modified()
     return serialize_document(blog)
 
 # ====================================
@@ -62,20 +69,19 @@ async def create_blog(blog_data: BlogCreate, current_admin: dict = Depends(get_c
     doc['created_at'] = doc['created_at'].isoformat()
     doc['updated_at'] = doc['updated_at'].isoformat()
     
-    await blogs_collection.insert_one(doc)
+    try:
+        await blogs_collection.insert_one(doc)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent create - the unique index caught it
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A blog with this slug already exists"
+        )
     return serialize_document(doc)
 
 @router.put("/admin/{blog_id}", response_model=BlogResponse)
 async def update_blog(blog_id: str, blog_data: BlogUpdate, current_admin: dict = Depends(get_current_admin)):
     """Update a blog (admin only)"""
-    # Check if blog exists
-    existing = await blogs_collection.find_one({"id": blog_id})
-    if not existing:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Blog not found"
-        )
-    
     # Update only provided fields
     update_data = blog_data.model_dump(exclude_unset=True)
     
@@ -97,12 +103,19 @@ async def update_blog(blog_id: str, blog_data: BlogUpdate, current_admin: dict =
     
     update_data['updated_at'] = datetime.utcnow().isoformat()
     
-    await blogs_collection.update_one(
-        {"id": blog_id},
-        {"$set": update_data}
-    )
+    try:
+        updated_blog = await update_document(blogs_collection, {"id": blog_id}, {"$set": update_data})
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A blog with this slug already exists"
+        )
     
-    updated_blog = await blogs_collection.find_one({"id": blog_id})
+    if not updated_blog:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Blog not found"
+        )
     return serialize_document(updated_blog)
 
 @router.delete("/admin/{blog_id}")
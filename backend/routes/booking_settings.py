@@ -10,21 +10,30 @@ from schemas.booking_setting import (
     BookingSettingResponse
 )
 from auth.admin_auth import get_current_admin
+from utils.cache import content_cache
 
 router = APIRouter(prefix="/booking-settings", tags=["booking-settings"])
 
 # IST timezone
 IST = pytz.timezone('Asia/Kolkata')
 
+CACHE_KEY = "booking_settings"
+
 def get_ist_now():
     """Get current time in IST"""
     return datetime.now(IST)
 
+async def get_active_booking_settings() -> Optional[dict]:
+    """Active booking settings via the content cache (treat as read-only)"""
+    return await content_cache.get_or_load(
+        CACHE_KEY,
+        lambda: booking_settings_collection.find_one({"is_active": True})
+    )
+
 @router.get("/", response_model=Optional[BookingSettingResponse])
 async def get_booking_settings():
     """Get active booking settings (PUBLIC)"""
-    settings = await booking_settings_collection.find_one({"is_active": True})
-    return settings
+    return await get_active_booking_settings()
 
 @router.get("/admin", response_model=Optional[BookingSettingResponse])
 async def get_booking_settings_admin(_: dict = Depends(get_current_admin)):
@@ -58,6 +67,7 @@ async def create_booking_settings(
             {"id": existing["id"]},
             {"$set": settings_data}
         )
+        content_cache.invalidate(CACHE_KEY)
         updated = await booking_settings_collection.find_one({"id": existing["id"]})
         return updated
     else:
@@ -66,6 +76,7 @@ async def create_booking_settings(
         settings_data["created_at"] = now
         
         await booking_settings_collection.insert_one(settings_data)
+        content_cache.invalidate(CACHE_KEY)
         return settings_data
 
 @router.put("/admin/{settings_id}", response_model=BookingSettingResponse)
@@ -97,6 +108,7 @@ async def update_booking_settings(
         {"id": settings_id},
         {"$set": update_data}
     )
+    content_cache.invalidate(CACHE_KEY)
     
     updated = await booking_settings_collection.find_one({"id": settings_id})
     return updated
@@ -108,6 +120,7 @@ async def delete_booking_settings(
 ):
     """Delete booking settings (ADMIN)"""
     result = await booking_settings_collection.delete_one({"id": settings_id})
+    content_cache.invalidate(CACHE_KEY)
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Settings not found")
     return {"message": "Settings deleted successfully"}
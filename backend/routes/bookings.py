@@ -3,7 +3,9 @@ from typing import List, Optional
 from datetime import datetime, timedelta
 import uuid
 import pytz
-from database import bookings_collection, booking_settings_collection
+from database import bookings_collection
+from utils.repository import update_document
+from routes.booking_settings import get_active_booking_settings
 from schemas.booking import BookingCreate, BookingUpdate, BookingResponse, AvailableSlot
 from auth.admin_auth import get_current_admin
 
@@ -24,7 +26,7 @@ def get_ist_datetime(date_str: str, time_str: str = "00:00"):
 async def check_slot_availability(date: str, time_slot: str) -> dict:
     """Check if a time slot is available on a given date"""
     # Get booking settings
-    settings = await booking_settings_collection.find_one({"is_active": True})
+    settings = await get_active_booking_settings()
     if not settings:
         return {"available": False, "reason": "Booking system is not active"}
     
@@ -81,7 +83,7 @@ async def get_available_slots(start_date: str, days: int = 14):
     - start_date: YYYY-MM-DD format
     - days: number of days to check (default 14)
     """
-    settings = await booking_settings_collection.find_one({"is_active": True})
+    settings = await get_active_booking_settings()
     if not settings:
         raise HTTPException(status_code=404, detail="Booking system is not active")
     
@@ -133,7 +135,7 @@ async def create_booking(booking: BookingCreate):
         )
     
     # Get booking settings for meeting type
-    settings = await booking_settings_collection.find_one({"is_active": True})
+    settings = await get_active_booking_settings()
     meeting_type = settings.get("meeting_type", "Google Meet") if settings else "Google Meet"
     
     # Create booking
@@ -160,13 +162,13 @@ async def create_booking(booking: BookingCreate):
     
     await bookings_collection.insert_one(booking_data)
     
-    # Send email notification to admin (async, non-blocking)
+    # Queue email notification to admin (sent by the background job workers)
     try:
         from utils.email_service import send_booking_notification
         await send_booking_notification(booking_data)
     except Exception as e:
         # Log error but don't fail the booking
-        print(f"Failed to send email notification: {str(e)}")
+        print(f"Failed to queue email notification: {str(e)}")
     
     return booking_data
 
@@ -222,36 +224,39 @@ async def update_booking(
     booking_update: BookingUpdate,
     _: dict = Depends(get_current_admin)
 ):
-    """Update a booking (ADMIN)"""
-    booking = await bookings_collection.find_one({"id": booking_id})
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-    
+    """Update a booking (ADMIN)
+
+    One pipeline update: user input is wrapped in ``$literal`` so it is never
+    read as an expression.
+    """
+    now = get_ist_now().isoformat()
     update_data = {
-        "updated_at": get_ist_now().isoformat()
+        "updated_at": now
     }
     
     if booking_update.status:
-        update_data["status"] = booking_update.status
+        update_data["status"] = {"$literal": booking_update.status}
         
-        if booking_update.status == "confirmed" and not booking.get("confirmed_at"):
-            update_data["confirmed_at"] = get_ist_now().isoformat()
+        # Keep the first confirmation/cancellation time if already set
+        if booking_update.status == "confirmed":
+            update_data["confirmed_at"] = {"$ifNull": ["$confirmed_at", now]}
         
-        if booking_update.status == "cancelled" and not booking.get("cancelled_at"):
-            update_data["cancelled_at"] = get_ist_now().isoformat()
+        if booking_update.status == "cancelled":
+            update_data["cancelled_at"] = {"$ifNull": ["$cancelled_at", now]}
     
     if booking_update.meeting_link is not None:
-        update_data["meeting_link"] = booking_update.meeting_link
+        update_data["meeting_link"] = {"$literal": booking_update.meeting_link}
     
     if booking_update.admin_notes is not None:
-        update_data["admin_notes"] = booking_update.admin_notes
+        update_data["admin_notes"] = {"$literal": booking_update.admin_notes}
     
-    await bookings_collection.update_one(
+    updated_booking = await update_document(
+        bookings_collection,
         {"id": booking_id},
-        {"$set": update_data}
+        [{"$set": update_data}]
     )
-    
-    updated_booking = await bookings_collection.find_one({"id": booking_id})
+    if not updated_booking:
+        raise HTTPException(status_code=404, detail="Booking not found")
     return updated_booking
 
 @router.delete("/admin/{booking_id}")
@@ -1,15 +1,53 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from schemas.chat import ChatMessageCreate, ChatReply
 from database import conversations_collection
-from auth.admin_auth import get_current_admin, check_permission
+from auth.admin_auth import get_current_admin, get_stream_admin, check_permission
+from auth.stream_tickets import STREAM_TICKET_TTL, issue_stream_ticket
 from models.chat import Conversation, ChatMessage
-from datetime import datetime
+from utils.chat_store import (
+    append_message,
+    delete_messages,
+    ensure_migrated,
+    list_conversation_summaries,
+    list_messages,
+    mark_conversation_read,
+    message_preview,
+    recent_messages_for,
+    total_unread
+)
+from utils.chat_hub import chat_hub, conversation_topic, INBOX_TOPIC
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+async def _message_page(conversation_id: str, limit: Optional[int], before: Optional[str], after: Optional[str] = None):
+    """Fetch a page of messages, turning a malformed cursor into a 400"""
+    try:
+        return await list_messages(conversation_id, limit=limit, before=before, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+def _require_chat_access(current_admin: dict):
+    if not check_permission(current_admin, 'canAccessChat') and current_admin['role'] != 'super_admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+
+def _event_stream(request: Request, topic: str) -> StreamingResponse:
+    """Stream a hub topic as Server-Sent Events (subscribed once the body starts)"""
+    if chat_hub.full:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many live chat connections")
+    
+    return StreamingResponse(
+        chat_hub.stream(topic, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/messages")
 async def create_message(message_data: ChatMessageCreate):
     """Create new customer message (public endpoint for chat widget)"""
@@ -38,6 +76,7 @@ async def create_message(message_data: ChatMessageCreate):
         conversation = await conversations_collection.find_one({
             "customer_email": message_data.customer_email
         })
+        conversation = await ensure_migrated(conversation)
         
         # Create new message
         new_message = ChatMessage(
@@ -45,20 +84,24 @@ async def create_message(message_data: ChatMessageCreate):
             message=message_data.message.strip(),
             read=False
         )
+        message_dict = new_message.model_dump()
+        message_dict['timestamp'] = message_dict['timestamp'].isoformat()
         
         if conversation:
-            # Add message to existing conversation
-            message_dict = new_message.model_dump()
-            message_dict['timestamp'] = message_dict['timestamp'].isoformat()
-            
+            # Count the message before storing it: a concurrent mark-as-read
+            # then either flips it and decrements, or misses it entirely
             await conversations_collection.update_one(
                 {"id": conversation['id']},
                 {
-                    "$push": {"messages": message_dict},
-                    "$inc": {"unread_count": 1},
-                    "$set": {"last_message_at": datetime.utcnow().isoformat()}
+                    "$inc": {"unread_count": 1, "message_count": 1},
+                    "$set": {
+                        "last_message_at": message_dict['timestamp'],
+                        "last_message": message_preview(message_dict)
+                    }
                 }
             )
+            await append_message(conversation['id'], message_dict)
+            chat_hub.publish_message(conversation['id'], message_dict, customerName=conversation['customer_name'])
             return {"success": True, "id": conversation['id'], "message": "Message sent successfully"}
         else:
             # Create new conversation
@@ -66,22 +109,18 @@ async def create_message(message_data: ChatMessageCreate):
                 customer_name=message_data.customer_name,
                 customer_email=message_data.customer_email,
                 customer_phone=message_data.customer_phone or "",
-                messages=[new_message],
+                last_message=message_preview(message_dict),
+                message_count=1,
                 unread_count=1
             )
             
             conv_dict = new_conversation.model_dump()
             conv_dict['created_at'] = conv_dict['created_at'].isoformat()
-            conv_dict['last_message_at'] = conv_dict['last_message_at'].isoformat()
-            
-            # Convert messages to dict
-            conv_dict['messages'] = []
-            for msg in new_conversation.messages:
-                msg_dict = msg.model_dump()
-                msg_dict['timestamp'] = msg_dict['timestamp'].isoformat()
-                conv_dict['messages'].append(msg_dict)
+            conv_dict['last_message_at'] = message_dict['timestamp']
             
             await conversations_collection.insert_one(conv_dict)
+            await append_message(new_conversation.id, message_dict)
+            chat_hub.publish_message(new_conversation.id, message_dict, customerName=new_conversation.customer_name)
             return {"success": True, "id": new_conversation.id, "message": "Conversation started successfully"}
     
     except HTTPException:
@@ -94,8 +133,18 @@ async def create_message(message_data: ChatMessageCreate):
         )
 
 @router.get("/user-conversation")
-async def get_user_conversation(email: str, phone: Optional[str] = None):
-    """Get user's conversation by email and phone (public endpoint)"""
+async def get_user_conversation(
+    email: str,
+    phone: Optional[str] = None,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None
+):
+    """Get user's conversation by email and phone (public endpoint)
+
+    Returns the most recent page of messages; pass ``before`` (nextCursor)
+    to load older history or ``after`` to fetch only newer messages.
+    """
     try:
         if not email:
             raise HTTPException(
@@ -117,6 +166,9 @@ async def get_user_conversation(email: str, phone: Optional[str] = None):
                 "message": "No conversation found"
             }
         
+        conversation = await ensure_migrated(conversation)
+        page = await _message_page(conversation['id'], limit, before, after)
+        
         return {
             "success": True,
             "conversation": {
@@ -124,7 +176,9 @@ async def get_user_conversation(email: str, phone: Optional[str] = None):
                 "customerName": conversation['customer_name'],
                 "customerEmail": conversation['customer_email'],
                 "customerPhone": conversation.get('customer_phone'),
-                "messages": conversation['messages'],
+                "messages": page['messages'],
+                "nextCursor": page['next_cursor'],
+                "hasMore": page['has_more'],
                 "lastMessageAt": conversation['last_message_at'],
                 "createdAt": conversation['created_at']
             }
@@ -138,28 +192,87 @@ async def get_user_conversation(email: str, phone: Optional[str] = None):
             detail="Failed to fetch conversation"
         )
 
+@router.get("/user-conversation/stream")
+async def stream_user_conversation(request: Request, email: str, phone: Optional[str] = None):
+    """Live updates for the customer's conversation (Server-Sent Events)
+
+    Emits a ``message`` event for every new message; fetch
+    /user-conversation with ``after`` on reconnect to fill any gap.
+    """
+    query = {"customer_email": email}
+    if phone:
+        query["customer_phone"] = phone
+    
+    conversation = await conversations_collection.find_one(query, {"_id": 0, "id": 1})
+    if not conversation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No conversation found"
+        )
+    
+    return _event_stream(request, conversation_topic(conversation['id']))
+
 @router.get("/conversations")
-async def get_conversations(current_admin: dict = Depends(get_current_admin)):
-    """Get all conversations (admin only)"""
+async def get_conversations(
+    view: str = "full",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Get all conversations (admin only)
+
+    ``view=summary`` is the inbox listing: header fields and a preview of the
+    last message, newest first, paged with ``cursor`` (nextCursor). Message
+    history is loaded per conversation via GET /conversations/{id}.
+    """
     if not check_permission(current_admin, 'canAccessChat') and current_admin['role'] != 'super_admin':
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied"
         )
     
+    if view == "summary":
+        try:
+            page = await list_conversation_summaries(limit=limit, cursor=cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        
+        return {
+            "success": True,
+            "conversations": [
+                {
+                    "id": conv['id'],
+                    "customerName": conv['customer_name'],
+                    "customerEmail": conv['customer_email'],
+                    "customerPhone": conv.get('customer_phone'),
+                    "lastMessage": conv.get('last_message'),
+                    "messageCount": conv['message_count'],
+                    "unreadCount": conv.get('unread_count', 0),
+                    "lastMessageAt": conv['last_message_at'],
+                    "createdAt": conv['created_at']
+                }
+                for conv in page['conversations']
+            ],
+            "totalUnread": page['total_unread'],
+            "nextCursor": page['next_cursor'],
+            "hasMore": page['has_more']
+        }
+    
     conversations = await conversations_collection.find({}).sort("last_message_at", -1).to_list(length=1000)
+    for conv in conversations:
+        await ensure_migrated(conv)
     
-    result = []
-    total_unread = 0
+    # Most recent page of messages for every conversation in one query
+    messages_by_conversation = await recent_messages_for(conv['id'] for conv in conversations)
     
+    result = []
     for conv in conversations:
-        total_unread += conv.get('unread_count', 0)
         result.append({
             "id": conv['id'],
             "customerName": conv['customer_name'],
             "customerEmail": conv['customer_email'],
             "customerPhone": conv.get('customer_phone'),
-            "messages": conv['messages'],
+            "messages": messages_by_conversation.get(conv['id'], []),
             "unreadCount": conv.get('unread_count', 0),
             "lastMessageAt": conv['last_message_at'],
             "createdAt": conv['created_at']
@@ -168,15 +281,36 @@ async def get_conversations(current_admin: dict = Depends(get_current_admin)):
     return {
         "success": True,
         "conversations": result,
-        "totalUnread": total_unread
+        "totalUnread": await total_unread()
     }
 
+@router.post("/stream-ticket")
+async def create_stream_ticket(current_admin: dict = Depends(get_current_admin)):
+    """Single-use ticket for opening an admin stream (``?ticket=``)"""
+    _require_chat_access(current_admin)
+    ticket = await issue_stream_ticket(current_admin['id'])
+    return {"ticket": ticket, "expiresIn": STREAM_TICKET_TTL}
+
+@router.get("/conversations/stream")
+async def stream_inbox(request: Request, current_admin: dict = Depends(get_stream_admin)):
+    """Live ``message`` events for every conversation (admin inbox)"""
+    _require_chat_access(current_admin)
+    return _event_stream(request, INBOX_TOPIC)
+
+@router.get("/stream-stats")
+async def get_stream_stats(current_admin: dict = Depends(get_current_admin)):
+    """Live chat hub counters (admin only)"""
+    _require_chat_access(current_admin)
+    return chat_hub.stats()
+
 @router.get("/conversations/{conversation_id}")
 async def get_conversation(
     conversation_id: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
     current_admin: dict = Depends(get_current_admin)
 ):
-    """Get specific conversation"""
+    """Get specific conversation with the most recent page of messages"""
     if not check_permission(current_admin, 'canAccessChat') and current_admin['role'] != 'super_admin':
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -190,23 +324,31 @@ async def get_conversation(
             detail="Conversation not found"
         )
     
+    conversation = await ensure_migrated(conversation)
+    page = await _message_page(conversation_id, limit, before)
+    
     return {
         "id": conversation['id'],
         "customerName": conversation['customer_name'],
         "customerEmail": conversation['customer_email'],
         "customerPhone": conversation.get('customer_phone'),
-        "messages": conversation['messages'],
+        "messages": page['messages'],
+        "nextCursor": page['next_cursor'],
+        "hasMore": page['has_more'],
         "unreadCount": conversation.get('unread_count', 0),
         "lastMessageAt": conversation['last_message_at'],
         "createdAt": conversation['created_at']
     }
 
-@router.put("/conversations/{conversation_id}/read")
-async def mark_as_read(
+@router.get("/conversations/{conversation_id}/messages")
+async def get_conversation_messages(
     conversation_id: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
     current_admin: dict = Depends(get_current_admin)
 ):
-    """Mark conversation as read"""
+    """Cursor-paginated message history for a conversation"""
     if not check_permission(current_admin, 'canAccessChat') and current_admin['role'] != 'super_admin':
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -219,22 +361,50 @@ async def mark_as_read(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found"
         )
+    await ensure_migrated(conversation)
     
-    # Mark all customer messages as read
-    messages = conversation['messages']
-    for msg in messages:
-        if msg['sender'] == 'customer':
-            msg['read'] = True
+    page = await _message_page(conversation_id, limit, before, after)
+    return {
+        "messages": page['messages'],
+        "nextCursor": page['next_cursor'],
+        "hasMore": page['has_more']
+    }
+
+@router.get("/conversations/{conversation_id}/stream")
+async def stream_conversation(
+    conversation_id: str,
+    request: Request,
+    current_admin: dict = Depends(get_stream_admin)
+):
+    """Live ``message`` events for one conversation (admin)"""
+    _require_chat_access(current_admin)
     
-    await conversations_collection.update_one(
-        {"id": conversation_id},
-        {
-            "$set": {
-                "messages": messages,
-                "unread_count": 0
-            }
-        }
-    )
+    conversation = await conversations_collection.find_one({"id": conversation_id}, {"_id": 0, "id": 1})
+    if not conversation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation not found"
+        )
+    
+    return _event_stream(request, conversation_topic(conversation_id))
+
+@router.put("/conversations/{conversation_id}/read")
+async def mark_as_read(
+    conversation_id: str,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Mark conversation as read"""
+    if not check_permission(current_admin, 'canAccessChat') and current_admin['role'] != 'super_admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    if not await mark_conversation_read(conversation_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversation not found"
+        )
     
     return {"message": "Marked as read"}
 
@@ -257,6 +427,7 @@ async def send_reply(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found"
         )
+    await ensure_migrated(conversation)
     
     # Create admin reply message
     reply_message = ChatMessage(
@@ -268,16 +439,23 @@ async def send_reply(
     reply_dict = reply_message.model_dump()
     reply_dict['timestamp'] = reply_dict['timestamp'].isoformat()
     
+    await append_message(conversation_id, reply_dict)
     await conversations_collection.update_one(
         {"id": conversation_id},
         {
-            "$push": {"messages": reply_dict},
-            "$set": {"last_message_at": datetime.utcnow().isoformat()}
+            "$inc": {"message_count": 1},
+            "$set": {
+                "last_message_at": reply_dict['timestamp'],
+                "last_message": message_preview(reply_dict)
+            }
         }
     )
     
+    chat_hub.publish_message(conversation_id, reply_dict, customerName=conversation['customer_name'])
+    
     # Get updated conversation
     updated_conv = await conversations_collection.find_one({"id": conversation_id})
+    page = await list_messages(conversation_id)
     
     return {
         "success": True,
@@ -286,7 +464,9 @@ async def send_reply(
             "customerName": updated_conv['customer_name'],
             "customerEmail": updated_conv['customer_email'],
             "customerPhone": updated_conv.get('customer_phone'),
-            "messages": updated_conv['messages'],
+            "messages": page['messages'],
+            "nextCursor": page['next_cursor'],
+            "hasMore": page['has_more'],
             "unreadCount": updated_conv.get('unread_count', 0),
             "lastMessageAt": updated_conv['last_message_at']
         }
@@ -310,5 +490,6 @@ async def delete_conversation(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found"
         )
+    await delete_messages(conversation_id)
     
     return {"message": "Conversation deleted successfully"}
@@ -1,16 +1,20 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends
 from schemas.client import ClientLogin, ClientTokenResponse, ClientResponse
 from database import clients_collection
-from auth.password import verify_password
+from auth.password import verify_password_and_rehash
 from auth.jwt import create_access_token
 from auth.client_auth import get_current_client
+from auth.login_throttle import login_throttle
 from datetime import datetime
 
 router = APIRouter(prefix="/client/auth", tags=["client-auth"])
 
 @router.post("/login", response_model=ClientTokenResponse)
-async def client_login(credentials: ClientLogin):
+async def client_login(credentials: ClientLogin, request: Request):
     """Client login endpoint"""
+    # Reject brute-force attempts before any lookup or bcrypt work
+    await login_throttle.check(request, "client", credentials.email)
+    
     # Find client by email
     client_doc = await clients_collection.find_one({"email": credentials.email})
     
@@ -28,11 +32,16 @@ async def client_login(credentials: ClientLogin):
         )
     
     # Verify password
-    if not verify_password(credentials.password, client_doc['password_hash']):
+    valid, new_hash = await verify_password_and_rehash(credentials.password, client_doc['password_hash'])
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
+    if new_hash:
+        # Cost factor changed since this hash was made
+        await clients_collection.update_one({"id": client_doc['id']}, {"$set": {"password_hash": new_hash}})
+    await login_throttle.succeeded("client", credentials.email)
     
     # Create access token with client type
     access_token = create_access_token(
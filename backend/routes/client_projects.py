@@ -1,143 +1,55 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from fastapi.responses import FileResponse
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Request
+from typing import List, Optional, Union
 from schemas.client_project import (
     ClientProjectResponse, CommentCreate, CommentResponse,
-    MilestoneResponse, TaskResponse, ProjectFileResponse,
-    ActivityResponse, TeamMemberResponse, BudgetResponse,
-    ChatMessageCreate, ChatMessageResponse
+    ChatMessageCreate, ChatMessageResponse,
+    TaskPage, CommentPage, ChatMessagePage, ActivityPage,
+    ClientProjectSummaryPage
 )
 from database import client_projects_collection
 from auth.client_auth import get_current_client
 from models.client_project import ProjectComment, ProjectActivity
 from models.client_project import ChatMessage
-from datetime import datetime
-import os
+from utils.downloads import file_download_response
+from utils.previews import preview_response
+from utils.project_chat import mark_project_chat_read
+from utils.project_serializer import (
+    ACTIVITY_FIELDS, CHAT_MESSAGE_FIELDS, COMMENT_FIELDS, TASK_FIELDS,
+    ProjectJSONResponse, convert_entries, convert_project_to_response
+)
+from utils.project_store import (
+    EXISTS_PROJECTION, add_child, attach_children, project_child_page, record_activity, summarize_projects
+)
 
 router = APIRouter(prefix="/client/projects", tags=["client-projects"])
 
-def convert_project_to_response(project_doc) -> ClientProjectResponse:
-    """Helper function to convert project document to response"""
-    from datetime import datetime
-    
-    # Helper function to safely get datetime string
-    def get_datetime_str(obj, key, default=None):
-        val = obj.get(key)
-        if not val:
-            return default
-        if isinstance(val, str):
-            return val
-        return val.isoformat()
-    
-    return ClientProjectResponse(
-        id=project_doc['id'],
-        name=project_doc['name'],
-        client_id=project_doc['client_id'],
-        description=project_doc.get('description'),
-        status=project_doc['status'],
-        priority=project_doc.get('priority', 'medium'),
-        progress=project_doc['progress'],
-        start_date=str(project_doc['start_date']) if project_doc.get('start_date') else None,
-        expected_delivery=str(project_doc['expected_delivery']) if project_doc.get('expected_delivery') else None,
-        actual_delivery=str(project_doc['actual_delivery']) if project_doc.get('actual_delivery') else None,
-        notes=project_doc.get('notes'),
-        milestones=[
-            MilestoneResponse(
-                id=m.get('id', str(i)),
-                title=m.get('title', ''),
-                description=m.get('description'),
-                due_date=str(m['due_date']) if m.get('due_date') else None,
-                status=m.get('status', 'pending'),
-                completion_date=m.get('completion_date'),
-                order=m.get('order', 0),
-                created_at=get_datetime_str(m, 'created_at', datetime.utcnow().isoformat())
-            ) for i, m in enumerate(project_doc.get('milestones', []))
-        ],
-        tasks=[
-            TaskResponse(
-                id=t.get('id', str(i)),
-                title=t.get('title', ''),
-                description=t.get('description'),
-                status=t.get('status', 'todo'),
-                priority=t.get('priority', 'medium'),
-                assigned_to=t.get('assigned_to'),
-                due_date=str(t['due_date']) if t.get('due_date') else None,
-                completed_at=t.get('completed_at'),
-                milestone_id=t.get('milestone_id'),
-                created_at=get_datetime_str(t, 'created_at', datetime.utcnow().isoformat())
-            ) for i, t in enumerate(project_doc.get('tasks', []))
-        ],
-        files=[
-            ProjectFileResponse(
-                id=f.get('id', str(i)),
-                filename=f.get('filename', 'file'),
-                file_path=f.get('file_path', ''),
-                uploaded_at=get_datetime_str(f, 'uploaded_at', datetime.utcnow().isoformat()),
-                uploaded_by=f.get('uploaded_by', 'system'),
-                file_size=f.get('file_size', 0),
-                file_type=f.get('file_type')
-            ) for i, f in enumerate(project_doc.get('files', []))
-        ],
-        comments=[
-            CommentResponse(
-                id=c.get('id', str(i)),
-                user_id=c.get('user_id', ''),
-                user_name=c.get('user_name', 'User'),
-                user_type=c.get('user_type', 'client'),
-                message=c.get('message', ''),
-                created_at=get_datetime_str(c, 'created_at', datetime.utcnow().isoformat())
-            ) for i, c in enumerate(project_doc.get('comments', []))
-        ],
-        chat_messages=[
-            ChatMessageResponse(
-                id=cm.get('id', str(i)),
-                sender_id=cm.get('sender_id', ''),
-                sender_name=cm.get('sender_name', 'User'),
-                sender_type=cm.get('sender_type', 'client'),
-                message=cm.get('message', ''),
-                read=cm.get('read', False),
-                created_at=get_datetime_str(cm, 'created_at', datetime.utcnow().isoformat())
-            ) for i, cm in enumerate(project_doc.get('chat_messages', []))
-        ],
-        activity_log=[
-            ActivityResponse(
-                id=a.get('id', str(i)),
-                action=a.get('action', 'unknown'),
-                description=a.get('description', ''),
-                user_id=a.get('user_id', ''),
-                user_name=a.get('user_name', 'System'),
-                timestamp=get_datetime_str(a, 'timestamp', datetime.utcnow().isoformat()),
-                metadata=a.get('metadata')
-            ) for i, a in enumerate(project_doc.get('activity_log', []))
-        ],
-        team_members=[
-            TeamMemberResponse(
-                admin_id=tm.get('admin_id', ''),
-                admin_name=tm.get('admin_name', 'Admin'),
-                role=tm.get('role'),
-                added_at=get_datetime_str(tm, 'added_at', datetime.utcnow().isoformat())
-            ) for tm in project_doc.get('team_members', [])
-        ],
-        budget=BudgetResponse(
-            total_amount=project_doc.get('budget', {}).get('total_amount', 0.0),
-            currency=project_doc.get('budget', {}).get('currency', 'USD'),
-            paid_amount=project_doc.get('budget', {}).get('paid_amount', 0.0),
-            pending_amount=project_doc.get('budget', {}).get('pending_amount', 0.0),
-            payment_terms=project_doc.get('budget', {}).get('payment_terms')
-        ) if project_doc.get('budget') else None,
-        tags=project_doc.get('tags', []),
-        created_at=get_datetime_str(project_doc, 'created_at', datetime.utcnow().isoformat()),
-        updated_at=project_doc.get('updated_at'),
-        last_activity_at=project_doc.get('last_activity_at')
-    )
+@router.get("/", response_model=Union[List[ClientProjectResponse], ClientProjectSummaryPage])
+async def get_my_projects(
+    view: str = "full",
+    page: int = 1,
+    limit: int = 20,
+    sort: str = "last_activity_at",
+    order: str = "desc",
+    client = Depends(get_current_client)
+):
+    """Get all projects assigned to the current client
 
-@router.get("/", response_model=List[ClientProjectResponse])
-async def get_my_projects(client = Depends(get_current_client)):
-    """Get all projects assigned to the current client"""
-    projects = []
-    async for project_doc in client_projects_collection.find({"client_id": client["id"]}):
-        projects.append(convert_project_to_response(project_doc))
-    return projects
+    ``view=summary`` returns a page of header fields with open task, unread
+    chat and file counts (``page``/``limit``/``sort``/``order``) instead of
+    every full project.
+    """
+    if view == "summary":
+        try:
+            summary = await summarize_projects(
+                {"client_id": client["id"]}, "admin", page=page, limit=limit, sort=sort, descending=order != "asc"
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        return ClientProjectSummaryPage(**summary)
+    
+    project_docs = await client_projects_collection.find({"client_id": client["id"]}).to_list(length=None)
+    await attach_children(project_docs)
+    return ProjectJSONResponse([convert_project_to_response(project_doc) for project_doc in project_docs])
 
 @router.get("/{project_id}", response_model=ClientProjectResponse)
 async def get_project(project_id: str, client = Depends(get_current_client)):
@@ -153,7 +65,8 @@ async def get_project(project_id: str, client = Depends(get_current_client)):
             detail="Project not found or not assigned to you"
         )
     
-    return convert_project_to_response(project_doc)
+    await attach_children([project_doc])
+    return ProjectJSONResponse(convert_project_to_response(project_doc))
 
 @router.post("/{project_id}/comments", response_model=CommentResponse)
 async def add_comment(project_id: str, comment_data: CommentCreate, client = Depends(get_current_client)):
@@ -161,7 +74,7 @@ async def add_comment(project_id: str, comment_data: CommentCreate, client = Dep
     project_doc = await client_projects_collection.find_one({
         "id": project_id,
         "client_id": client["id"]
-    })
+    }, EXISTS_PROJECTION)
     
     if not project_doc:
         raise HTTPException(
@@ -189,16 +102,8 @@ async def add_comment(project_id: str, comment_data: CommentCreate, client = Dep
     activity_dict = activity.model_dump()
     activity_dict['timestamp'] = activity_dict['timestamp'].isoformat()
     
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$push": {
-                "comments": comment_dict,
-                "activity_log": activity_dict
-            },
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
-    )
+    await add_child("comments", project_id, comment_dict)
+    await record_activity(project_id, activity_dict, touch=True)
     
     return CommentResponse(**comment_dict)
 
@@ -206,14 +111,18 @@ async def add_comment(project_id: str, comment_data: CommentCreate, client = Dep
 async def download_project_file(
     project_id: str,
     file_id: str,
+    request: Request,
     client = Depends(get_current_client)
 ):
-    """Download a file from a project (only if project is assigned to current client)"""
+    """Download a file from a project (only if project is assigned to current client)
+
+    Supports Range/If-Range, so interrupted downloads can resume.
+    """
     # Verify project belongs to client
-    project_doc = await client_projects_collection.find_one({
-        "id": project_id,
-        "client_id": client["id"]
-    })
+    project_doc = await client_projects_collection.find_one(
+        {"id": project_id, "client_id": client["id"]},
+        {"_id": 0, "files": 1}
+    )
     
     if not project_doc:
         raise HTTPException(
@@ -234,19 +143,29 @@ async def download_project_file(
             detail="File not found"
         )
     
-    file_path = file_info['file_path']
-    
-    if not os.path.exists(file_path):
+    return await file_download_response(request, file_info)
+
+@router.get("/{project_id}/files/{file_id}/thumbnail")
+async def get_file_thumbnail(project_id: str, file_id: str, client = Depends(get_current_client)):
+    """Small JPEG thumbnail of an image or PDF file"""
+    return await _file_preview(project_id, file_id, client, "thumbnail")
+
+@router.get("/{project_id}/files/{file_id}/preview")
+async def get_file_preview(project_id: str, file_id: str, client = Depends(get_current_client)):
+    """Larger JPEG preview of an image or the first page of a PDF"""
+    return await _file_preview(project_id, file_id, client, "preview")
+
+async def _file_preview(project_id: str, file_id: str, client: dict, kind: str):
+    project_doc = await client_projects_collection.find_one(
+        {"id": project_id, "client_id": client["id"], "files.id": file_id},
+        {"_id": 0, "files": {"$elemMatch": {"id": file_id}}}
+    )
+    if not project_doc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="File not found on server"
+            detail="File not found"
         )
-    
-    return FileResponse(
-        path=file_path,
-        filename=file_info['filename'],
-        media_type='application/octet-stream'
-    )
+    return preview_response(project_doc['files'][0], kind)
 
 # ============================================================================
 # CHAT ENDPOINTS (Client)
@@ -258,7 +177,7 @@ async def send_chat_message(project_id: str, message_data: ChatMessageCreate, cl
     project_doc = await client_projects_collection.find_one({
         "id": project_id,
         "client_id": client["id"]
-    })
+    }, EXISTS_PROJECTION)
     
     if not project_doc:
         raise HTTPException(
@@ -287,56 +206,120 @@ async def send_chat_message(project_id: str, message_data: ChatMessageCreate, cl
     activity_dict = activity.model_dump()
     activity_dict['timestamp'] = activity_dict['timestamp'].isoformat()
     
-    await client_projects_collection.update_one(
-        {"id": project_id},
-        {
-            "$push": {
-                "chat_messages": message_dict,
-                "activity_log": activity_dict
-            },
-            "$set": {"last_activity_at": datetime.utcnow().isoformat()}
-        }
-    )
+    await add_child("chat_messages", project_id, message_dict)
+    await record_activity(project_id, activity_dict, touch=True)
     
     return ChatMessageResponse(**message_dict)
 
 @router.get("/{project_id}/chat", response_model=List[ChatMessageResponse])
-async def get_chat_messages(project_id: str, client = Depends(get_current_client)):
-    """Get all chat messages for a project (Client)"""
-    project_doc = await client_projects_collection.find_one({
-        "id": project_id,
-        "client_id": client["id"]
-    })
-    
-    if not project_doc:
+async def get_chat_messages(
+    project_id: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    client = Depends(get_current_client)
+):
+    """Get the most recent chat messages for a project (Client)
+
+    Pass ``before`` (a cursor from /chat/messages) to load older messages.
+    """
+    # Mark the admin's messages as read in one atomic update
+    try:
+        chat_messages = await mark_project_chat_read(
+            {"id": project_id, "client_id": client["id"]}, "admin", limit=limit, before=before
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if chat_messages is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found or not assigned to you"
         )
     
-    # Mark client messages as read
-    chat_messages = project_doc.get('chat_messages', [])
-    updated = False
-    for msg in chat_messages:
-        if msg['sender_type'] == 'admin' and not msg.get('read', False):
-            msg['read'] = True
-            updated = True
-    
-    if updated:
-        await client_projects_collection.update_one(
-            {"id": project_id},
-            {"$set": {"chat_messages": chat_messages}}
+    return convert_entries(CHAT_MESSAGE_FIELDS, chat_messages)
+
+# ============================================================================
+# PAGINATED HISTORY (Client)
+# ============================================================================
+
+async def _child_page(project_id: str, client: dict, kind: str, limit: Optional[int], before: Optional[str], after: Optional[str]):
+    """Cursor page of a project sub-entity, only for the client's own projects"""
+    try:
+        page = await project_child_page(
+            {"id": project_id, "client_id": client["id"]}, kind, limit=limit, before=before, after=after
         )
-    
-    return [
-        ChatMessageResponse(
-            id=cm['id'],
-            sender_id=cm['sender_id'],
-            sender_name=cm['sender_name'],
-            sender_type=cm['sender_type'],
-            message=cm['message'],
-            read=cm.get('read', False),
-            created_at=cm['created_at'] if isinstance(cm['created_at'], str) else cm['created_at'].isoformat()
-        ) for cm in chat_messages
-    ]
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if page is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Project not found or not assigned to you"
+        )
+    return page
+
+@router.get("/{project_id}/tasks", response_model=TaskPage)
+async def list_tasks(
+    project_id: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    client = Depends(get_current_client)
+):
+    """Cursor-paginated tasks"""
+    page = await _child_page(project_id, client, "tasks", limit, before, after)
+    return TaskPage(
+        items=convert_entries(TASK_FIELDS, page['items']),
+        next_cursor=page['next_cursor'],
+        has_more=page['has_more']
+    )
 
+@router.get("/{project_id}/comments", response_model=CommentPage)
+async def list_comments(
+    project_id: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    client = Depends(get_current_client)
+):
+    """Cursor-paginated comments"""
+    page = await _child_page(project_id, client, "comments", limit, before, after)
+    return CommentPage(
+        items=convert_entries(COMMENT_FIELDS, page['items']),
+        next_cursor=page['next_cursor'],
+        has_more=page['has_more']
+    )
+
+@router.get("/{project_id}/chat/messages", response_model=ChatMessagePage)
+async def list_chat_messages(
+    project_id: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    client = Depends(get_current_client)
+):
+    """Cursor-paginated chat history (does not mark messages as read)"""
+    page = await _child_page(project_id, client, "chat_messages", limit, before, after)
+    return ChatMessagePage(
+        items=convert_entries(CHAT_MESSAGE_FIELDS, page['items']),
+        next_cursor=page['next_cursor'],
+        has_more=page['has_more']
+    )
+
+@router.get("/{project_id}/activity", response_model=ActivityPage)
+async def list_activity(
+    project_id: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    client = Depends(get_current_client)
+):
+    """Cursor-paginated activity archive.
+
+    Project responses only carry the most recent activity entries; page
+    back through the full history here with ``before``.
+    """
+    page = await _child_page(project_id, client, "activity_log", limit, before, after)
+    return ActivityPage(
+        items=convert_entries(ACTIVITY_FIELDS, page['items']),
+        next_cursor=page['next_cursor'],
+        has_more=page['has_more']
+    )
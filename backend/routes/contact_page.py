@@ -5,23 +5,18 @@ from datetime import datetime
 from database import contact_page_collection
 from models.contact_page import ContactPageContent, ContactPageUpdate
 from auth.admin_auth import get_current_admin
+from utils.cache import content_cache
 import uuid
 
 router = APIRouter(prefix="/contact-page", tags=["Contact Page"])
 
+CACHE_KEY = "contact_page"
+
 @router.get("/", response_model=Dict[str, Any])
 async def get_contact_page():
     """Get contact page content (public)"""
     try:
-        content = await contact_page_collection.find_one()
-        
-        if not content:
-            # Return default content if none exists
-            return get_default_contact_content()
-        
-        # Remove MongoDB _id field
-        content.pop('_id', None)
-        return content
+        return await content_cache.get_or_load(CACHE_KEY, _load_contact_page)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -61,6 +56,7 @@ async def update_contact_page(
             {'$set': existing},
             upsert=True
         )
+        content_cache.invalidate(CACHE_KEY)
         
         # Remove MongoDB _id field
         existing.pop('_id', None)
@@ -78,12 +74,24 @@ async def reset_contact_page(current_admin: dict = Depends(get_current_admin)):
         
         await contact_page_collection.delete_many({})
         await contact_page_collection.insert_one(default_content)
+        content_cache.invalidate(CACHE_KEY)
         
         default_content.pop('_id', None)
         return {"message": "Contact page reset to default", "content": default_content}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _load_contact_page() -> Dict[str, Any]:
+    content = await contact_page_collection.find_one()
+    
+    if not content:
+        # Return default content if none exists
+        return get_default_contact_content()
+    
+    # Remove MongoDB _id field
+    content.pop('_id', None)
+    return content
+
 def get_default_contact_content() -> Dict[str, Any]:
     """Get default contact page content"""
     return {
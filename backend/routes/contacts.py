@@ -3,6 +3,7 @@ from typing import List
 from schemas.contact import ContactCreate, ContactResponse, ContactUpdate
 from database import contacts_collection
 from utils import serialize_document
+from utils.repository import update_document
 from models import ContactSubmission
 from datetime import datetime
 
@@ -39,39 +40,29 @@ async def get_contact(contact_id: str):
 @router.patch("/{contact_id}/read", response_model=ContactResponse)
 async def mark_contact_read(contact_id: str, update_data: ContactUpdate):
     """Mark a contact as read/unread"""
-    existing = await contacts_collection.find_one({"id": contact_id})
-    if not existing:
+    updated_contact = await update_document(
+        contacts_collection,
+        {"id": contact_id},
+        {"$set": {"read": update_data.read}}
+    )
+    if not updated_contact:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Contact not found"
         )
-    
-    await contacts_collection.update_one(
-        {"id": contact_id},
-        {"$set": {"read": update_data.read}}
-    )
-    
-    updated_contact = await contacts_collection.find_one({"id": contact_id})
     return serialize_document(updated_contact)
 
 @router.put("/{contact_id}", response_model=ContactResponse)
 async def update_contact(contact_id: str, contact_data: ContactCreate):
     """Update a contact submission"""
-    existing = await contacts_collection.find_one({"id": contact_id})
-    if not existing:
+    update_dict = contact_data.model_dump(exclude_unset=True)
+    
+    updated_contact = await update_document(contacts_collection, {"id": contact_id}, {"$set": update_dict})
+    if not updated_contact:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Contact not found"
         )
-    
-    update_dict = contact_data.model_dump(exclude_unset=True)
-    
-    await contacts_collection.update_one(
-        {"id": contact_id},
-        {"$set": update_dict}
-    )
-    
-    updated_contact = await contacts_collection.find_one({"id": contact_id})
     return serialize_document(updated_contact)
 
 @router.delete("/{contact_id}")
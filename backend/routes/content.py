@@ -2,14 +2,20 @@ from fastapi import APIRouter, HTTPException, status
 from schemas.content import ContentUpdate, ContentResponse
 from database import content_collection
 from utils import serialize_document
+from utils.cache import content_cache
 from models.content import WebsiteContent
 from datetime import datetime
 
 router = APIRouter(prefix="/content", tags=["content"])
 
+CACHE_KEY = "content"
+
 @router.get("/", response_model=ContentResponse)
 async def get_content():
     """Get website content"""
+    return await content_cache.get_or_load(CACHE_KEY, _load_content)
+
+async def _load_content():
     content = await content_collection.find_one({"id": "website_content"})
     
     if not content:
@@ -46,4 +52,5 @@ async def update_content(content_data: ContentUpdate):
     )
     
     updated_content = await content_collection.find_one({"id": "website_content"})
+    content_cache.invalidate(CACHE_KEY)
     return serialize_document(updated_content)
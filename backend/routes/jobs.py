@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from typing import Optional
+from auth.admin_auth import get_current_admin
+from utils.jobs import job_queue
+
+router = APIRouter(prefix="/admin/jobs", tags=["jobs"])
+
+@router.get("/stats")
+async def get_job_stats(current_admin: dict = Depends(get_current_admin)):
+    """Job counts per type and status, plus worker counters - admin only"""
+    return await job_queue.stats()
+
+@router.get("/dead")
+async def get_dead_letters(
+    type: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    skip: int = Query(0, ge=0),
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Jobs that used up their retries, newest first - admin only"""
+    return {"jobs": await job_queue.dead_letters(type, limit, skip)}
+
+@router.post("/{job_id}/retry")
+async def retry_dead_letter(job_id: str, current_admin: dict = Depends(get_current_admin)):
+    """Queue a dead job again with a fresh set of attempts - admin only"""
+    job = await job_queue.retry(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dead job not found"
+        )
+    return job
+
+@router.delete("/{job_id}")
+async def discard_dead_letter(job_id: str, current_admin: dict = Depends(get_current_admin)):
+    """Delete a dead job - admin only"""
+    if not await job_queue.discard(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dead job not found"
+        )
+    return {"message": "Job discarded"}
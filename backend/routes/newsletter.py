@@ -5,6 +5,7 @@ from database import newsletter_collection
 from utils import serialize_document
 from models.newsletter import NewsletterSubscriber
 from datetime import datetime
+from pymongo.errors import DuplicateKeyError
 from auth.admin_auth import get_current_admin
 
 router = APIRouter(prefix="/newsletter", tags=["newsletter"])
@@ -38,7 +39,14 @@ async def subscribe_to_newsletter(subscription_data: NewsletterSubscribe):
     doc = subscriber.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
     
-    await newsletter_collection.insert_one(doc)
+    try:
+        await newsletter_collection.insert_one(doc)
+    except DuplicateKeyError:
+        # A concurrent request subscribed the same email first
+        return {
+            "message": "This email is already subscribed to our newsletter",
+            "status": "already_subscribed"
+        }
     return {
         "message": "Successfully subscribed to newsletter!",
         "status": "subscribed"
@@ -5,6 +5,7 @@ from database import db
 from auth.admin_auth import get_current_admin
 from models.note import Note
 from datetime import datetime
+from utils.repository import update_document
 
 router = APIRouter(prefix="/notes", tags=["notes"])
 
@@ -101,21 +102,13 @@ async def update_note(
     current_admin: dict = Depends(get_current_admin)
 ):
     """Update a note"""
-    note = await notes_collection.find_one({"id": note_id})
-    if not note:
-        raise HTTPException(status_code=404, detail="Note not found")
-    
     # Prepare update data
     update_data = note_data.model_dump(exclude_unset=True)
     update_data['updated_at'] = datetime.utcnow().isoformat()
     
-    await notes_collection.update_one(
-        {"id": note_id},
-        {"$set": update_data}
-    )
-    
-    # Fetch updated note
-    updated_note = await notes_collection.find_one({"id": note_id})
+    updated_note = await update_document(notes_collection, {"id": note_id}, {"$set": update_data})
+    if not updated_note:
+        raise HTTPException(status_code=404, detail="Note not found")
     
     return {
         "id": updated_note['id'],
@@ -4,13 +4,23 @@ from schemas.page_content import PageContentCreate, PageContentUpdate, PageConte
 from database import page_content_collection
 from utils import serialize_document
 from models import PageContent
+from utils.cache import content_cache
 from datetime import datetime
 
 router = APIRouter(prefix="/pages", tags=["pages"])
 
+def _cache_key(page_name: str) -> str:
+    return f"pages:{page_name}"
+
 @router.get("/{page_name}")
 async def get_page_content(page_name: str):
     """Get all content sections for a specific page"""
+    return await content_cache.get_or_load(
+        _cache_key(page_name),
+        lambda: _load_page_content(page_name)
+    )
+
+async def _load_page_content(page_name: str):
     cursor = page_content_collection.find({"page": page_name})
     sections = await cursor.to_list(length=100)
     
@@ -54,6 +64,7 @@ async def update_page_content(page_name: str, content: Dict[str, Any]):
             doc['updated_at'] = doc['updated_at'].isoformat()
             await page_content_collection.insert_one(doc)
     
+    content_cache.invalidate(_cache_key(page_name))
     return {"message": "Page content updated successfully"}
 
 @router.post("/")
@@ -64,4 +75,5 @@ async def create_page_section(page_data: PageContentCreate):
     doc['updated_at'] = doc['updated_at'].isoformat()
     
     await page_content_collection.insert_one(doc)
+    content_cache.invalidate(_cache_key(page_content.page))
     return serialize_document(doc)
@@ -5,12 +5,18 @@ from utils import serialize_document
 from models.pricing import Pricing, WebsiteType, Technology, Feature, TimelineMultiplier
 from datetime import datetime
 from auth.admin_auth import get_current_admin
+from utils.cache import content_cache
 
 router = APIRouter(prefix="/pricing", tags=["pricing"])
 
+CACHE_KEY = "pricing"
+
 @router.get("/", response_model=PricingResponse)
 async def get_pricing():
     """Get pricing configuration (public endpoint)"""
+    return await content_cache.get_or_load(CACHE_KEY, _load_pricing)
+
+async def _load_pricing():
     pricing = await pricing_collection.find_one({"id": "pricing_config"})
     
     if not pricing:
@@ -88,4 +94,5 @@ async def update_pricing(
         await pricing_collection.insert_one(doc)
     
     updated_pricing = await pricing_collection.find_one({"id": "pricing_config"})
+    content_cache.invalidate(CACHE_KEY)
     return serialize_document(updated_pricing)
@@ -6,14 +6,17 @@ from utils import serialize_document, create_slug
 from models import Project
 from datetime import datetime
 from auth.admin_auth import get_current_admin
+from utils.http_cache import ConditionalGet, conditional_get, PUBLIC_LIST_POLICY, PUBLIC_DETAIL_POLICY
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
 @router.get("/", response_model=List[ProjectResponse])
-async def get_projects():
+async def get_projects(cache: ConditionalGet = Depends(conditional_get(PUBLIC_LIST_POLICY))):
     """Get public projects only (for public portfolio page)"""
     cursor = projects_collection.find({"is_private": {"$ne": True}}).sort("created_at", -1)
     projects = await cursor.to_list(length=100)
+    if cache.is_fresh(projects):
+        return cache.not_modified()
     return [serialize_document(project) for project in projects]
 
 @router.get("/all", response_model=List[ProjectResponse])
@@ -24,7 +27,7 @@ async def get_all_projects(current_admin: dict = Depends(get_current_admin)):
     return [serialize_document(project) for project in projects]
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-async def get_project(project_id: str):
+async def get_project(project_id: str, cache: ConditionalGet = Depends(conditional_get(PUBLIC_DETAIL_POLICY))):
     """Get a specific project by ID"""
     project = await projects_collection.find_one({"id": project_id})
     if not project:
@@ -32,6 +35,8 @@ async def get_project(project_id: str):
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
+    if cache.is_fresh(project):
+        return cache.not_modified()
     return serialize_document(project)
 
 @router.post("/", response_model=ProjectResponse)
@@ -1,22 +1,26 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Depends
 from typing import List
 from schemas.service import ServiceCreate, ServiceUpdate, ServiceResponse
 from database import services_collection
 from utils import serialize_document
+from utils.repository import update_document
 from models import Service
 from datetime import datetime
+from utils.http_cache import ConditionalGet, conditional_get, PUBLIC_LIST_POLICY, PUBLIC_DETAIL_POLICY
 
 router = APIRouter(prefix="/services", tags=["services"])
 
 @router.get("/", response_model=List[ServiceResponse])
-async def get_services():
+async def get_services(cache: ConditionalGet = Depends(conditional_get(PUBLIC_LIST_POLICY))):
     """Get all services"""
     cursor = services_collection.find().sort("order", 1)
     services = await cursor.to_list(length=100)
+    if cache.is_fresh(services):
+        return cache.not_modified()
     return [serialize_document(service) for service in services]
 
 @router.get("/{service_id}", response_model=ServiceResponse)
-async def get_service(service_id: str):
+async def get_service(service_id: str, cache: ConditionalGet = Depends(conditional_get(PUBLIC_DETAIL_POLICY))):
     """Get a specific service by ID"""
     service = await services_collection.find_one({"id": service_id})
     if not service:
@@ -24,6 +28,8 @@ async def get_service(service_id: str):
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Service not found"
         )
+    if cache.is_fresh(service):
+        return cache.not_modified()
     return serialize_document(service)
 
 @router.post("/", response_model=ServiceResponse)
@@ -40,24 +46,16 @@ async def create_service(service_data: ServiceCreate):
 @router.put("/{service_id}", response_model=ServiceResponse)
 async def update_service(service_id: str, service_data: ServiceUpdate):
     """Update a service"""
-    # Check if service exists
-    existing = await services_collection.find_one({"id": service_id})
-    if not existing:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Service not found"
-        )
-    
     # Update only provided fields
     update_data = service_data.model_dump(exclude_unset=True)
     update_data['updated_at'] = datetime.utcnow().isoformat()
     
-    await services_collection.update_one(
-        {"id": service_id},
-        {"$set": update_data}
-    )
-    
-    updated_service = await services_collection.find_one({"id": service_id})
+    updated_service = await update_document(services_collection, {"id": service_id}, {"$set": update_data})
+    if not updated_service:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Service not found"
+        )
     return serialize_document(updated_service)
 
 @router.delete("/{service_id}")
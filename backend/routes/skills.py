@@ -3,13 +3,16 @@ from schemas.skill import SkillCreate, SkillUpdate
 from database import skills_collection
 from auth.admin_auth import get_current_admin
 from models.skill import Skill
+from utils.http_cache import ConditionalGet, conditional_get, PUBLIC_LIST_POLICY
 
 router = APIRouter(prefix="/skills", tags=["skills"])
 
 @router.get("")
-async def get_skills():
+async def get_skills(cache: ConditionalGet = Depends(conditional_get(PUBLIC_LIST_POLICY))):
     """Get all skills (public endpoint)"""
     skills = await skills_collection.find({}).to_list(length=100)
+    if cache.is_fresh(skills):
+        return cache.not_modified()
     
     result = []
     for skill in skills:
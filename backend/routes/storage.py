@@ -1,19 +1,23 @@
 from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File
+from fastapi.responses import FileResponse, StreamingResponse
 from typing import List
 from schemas.storage import StorageItemCreate, StorageItemUpdate
 from database import storage_collection
 from auth.admin_auth import get_current_admin, check_permission
 from models.storage import StorageItem
+from utils.blob_store import blob_store
+from utils.uploads import STORAGE_UPLOAD_MAX_BYTES, UploadTooLarge, upload_metrics
 from datetime import datetime
-import os
-import shutil
-from pathlib import Path
 
 router = APIRouter(prefix="/storage", tags=["storage"])
 
-# Create uploads directory if it doesn't exist
-UPLOAD_DIR = Path("/app/public/uploads")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+# Uploaded files are served from the blob store at this prefix
+BLOB_URL_PREFIX = "/api/storage/blobs/"
+
+async def release_file_url(file_url):
+    """Drop the blob reference behind an uploaded file URL (other URLs are left alone)"""
+    if file_url and file_url.startswith(BLOB_URL_PREFIX):
+        await blob_store.release(file_url[len(BLOB_URL_PREFIX):])
 
 @router.get("/items")
 async def get_storage_items(current_admin: dict = Depends(get_current_admin)):
@@ -130,6 +134,8 @@ async def update_storage_item(
         {"id": item_id},
         {"$set": update_data}
     )
+    if 'fileUrl' in update_data and update_data['fileUrl'] != item.get('fileUrl'):
+        await release_file_url(item.get('fileUrl'))
     
     return {"message": "Storage item updated successfully"}
 
@@ -154,7 +160,9 @@ async def delete_storage_item(
             detail="Access denied"
         )
     
-    await storage_collection.delete_one({"id": item_id})
+    result = await storage_collection.delete_one({"id": item_id})
+    if result.deleted_count:
+        await release_file_url(item.get('fileUrl'))
     return {"message": "Storage item deleted successfully"}
 
 @router.post("/upload")
@@ -170,22 +178,48 @@ async def upload_file(
         )
     
     try:
-        # Generate unique filename
-        import uuid
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Stream the file into the blob store (identical content is stored once)
+        stored = await blob_store.store_upload(file, STORAGE_UPLOAD_MAX_BYTES, route="storage")
         
         # Return URL
-        file_url = f"/uploads/{unique_filename}"
-        return {"url": file_url, "filename": file.filename}
+        file_url = f"{BLOB_URL_PREFIX}{stored.key}"
+        return {"url": file_url, "filename": file.filename, "size": stored.size, "sha256": stored.key}
     
+    except UploadTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"File upload failed: {str(e)}"
         )
+
+@router.get("/upload-stats")
+async def get_upload_stats(current_admin: dict = Depends(get_current_admin)):
+    """Bytes written and throughput of streamed uploads, per route"""
+    return upload_metrics.stats()
+
+@router.get("/blobs/{key}")
+async def get_blob(key: str):
+    """Serve an uploaded file by its content hash (public, like the old /uploads files)"""
+    blob = await blob_store.info(key)
+    if not blob:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    
+    media_type = blob.get('content_type') or 'application/octet-stream'
+    # Content never changes under a key
+    headers = {"Cache-Control": "public, max-age=31536000, immutable"}
+    local_path = blob_store.local_path(key)
+    if local_path is not None:
+        return FileResponse(path=local_path, media_type=media_type, headers=headers)
+    return StreamingResponse(blob_store.stream(key), media_type=media_type, headers=headers)
+
+@router.get("/blob-stats")
+async def get_blob_stats(current_admin: dict = Depends(get_current_admin)):
+    """Blobs stored, deduplicated and deleted since startup"""
+    return blob_store.stats()
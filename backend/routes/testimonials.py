@@ -7,6 +7,7 @@ from database import testimonials_collection, clients_collection, client_project
 from schemas.testimonial import TestimonialCreate, TestimonialSubmit, TestimonialUpdate, TestimonialResponse
 from auth.admin_auth import get_current_admin
 from auth.client_auth import get_current_client
+from utils.http_cache import ConditionalGet, conditional_get, PUBLIC_LIST_POLICY
 
 router = APIRouter()
 
@@ -38,7 +39,7 @@ def testimonial_helper(testimonial) -> dict:
 # ================================
 
 @router.get("/", response_model=List[TestimonialResponse])
-async def get_public_testimonials():
+async def get_public_testimonials(cache: ConditionalGet = Depends(conditional_get(PUBLIC_LIST_POLICY))):
     """Get all approved testimonials (public endpoint)"""
     try:
         testimonials = []
@@ -48,6 +49,8 @@ async def get_public_testimonials():
         # Sort by created_at descending (newest first)
         testimonials.sort(key=lambda x: x["created_at"], reverse=True)
         
+        if cache.is_fresh(testimonials):
+            return cache.not_modified()
         return testimonials
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching testimonials: {str(e)}")
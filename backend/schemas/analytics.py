@@ -37,4 +37,35 @@ class AnalyticsSummary(BaseModel):
     calculator_estimates: int
     page_views_by_page: List[PageViewStats]
     blog_views: List[BlogViewStats]
-    period: str  # 'today', '7days', '30days'
+    period: str  # 'today', '7days', '30days', 'custom'
+
+class TimeSeriesPoint(BaseModel):
+    """Event counts for one hour or day bucket"""
+    bucket: datetime
+    total_page_views: int = 0
+    contact_submissions: int = 0
+    calculator_opened: int = 0
+    calculator_estimates: int = 0
+    blog_views: int = 0
+
+class AnalyticsTimeSeries(BaseModel):
+    """Summary and time series for an arbitrary date range"""
+    start: datetime
+    end: datetime
+    granularity: str  # 'hour', 'day'
+    summary: AnalyticsSummary
+    points: List[TimeSeriesPoint]
+
+class AnalyticsBufferStats(BaseModel):
+    """Ingestion buffer metrics"""
+    running: bool
+    queue_depth: int
+    queue_capacity: int
+    enqueued: int
+    flushed: int
+    dropped: int
+    sampled_out: int
+    failed: int
+    flush_count: int
+    last_flush_latency_ms: float
+    avg_flush_latency_ms: float
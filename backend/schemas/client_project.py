@@ -12,6 +12,9 @@ class ProjectFileResponse(BaseModel):
     uploaded_by: str
     file_size: Optional[int] = 0
     file_type: Optional[str] = None
+    sha256: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
 
 # Milestone Schemas
 class MilestoneCreate(BaseModel):
@@ -147,6 +150,31 @@ class ActivityResponse(BaseModel):
     timestamp: str
     metadata: Optional[Dict] = None
 
+# Paginated Sub-entity Schemas
+class TaskPage(BaseModel):
+    """Schema for a page of tasks"""
+    items: List[TaskResponse]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
+class CommentPage(BaseModel):
+    """Schema for a page of comments"""
+    items: List[CommentResponse]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
+class ChatMessagePage(BaseModel):
+    """Schema for a page of chat messages"""
+    items: List[ChatMessageResponse]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
+class ActivityPage(BaseModel):
+    """Schema for a page of activity log entries"""
+    items: List[ActivityResponse]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
 # Team Member Schemas
 class TeamMemberAdd(BaseModel):
     """Schema for adding team member"""
@@ -247,8 +275,38 @@ class ClientProjectResponse(BaseModel):
     updated_at: Optional[str] = None
     last_activity_at: Optional[str] = None
 
+class ClientProjectSummary(BaseModel):
+    """Schema for a project in a list view: header fields and counts only"""
+    id: str
+    name: str
+    client_id: str
+    description: Optional[str] = None
+    status: str
+    priority: str = "medium"
+    progress: int = 0
+    start_date: Optional[str] = None
+    expected_delivery: Optional[str] = None
+    actual_delivery: Optional[str] = None
+    tags: List[str] = []
+    open_tasks: int = 0
+    unread_messages: int = 0
+    file_count: int = 0
+    milestone_count: int = 0
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    last_activity_at: Optional[str] = None
+
+class ClientProjectSummaryPage(BaseModel):
+    """Schema for a page of project summaries"""
+    items: List[ClientProjectSummary]
+    total: int
+    page: int
+    limit: int
+
 class FileUploadResponse(BaseModel):
     """Schema for file upload response"""
     id: str
     filename: str
     message: str
+    file_size: Optional[int] = None
+    sha256: Optional[str] = None
@@ -0,0 +1,208 @@
+"""
+Benchmark for the HTTP middleware stack
+
+Compares ``HTTPStackMiddleware`` (raw ASGI, ``middleware.py``) against the
+``BaseHTTPMiddleware`` classes it replaced: the proxy header middleware from
+``server.py`` and the request ID, timing and security header middlewares
+from ``backend_structure_samples/middleware.py``. Both stacks wrap the same
+app and produce the same headers.
+
+Requests are driven straight through the ASGI interface from several
+concurrent clients, so the numbers are framework plus middleware cost
+without any network. Routes: the ``/`` health check and a JSON list like
+the public content endpoints return.
+
+Usage:
+    python scripts/benchmarks/bench_middleware_stack.py
+    python scripts/benchmarks/bench_middleware_stack.py --requests 20000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+# middleware.py imports the rate limiter, which imports database.py; nothing
+# connects unless a query runs
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from middleware import HTTPStackMiddleware
+
+
+# ---------------- PREVIOUS STACK ----------------
+class ProxyHeaderMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        forwarded_proto = request.headers.get("X-Forwarded-Proto")
+        if forwarded_proto:
+            request.scope["scheme"] = forwarded_proto
+        forwarded_host = request.headers.get("X-Forwarded-Host")
+        if forwarded_host:
+            request.scope["server"] = (forwarded_host, None)
+        return await call_next(request)
+
+
+class RequestIDMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        request_id = str(uuid.uuid4())
+        request.state.request_id = request_id
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+
+class TimingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.perf_counter()
+        response = await call_next(request)
+        response.headers["X-Process-Time"] = f"{time.perf_counter() - start_time:.4f}"
+        return response
+
+
+class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        if request.url.scheme == "https":
+            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+        return response
+
+
+# ---------------- APP ----------------
+ITEMS = [
+    {
+        "id": str(uuid.UUID(int=i)),
+        "title": f"Service {i}",
+        "slug": f"service-{i}",
+        "description": "A typical content entry returned by the public API",
+        "features": ["Design", "Development", "Support"],
+        "price": 1000 + i,
+        "order": i,
+        "created_at": "2025-01-01T00:00:00",
+    }
+    for i in range(30)
+]
+
+
+def build_app(stack: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/")
+    async def health_check():
+        return {"status": "healthy", "service": "Prompt Forge API"}
+
+    @app.get("/api/items")
+    async def items():
+        return ITEMS
+
+    if stack == "previous":
+        # Same order as before: proxy headers innermost
+        for middleware in (ProxyHeaderMiddleware, SecurityHeadersMiddleware, TimingMiddleware, RequestIDMiddleware):
+            app.add_middleware(middleware)
+    else:
+        # The previous stack always honored proxy headers (TRUST_PROXY=true)
+        app.add_middleware(HTTPStackMiddleware, proxy_headers=True, log_requests=False)
+    return app
+
+
+# ---------------- DRIVER ----------------
+async def request(app, path: str):
+    """One GET through the ASGI app; returns the response headers"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"x-forwarded-proto", b"https")],
+        "client": ("127.0.0.1", 40000),
+        "server": ("bench", 80),
+    }
+    sent_body = False
+    complete = asyncio.Event()
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Like uvicorn: the client stays connected until the response is sent
+        await complete.wait()
+        return {"type": "http.disconnect"}
+
+    response = {}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {name.lower(): value for name, value in message["headers"]}
+        elif message["type"] == "http.response.body" and not message.get("more_body", False):
+            complete.set()
+
+    await app(scope, receive, send)
+    assert response["status"] == 200
+    return response["headers"]
+
+
+async def run(app, path: str, total: int, concurrency: int):
+    """(requests per second, p50 ms, p99 ms)"""
+    latencies = []
+    per_client = total // concurrency
+
+    async def client():
+        for _ in range(per_client):
+            start = time.perf_counter()
+            await request(app, path)
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return (
+        len(latencies) / elapsed,
+        latencies[len(latencies) // 2] * 1000,
+        latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    )
+
+
+async def bench(total: int, concurrency: int, repeat: int):
+    apps = {stack: build_app(stack) for stack in ("previous", "asgi")}
+    expected = {b"x-request-id", b"x-process-time", b"x-content-type-options", b"x-frame-options",
+                b"referrer-policy", b"strict-transport-security"}
+    for app in apps.values():
+        # Both stacks must add the same headers, or the comparison is meaningless
+        assert expected <= set(await request(app, "/"))
+
+    print(f"📊 Middleware stack, {total} requests from {concurrency} concurrent clients (best of {repeat})")
+    print(f"{'route':<12} {'stack':<10} {'req/s':>10} {'p50':>10} {'p99':>10}")
+    for path in ("/", "/api/items"):
+        results = {}
+        for stack, app in apps.items():
+            await run(app, path, min(total, 1000), concurrency)  # warm up
+            runs = [await run(app, path, total, concurrency) for _ in range(repeat)]
+            results[stack] = max(runs, key=lambda result: result[0])
+            rps, p50, p99 = results[stack]
+            print(f"{path:<12} {stack:<10} {rps:>10.0f} {p50:>8.3f}ms {p99:>8.3f}ms")
+        speedup = results["asgi"][0] / results["previous"][0]
+        print(f"{'':<12} {'speedup':<10} {speedup:>9.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the raw ASGI middleware stack against BaseHTTPMiddleware")
+    parser.add_argument("--requests", type=int, default=10000, help="Requests per run")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent clients")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stack and route (best is reported)")
+    args = parser.parse_args()
+    asyncio.run(bench(args.requests, args.concurrency, args.repeat))
@@ -0,0 +1,109 @@
+"""
+Micro-benchmark for the client project response converter
+
+Compares, per project, the shared table-driven converter plus JSON encoding
+(what the project routes now send) against building the nested
+``ClientProjectResponse`` models and running them through a
+``response_model`` pass, which is what the routes used to do.
+
+Usage:
+    python scripts/benchmarks/bench_project_serializer.py
+    python scripts/benchmarks/bench_project_serializer.py --sizes 10 100 1000 --repeat 5
+"""
+import argparse
+import json
+import sys
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from fastapi.responses import JSONResponse
+
+from schemas.client_project import ClientProjectResponse
+from utils.project_serializer import ProjectJSONResponse, convert_project_to_response
+
+def make_project(items: int) -> dict:
+    """A project document with ``items`` entries in every embedded list"""
+    start = datetime(2025, 1, 1)
+
+    def ts(i):
+        # Mix of stored ISO strings and datetimes, like real documents
+        value = start + timedelta(minutes=i)
+        return value if i % 2 else value.isoformat()
+
+    return {
+        "id": "bench-project",
+        "name": "Benchmark project",
+        "client_id": "bench-client",
+        "description": "Synthetic project for the serializer benchmark",
+        "status": "in_progress",
+        "priority": "high",
+        "progress": 40,
+        "start_date": "2025-01-01",
+        "expected_delivery": "2025-06-01",
+        "notes": "notes",
+        "tags": ["bench"],
+        "created_at": start,
+        "updated_at": start.isoformat(),
+        "last_activity_at": start.isoformat(),
+        "budget": {"total_amount": 1000.0, "currency": "USD", "paid_amount": 250.0, "pending_amount": 750.0},
+        "milestones": [
+            {"id": f"m{i}", "title": f"Milestone {i}", "status": "pending", "order": i, "due_date": "2025-02-01", "created_at": ts(i)}
+            for i in range(items)
+        ],
+        "tasks": [
+            {"id": f"t{i}", "title": f"Task {i}", "status": "todo", "priority": "medium", "created_at": ts(i)}
+            for i in range(items)
+        ],
+        "files": [
+            {"id": f"f{i}", "filename": f"file{i}.pdf", "file_path": f"/uploads/file{i}.pdf", "uploaded_at": ts(i), "uploaded_by": "admin", "file_size": 1024}
+            for i in range(items)
+        ],
+        "comments": [
+            {"id": f"c{i}", "user_id": "u", "user_name": "User", "user_type": "client", "message": "Looks good", "created_at": ts(i)}
+            for i in range(items)
+        ],
+        "chat_messages": [
+            {"id": f"cm{i}", "sender_id": "u", "sender_name": "User", "sender_type": "client", "message": "Hello", "read": bool(i % 2), "created_at": ts(i)}
+            for i in range(items)
+        ],
+        "activity_log": [
+            {"id": f"a{i}", "action": "updated", "description": "Project updated", "user_id": "u", "user_name": "User", "timestamp": ts(i), "metadata": {}}
+            for i in range(items)
+        ],
+        "team_members": [
+            {"admin_id": f"adm{i}", "admin_name": "Admin", "role": "dev", "added_at": ts(i)}
+            for i in range(min(items, 20))
+        ],
+    }
+
+def converted(doc):
+    return ProjectJSONResponse(convert_project_to_response(doc)).body
+
+def previous(doc):
+    # Build the nested models, then FastAPI's response_model pass: dump,
+    # validate again, serialize and encode
+    model = ClientProjectResponse(**convert_project_to_response(doc))
+    body = ClientProjectResponse.model_validate(model.model_dump())
+    return JSONResponse(body.model_dump(mode="json")).body
+
+def bench(sizes, repeat):
+    print("📊 Client project serialization, per project")
+    print(f"{'items':>8} {'converter':>12} {'previous':>12} {'speedup':>9}")
+    for items in sizes:
+        doc = make_project(items)
+        # Same output either way, or the comparison is meaningless
+        assert json.loads(converted(doc)) == json.loads(previous(doc))
+        number = max(1, 2000 // items)
+        fast = min(timeit.repeat(lambda: converted(doc), number=number, repeat=repeat)) / number
+        slow = min(timeit.repeat(lambda: previous(doc), number=number, repeat=repeat)) / number
+        print(f"{items:>8} {fast * 1000:>10.3f}ms {slow * 1000:>10.3f}ms {slow / fast:>8.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the client project response converter")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Entries per embedded list")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs per size (best is reported)")
+    args = parser.parse_args()
+    bench(args.sizes, args.repeat)
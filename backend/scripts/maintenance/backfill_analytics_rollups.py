@@ -0,0 +1,36 @@
+"""
+Rebuild analytics rollups from the raw analytics events
+
+Usage:
+    python scripts/maintenance/backfill_analytics_rollups.py
+    python scripts/maintenance/backfill_analytics_rollups.py --start 2025-01-01 --end 2025-01-31
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from utils.analytics_rollups import rebuild_rollups
+
+def parse_date(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d")
+
+async def backfill(start=None, end=None):
+    """Replace rollups in the given day range with counts from raw events"""
+    window = f"{start.date() if start else 'beginning'} → {end.date() if end else 'now'}"
+    print(f"🔧 Rebuilding analytics rollups ({window})...")
+
+    written = await rebuild_rollups(start, end)
+
+    print(f"✅ Wrote {written} rollup documents")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild analytics rollups from raw events")
+    parser.add_argument("--start", type=parse_date, help="First day to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--end", type=parse_date, help="Last day to rebuild (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    asyncio.run(backfill(args.start, args.end))
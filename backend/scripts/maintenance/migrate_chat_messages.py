@@ -0,0 +1,35 @@
+"""
+Move embedded conversation messages into the chat_messages collection
+
+Conversations created before the message store kept every message in a
+`messages` array on the conversation document. This splits those arrays into
+one chat_messages document per message and removes the array. Conversations
+that are touched by the API are migrated lazily as well, so this is safe to
+run at any time and to re-run.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from database import conversations_collection
+from utils.chat_store import ensure_migrated
+
+async def migrate_chat_messages():
+    """Split every legacy messages array into the message store"""
+    print("🔧 Migrating chat messages out of conversations...")
+    
+    migrated = 0
+    moved = 0
+    async for conversation in conversations_collection.find({"messages": {"$exists": True}}):
+        count = len(conversation.get("messages") or [])
+        await ensure_migrated(conversation)
+        migrated += 1
+        moved += count
+        print(f"  • {conversation.get('customer_email')} - {count} messages")
+    
+    print(f"\n✅ Migrated {migrated} conversations ({moved} messages)")
+
+if __name__ == "__main__":
+    asyncio.run(migrate_chat_messages())
@@ -0,0 +1,54 @@
+"""
+Split embedded client project sub-entities into their own collections
+
+Client projects created before the split kept every task, comment, chat
+message and activity entry in arrays on the project document. This moves
+each array into its collection (client_project_tasks, client_project_comments,
+client_project_chat, client_project_activity) and removes it from the
+project. Projects that are touched by the API are migrated lazily as well, so
+this is safe to run at any time and to re-run.
+
+It also builds the capped recent-activity window on projects that were split
+before the window existed.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from database import client_projects_collection
+from utils.project_store import CHILDREN, LEGACY_PROJECTION, ensure_migrated, seed_window
+
+async def migrate_client_project_children():
+    """Split every legacy project's embedded arrays into their collections"""
+    print("🔧 Migrating client project tasks, comments, chat and activity...")
+    
+    legacy_filter = {"$or": [{field: {"$exists": True}} for field in CHILDREN]}
+    migrated = 0
+    moved = {field: 0 for field in CHILDREN}
+    
+    async for project in client_projects_collection.find(legacy_filter, LEGACY_PROJECTION):
+        counts = {field: len(project.get(field) or []) for field in CHILDREN}
+        await ensure_migrated(project)
+        migrated += 1
+        for field, count in counts.items():
+            moved[field] += count
+        summary = ", ".join(f"{count} {field}" for field, count in counts.items())
+        print(f"  • {project['id']} - {summary}")
+    
+    print(f"\n✅ Migrated {migrated} projects")
+    for field, count in moved.items():
+        print(f"   {field}: {count}")
+    
+    for field, spec in CHILDREN.items():
+        if not spec.window_field:
+            continue
+        seeded = 0
+        async for project in client_projects_collection.find({spec.window_field: {"$exists": False}}, {"_id": 0, "id": 1}):
+            if await seed_window(field, project["id"]):
+                seeded += 1
+        print(f"✅ Built {spec.window_field} window on {seeded} projects")
+
+if __name__ == "__main__":
+    asyncio.run(migrate_client_project_children())
@@ -0,0 +1,59 @@
+"""
+Diff the declared indexes in indexes.py against the live database
+
+Usage:
+    python scripts/maintenance/sync_indexes.py            # report only
+    python scripts/maintenance/sync_indexes.py --apply    # create missing indexes
+    python scripts/maintenance/sync_indexes.py --apply --rebuild-changed
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from database import db
+from indexes import diff_indexes, ensure_indexes
+
+async def sync_indexes(apply: bool = False, rebuild_changed: bool = False):
+    """Print the index diff and optionally bring the database in line"""
+    print("🔍 Comparing declared indexes with live indexes...")
+
+    diff = await diff_indexes()
+    if not diff:
+        print("✅ All declared indexes are in place")
+        return
+
+    for collection_name, entry in diff.items():
+        print(f"\n📁 {collection_name}")
+        for name in entry["missing"]:
+            print(f"  + {name} (missing)")
+        for name in entry["changed"]:
+            print(f"  ~ {name} (options differ)")
+        for name in entry["extra"]:
+            print(f"  - {name} (not declared)")
+
+    if not apply:
+        print("\nℹ️  Run with --apply to create missing indexes")
+        return
+
+    if rebuild_changed:
+        for collection_name, entry in diff.items():
+            for name in entry["changed"]:
+                await db[collection_name].drop_index(name)
+                print(f"🗑️  Dropped {collection_name}.{name}")
+
+    report = await ensure_indexes()
+    print(f"\n✅ Created {len(report['created'])} indexes")
+    for label in report["failed"]:
+        print(f"❌ Failed: {label} (check for duplicate values)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Diff and apply declared MongoDB indexes")
+    parser.add_argument("--apply", action="store_true", help="Create missing indexes")
+    parser.add_argument("--rebuild-changed", action="store_true",
+                        help="Drop and recreate indexes whose options differ (with --apply)")
+    args = parser.parse_args()
+
+    asyncio.run(sync_indexes(args.apply, args.rebuild_changed))
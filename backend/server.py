@@ -23,7 +23,8 @@ from routes import (
     chat_router,
     blogs_router,
     newsletter_router,
-    analytics_router
+    analytics_router,
+    jobs_router
 )
 from routes.contact_page import router as contact_page_router
 from routes.testimonials import router as testimonials_router
@@ -58,24 +59,14 @@ app = FastAPI(
 )
 
 # -------------------------------------------------------------------
-# Proxy Header Middleware
+# Middleware (added innermost first)
 # -------------------------------------------------------------------
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from middleware import HTTPStackMiddleware, RateLimitMiddleware
+from utils.rate_limit import RATE_LIMIT_ENABLED, rate_limiter
 
-class ProxyHeaderMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        forwarded_proto = request.headers.get("X-Forwarded-Proto")
-        if forwarded_proto:
-            request.scope["scheme"] = forwarded_proto
-
-        forwarded_host = request.headers.get("X-Forwarded-Host")
-        if forwarded_host:
-            request.scope["server"] = (forwarded_host, None)
-
-        return await call_next(request)
-
-app.add_middleware(ProxyHeaderMiddleware)
+# Rate limiting sits inside CORS so 429 responses carry CORS headers
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
 
 # -------------------------------------------------------------------
 # ✅ CORS (FIXED FOR VERCEL + RENDER)
@@ -94,6 +85,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# -------------------------------------------------------------------
+# Proxy headers, request ID, timing, security headers (outermost, so
+# CORS preflights and 429s get them too)
+# -------------------------------------------------------------------
+app.add_middleware(HTTPStackMiddleware)
+
 # -------------------------------------------------------------------
 # Routers
 # -------------------------------------------------------------------
@@ -126,6 +123,7 @@ api_router.include_router(testimonials_router, prefix="/testimonials")
 api_router.include_router(newsletter_router)
 api_router.include_router(pricing_router)
 api_router.include_router(analytics_router)
+api_router.include_router(jobs_router)
 
 api_router.include_router(client_auth_router)
 api_router.include_router(admin_clients_router)
@@ -142,6 +140,27 @@ app.include_router(api_router)
 # -------------------------------------------------------------------
 @app.on_event("startup")
 async def startup_event():
+    from utils.analytics_buffer import analytics_buffer
+    from utils.analytics_rollups import apply_rollups
+    analytics_buffer.add_flush_hook(apply_rollups)
+    analytics_buffer.start()
+
+    from utils.previews import preview_workers
+    preview_workers.start()
+
+    import utils.job_handlers  # noqa: F401 - registers the job handlers
+    from utils.jobs import job_queue
+    job_queue.start()
+
+    if RATE_LIMIT_ENABLED:
+        rate_limiter.start()
+
+    try:
+        from indexes import ensure_indexes
+        await ensure_indexes()
+    except Exception as e:
+        logger.warning(f"Index initialization failed: {e}")
+
     try:
         from auto_init import auto_initialize_database
         await auto_initialize_database()
@@ -181,4 +200,16 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    # Drain queued analytics events before the connection goes away
+    from utils.analytics_buffer import analytics_buffer
+    await analytics_buffer.stop()
+
+    from utils.previews import preview_workers
+    await preview_workers.stop()
+
+    from utils.jobs import job_queue
+    await job_queue.stop()
+
+    await rate_limiter.stop()
+
     await close_db_connection()
@@ -0,0 +1,208 @@
+"""
+In-process ingestion buffer for analytics events.
+
+Events are pushed onto a bounded asyncio queue by the request handler and a
+background flusher coalesces them into ``insert_many(ordered=False)`` batches,
+so a page view no longer costs a MongoDB round trip on the request path.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+from database import analytics_collection
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_QUEUE_SIZE = int(os.environ.get('ANALYTICS_QUEUE_SIZE', 10000))
+ANALYTICS_BATCH_SIZE = int(os.environ.get('ANALYTICS_BATCH_SIZE', 500))
+ANALYTICS_FLUSH_INTERVAL = float(os.environ.get('ANALYTICS_FLUSH_INTERVAL', 2.0))
+ANALYTICS_SAMPLE_RATE = float(os.environ.get('ANALYTICS_SAMPLE_RATE', 0.25))
+ANALYTICS_DRAIN_TIMEOUT = float(os.environ.get('ANALYTICS_DRAIN_TIMEOUT', 10.0))
+
+FlushHook = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+
+class AnalyticsBuffer:
+    """Bounded queue plus background flusher for analytics events.
+
+    Once the queue is more than ``high_watermark`` full, new events are only
+    accepted with probability ``sample_rate``; when it is completely full they
+    are dropped. Both cases are counted so the loss is visible.
+    """
+
+    def __init__(
+        self,
+        collection,
+        max_size: int = ANALYTICS_QUEUE_SIZE,
+        batch_size: int = ANALYTICS_BATCH_SIZE,
+        flush_interval: float = ANALYTICS_FLUSH_INTERVAL,
+        sample_rate: float = ANALYTICS_SAMPLE_RATE,
+        high_watermark: float = 0.8,
+    ):
+        self.collection = collection
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.sample_rate = sample_rate
+        self.high_watermark = int(max_size * high_watermark)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._flush_hooks: List[FlushHook] = []
+
+        self.enqueued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.failed = 0
+        self.flush_count = 0
+        self.last_flush_latency_ms = 0.0
+        self.total_flush_latency_ms = 0.0
+
+    # ---------------- LIFECYCLE ----------------
+    def start(self):
+        """Start the background flusher on the running event loop"""
+        if self._task and not self._task.done():
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._closing = False
+        self._task = asyncio.create_task(self._run(), name="analytics-flusher")
+        logger.info("📊 Analytics buffer started")
+
+    async def stop(self, timeout: float = ANALYTICS_DRAIN_TIMEOUT):
+        """Stop accepting events and flush whatever is still queued"""
+        self._closing = True
+        if not self._task:
+            return
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            lost = self._queue.qsize() if self._queue else 0
+            self.dropped += lost
+            logger.warning(f"Analytics buffer drain timed out, {lost} events lost")
+        self._task = None
+        logger.info(f"📊 Analytics buffer stopped ({self.flushed} events flushed)")
+
+    def add_flush_hook(self, hook: FlushHook):
+        """Register a coroutine called with every successfully written batch
+
+        Registering the same hook again (another startup in the same
+        process) is a no-op, so a batch is never applied twice.
+        """
+        if hook not in self._flush_hooks:
+            self._flush_hooks.append(hook)
+
+    # ---------------- INGEST ----------------
+    def enqueue(self, event: Dict[str, Any]) -> bool:
+        """Queue an event without waiting. Returns False if it was shed."""
+        if self._closing:
+            self.dropped += 1
+            return False
+        if not self._task or self._task.done():
+            self.start()
+
+        depth = self._queue.qsize()
+        if depth >= self.high_watermark and random.random() >= self.sample_rate:
+            self.sampled_out += 1
+            return False
+
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+        self.enqueued += 1
+        return True
+
+    # ---------------- FLUSHER ----------------
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        """Wait for the first event, then collect until size or age is hit"""
+        try:
+            first = await asyncio.wait_for(self._queue.get(), timeout=self.flush_interval)
+        except asyncio.TimeoutError:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if self._closing:
+                # Draining - take what is already queued without waiting
+                if self._queue.empty():
+                    break
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while not (self._closing and self._queue.empty()):
+            batch = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        started = time.perf_counter()
+        try:
+            await self.collection.insert_many(batch, ordered=False)
+            self.flushed += len(batch)
+        except BulkWriteError as e:
+            # Unordered: every event without a write error was inserted
+            errors = e.details.get("writeErrors", [])
+            rejected = {error["index"] for error in errors}
+            inserted = e.details.get("nInserted", len(batch) - len(rejected))
+            self.flushed += inserted
+            self.failed += len(batch) - inserted
+            first_error = errors[0].get("errmsg") if errors else str(e)
+            logger.warning(f"Analytics batch partly failed ({len(batch) - inserted} of {len(batch)} events): {first_error}")
+            batch = [event for index, event in enumerate(batch) if index not in rejected]
+        except Exception as e:
+            # Fail silently - analytics must never take the API down
+            self.failed += len(batch)
+            logger.warning(f"Analytics batch insert failed ({len(batch)} events): {str(e)}")
+            return
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.flush_count += 1
+            self.last_flush_latency_ms = elapsed_ms
+            self.total_flush_latency_ms += elapsed_ms
+
+        for hook in self._flush_hooks:
+            try:
+                await hook(batch)
+            except Exception as e:
+                logger.warning(f"Analytics flush hook failed: {str(e)}")
+
+    # ---------------- METRICS ----------------
+    def stats(self) -> Dict[str, Any]:
+        avg_latency = self.total_flush_latency_ms / self.flush_count if self.flush_count else 0.0
+        return {
+            "running": bool(self._task and not self._task.done()),
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_capacity": self.max_size,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "failed": self.failed,
+            "flush_count": self.flush_count,
+            "last_flush_latency_ms": round(self.last_flush_latency_ms, 2),
+            "avg_flush_latency_ms": round(avg_latency, 2),
+        }
+
+
+analytics_buffer = AnalyticsBuffer(analytics_collection)
@@ -0,0 +1,200 @@
+"""
+Pre-aggregated analytics counters.
+
+Every analytics event increments an hourly and a daily counter keyed by
+(event_type, page_name, blog_id). The admin summary reads these rollups
+instead of scanning the raw ``analytics`` collection.
+"""
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ReplaceOne, UpdateOne
+
+from database import analytics_collection, analytics_rollups_collection
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_GRANULARITIES = ("hour", "day")
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    """Truncate a timestamp to the start of its hour or day bucket"""
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def rollup_id(granularity: str, bucket: datetime, event_type: str,
+              page_name: Optional[str], blog_id: Optional[str]) -> str:
+    """Deterministic _id so concurrent upserts land on the same document"""
+    return "|".join([
+        granularity,
+        bucket.isoformat(),
+        event_type or "",
+        page_name or "",
+        blog_id or "",
+    ])
+
+
+def _rollup_doc(granularity: str, bucket: datetime, event_type: str,
+                page_name: Optional[str], blog_id: Optional[str]) -> Dict[str, Any]:
+    return {
+        "_id": rollup_id(granularity, bucket, event_type, page_name, blog_id),
+        "granularity": granularity,
+        "bucket": bucket,
+        "event_type": event_type,
+        "page_name": page_name,
+        "blog_id": blog_id,
+    }
+
+
+async def apply_rollups(events: Iterable[Dict[str, Any]]):
+    """Increment rollup counters for a batch of raw events.
+
+    Events sharing a bucket are folded together first, so a flushed batch of
+    500 page views becomes a handful of ``$inc`` upserts in one bulk write.
+    """
+    counts: Counter = Counter()
+    titles: Dict[Tuple, str] = {}
+
+    for event in events:
+        for granularity in ROLLUP_GRANULARITIES:
+            key = (
+                granularity,
+                bucket_start(event["timestamp"], granularity),
+                event.get("event_type"),
+                event.get("page_name"),
+                event.get("blog_id"),
+            )
+            counts[key] += 1
+            if event.get("blog_title"):
+                titles[key] = event["blog_title"]
+
+    if not counts:
+        return
+
+    operations = []
+    for key, count in counts.items():
+        doc = _rollup_doc(*key)
+        update = {
+            "$inc": {"count": count},
+            "$setOnInsert": {k: v for k, v in doc.items() if k != "_id"},
+        }
+        if key in titles:
+            update["$set"] = {"blog_title": titles[key]}
+        operations.append(UpdateOne({"_id": doc["_id"]}, update, upsert=True))
+
+    await analytics_rollups_collection.bulk_write(operations, ordered=False)
+
+
+def _rollup_window(start_date: datetime, now: datetime) -> Dict[str, Any]:
+    """Build a rollup filter covering [start_date, now].
+
+    Whole days inside the window are read from daily rollups; the partial day
+    at each edge is read from hourly rollups. The window start is rounded down
+    to the hour.
+    """
+    start_hour = bucket_start(start_date, "hour")
+    today_start = bucket_start(now, "day")
+    first_full_day = bucket_start(start_hour, "day")
+    if first_full_day < start_hour:
+        first_full_day += timedelta(days=1)
+
+    if first_full_day >= today_start:
+        return {"granularity": "hour", "bucket": {"$gte": start_hour}}
+
+    return {"$or": [
+        {"granularity": "hour", "bucket": {"$gte": start_hour, "$lt": first_full_day}},
+        {"granularity": "day", "bucket": {"$gte": first_full_day, "$lt": today_start}},
+        {"granularity": "hour", "bucket": {"$gte": today_start}},
+    ]}
+
+
+async def summarize_rollups(start_date: datetime, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Sum rollup counters since ``start_date``, grouped by event key"""
+    now = now or datetime.utcnow()
+    pipeline = [
+        {"$match": _rollup_window(start_date, now)},
+        {"$group": {
+            "_id": {
+                "event_type": "$event_type",
+                "page_name": "$page_name",
+                "blog_id": "$blog_id",
+            },
+            "count": {"$sum": "$count"},
+            "blog_title": {"$last": "$blog_title"},
+        }},
+    ]
+    cursor = analytics_rollups_collection.aggregate(pipeline)
+    return await cursor.to_list(length=None)
+
+
+async def rebuild_rollups(start: Optional[datetime] = None, end: Optional[datetime] = None) -> int:
+    """Recompute rollups from the raw events collection.
+
+    Each bucket is replaced in place (``ReplaceOne`` with upsert), not
+    incremented, so the rebuild can be re-run safely and the summary keeps
+    reading whole counters while it runs. Afterwards, closed buckets this
+    run did not write (their raw events are gone) are removed; buckets still
+    open when it started are left to the live flushes. ``start``/``end`` are
+    widened to whole days. Returns the number of rollup documents written.
+    """
+    started = datetime.utcnow()
+    match: Dict[str, Any] = {}
+    day_filter: Dict[str, Any] = {}
+    if start:
+        day_filter["$gte"] = bucket_start(start, "day")
+    if end:
+        day_filter["$lt"] = bucket_start(end, "day") + timedelta(days=1)
+    if day_filter:
+        match["timestamp"] = day_filter
+
+    written = 0
+    for granularity in ROLLUP_GRANULARITIES:
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {
+                    "bucket": {"$dateTrunc": {"date": "$timestamp", "unit": granularity}},
+                    "event_type": "$event_type",
+                    "page_name": "$page_name",
+                    "blog_id": "$blog_id",
+                },
+                "count": {"$sum": 1},
+                "blog_title": {"$last": "$blog_title"},
+            }},
+        ]
+
+        operations = []
+        async for row in analytics_collection.aggregate(pipeline, allowDiskUse=True):
+            key = row["_id"]
+            doc = _rollup_doc(granularity, key["bucket"], key.get("event_type"),
+                              key.get("page_name"), key.get("blog_id"))
+            doc["count"] = row["count"]
+            doc["rebuilt_at"] = started
+            if row.get("blog_title"):
+                doc["blog_title"] = row["blog_title"]
+            operations.append(ReplaceOne({"_id": doc["_id"]}, doc, upsert=True))
+
+            if len(operations) >= 1000:
+                await analytics_rollups_collection.bulk_write(operations, ordered=False)
+                written += len(operations)
+                operations = []
+
+        if operations:
+            await analytics_rollups_collection.bulk_write(operations, ordered=False)
+            written += len(operations)
+
+        stale_buckets = {**day_filter, "$lt": min(
+            day_filter.get("$lt", started), bucket_start(started, granularity)
+        )}
+        await analytics_rollups_collection.delete_many({
+            "granularity": granularity,
+            "bucket": stale_buckets,
+            "rebuilt_at": {"$ne": started},
+        })
+
+    logger.info(f"📊 Rebuilt {written} analytics rollups")
+    return written
@@ -0,0 +1,348 @@
+"""
+Content-addressed, reference-counted blob store.
+
+Uploaded files are stored once per distinct content, keyed by their SHA-256.
+The ``blobs`` collection keeps one document per blob (``_id`` is the key)
+with a reference count: storing content that already exists only bumps the
+count, and a blob is deleted from the backend when its last reference is
+released. Project files and storage uploads keep the key on their own
+documents.
+
+Two backends:
+
+- ``LocalBlobBackend`` - files under ``BLOB_STORE_ROOT``, fanned out by key
+  prefix
+- ``S3BlobBackend`` - any S3-compatible service through boto3; set
+  ``BLOB_S3_ENDPOINT_URL`` to use a local stand-in (MinIO, moto server)
+
+Uploads are streamed to a staging file first (see ``utils/uploads.py``), so
+the key is known before anything reaches the backend. Reference counting is
+best-effort across crashes: a blob whose count never dropped stays around,
+it is never deleted while referenced.
+
+Deleting the last reference tombstones the document (``deleting``), deletes
+the content, then removes the document only if nothing referenced it in
+the meantime. An upload of the same content that finds a tombstone waits
+for the delete to finish and stores its own copy instead of deduplicating.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Dict, Optional
+from urllib.parse import quote
+
+from fastapi import UploadFile
+from pymongo import ReturnDocument
+from starlette.concurrency import run_in_threadpool
+
+from database import blobs_collection
+from utils.uploads import UPLOAD_CHUNK_SIZE, save_upload
+
+logger = logging.getLogger(__name__)
+
+BLOB_STORE_BACKEND = os.environ.get('BLOB_STORE_BACKEND', 'local')
+BLOB_STORE_ROOT = os.environ.get('BLOB_STORE_ROOT', '/app/backend/uploads/blobs')
+BLOB_S3_BUCKET = os.environ.get('BLOB_S3_BUCKET', '')
+BLOB_S3_PREFIX = os.environ.get('BLOB_S3_PREFIX', 'blobs/')
+BLOB_S3_ENDPOINT_URL = os.environ.get('BLOB_S3_ENDPOINT_URL') or None
+BLOB_S3_REGION = os.environ.get('BLOB_S3_REGION') or None
+# An upload waits this long for a concurrent delete before assuming the
+# deleting process died and clearing its tombstone
+BLOB_TOMBSTONE_TIMEOUT = float(os.environ.get('BLOB_TOMBSTONE_TIMEOUT', 60.0))
+BLOB_TOMBSTONE_POLL = 0.05
+
+
+def _fan_out(key: str) -> str:
+    return f"{key[:2]}/{key[2:4]}/{key}"
+
+
+class LocalBlobBackend:
+    """Blobs as files on the local filesystem"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path(self, key: str) -> Path:
+        return self.root / _fan_out(key)
+
+    def local_path(self, key: str) -> Optional[Path]:
+        return self.path(key)
+
+    def location(self, key: str) -> str:
+        return str(self.path(key))
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def put(self, key: str, source: Path, content_type: Optional[str] = None):
+        """Move a finished staging file into place"""
+        target = self.path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(source, target)
+
+    def open(self, key: str, start: int = 0) -> BinaryIO:
+        handle = open(self.path(key), "rb")
+        if start:
+            handle.seek(start)
+        return handle
+
+    def delete(self, key: str):
+        self.path(key).unlink(missing_ok=True)
+
+
+class S3BlobBackend:
+    """Blobs as objects in an S3-compatible bucket"""
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None, client=None):
+        if client is None:
+            import boto3
+            client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def object_key(self, key: str) -> str:
+        return f"{self.prefix}{_fan_out(key)}"
+
+    def local_path(self, key: str) -> Optional[Path]:
+        return None
+
+    def location(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self.object_key(key)}"
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put(self, key: str, source: Path, content_type: Optional[str] = None):
+        """Upload a finished staging file (multipart for large files) and remove it"""
+        extra = {"ContentType": content_type} if content_type else None
+        try:
+            self.client.upload_file(str(source), self.bucket, self.object_key(key), ExtraArgs=extra)
+        finally:
+            source.unlink(missing_ok=True)
+
+    def open(self, key: str, start: int = 0):
+        """Streaming body of the object, from byte ``start`` on"""
+        params: Dict[str, Any] = {"Bucket": self.bucket, "Key": self.object_key(key)}
+        if start:
+            params["Range"] = f"bytes={start}-"
+        return self.client.get_object(**params)["Body"]
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+
+def attachment_header(filename: str) -> str:
+    """Content-Disposition for a download, like ``FileResponse`` builds it"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+@dataclass
+class StoredBlob:
+    key: str
+    size: int
+    location: str
+    deduplicated: bool
+
+
+class BlobStore:
+    """Reference-counted blobs on a backend"""
+
+    def __init__(self, backend, collection, staging_dir: str):
+        self.backend = backend
+        self.collection = collection
+        self.staging_dir = Path(staging_dir)
+
+        self.stored = 0
+        self.deduplicated = 0
+        self.released = 0
+        self.deleted = 0
+
+    async def store_upload(self, upload: UploadFile, max_bytes: int, route: str) -> StoredBlob:
+        """Stream an upload into the store and take a reference to it.
+
+        Raises UploadTooLarge like ``save_upload``.
+        """
+        await run_in_threadpool(self.staging_dir.mkdir, parents=True, exist_ok=True)
+        staging = self.staging_dir / uuid.uuid4().hex
+        saved = await save_upload(upload, staging, max_bytes, route)
+        return await self._commit(staging, saved.sha256, saved.size, upload.content_type)
+
+    async def store_bytes(self, data: bytes, content_type: Optional[str] = None) -> StoredBlob:
+        """Store generated content (previews, exports) and take a reference to it"""
+        await run_in_threadpool(self.staging_dir.mkdir, parents=True, exist_ok=True)
+        staging = self.staging_dir / uuid.uuid4().hex
+        await run_in_threadpool(staging.write_bytes, data)
+        return await self._commit(staging, hashlib.sha256(data).hexdigest(), len(data), content_type)
+
+    async def _commit(self, staging: Path, key: str, size: int, content_type: Optional[str]) -> StoredBlob:
+        """Take a reference to ``key`` and move the staging file into the backend"""
+        # Take the reference before the content lands: once refs > 0 no new
+        # delete can start (see ``release``)
+        doc = await self.collection.find_one_and_update(
+            {"_id": key},
+            {
+                "$inc": {"refs": 1},
+                "$setOnInsert": {
+                    "size": size,
+                    "content_type": content_type,
+                    "created_at": datetime.utcnow().isoformat(),
+                },
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        try:
+            if doc.get("deleting"):
+                # A delete already started; whatever is in the backend now is
+                # about to go, so store this copy once it is done
+                await self._wait_for_delete(key, doc["deleting"])
+                deduplicated = False
+            else:
+                deduplicated = await run_in_threadpool(self.backend.exists, key)
+            if deduplicated:
+                await run_in_threadpool(staging.unlink, missing_ok=True)
+                self.deduplicated += 1
+            else:
+                await run_in_threadpool(self.backend.put, key, staging, content_type)
+                self.stored += 1
+        except Exception:
+            await run_in_threadpool(staging.unlink, missing_ok=True)
+            await self.release(key)
+            raise
+
+        return StoredBlob(key=key, size=size, location=self.backend.location(key), deduplicated=deduplicated)
+
+    async def _wait_for_delete(self, key: str, token: str):
+        deadline = time.monotonic() + BLOB_TOMBSTONE_TIMEOUT
+        while await self.collection.find_one({"_id": key, "deleting": token}, {"_id": 1}):
+            if time.monotonic() >= deadline:
+                logger.warning(f"⚠️ Clearing stale delete tombstone on blob {key}")
+                await self.collection.update_one({"_id": key, "deleting": token}, {"$unset": {"deleting": ""}})
+                return
+            await asyncio.sleep(BLOB_TOMBSTONE_POLL)
+
+    async def release(self, key: str, release_id: Optional[str] = None) -> bool:
+        """Drop one reference; deletes the blob with its last one. True if deleted.
+
+        With a ``release_id`` (one per reference, e.g. the cleanup job's
+        idempotency key) releasing the same reference again is a no-op, so a
+        retried job cannot drop a reference another file still holds.
+        """
+        query: Dict[str, Any] = {"_id": key}
+        update: Dict[str, Any] = {"$inc": {"refs": -1}}
+        if release_id:
+            query["released_by"] = {"$ne": release_id}
+            update["$addToSet"] = {"released_by": release_id}
+        doc = await self.collection.find_one_and_update(
+            query,
+            update,
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            return False
+        self.released += 1
+        if doc.get("refs", 0) > 0:
+            return False
+
+        # Tombstone first: uploads of this content now wait instead of
+        # deduplicating against an object that is about to be deleted
+        token = uuid.uuid4().hex
+        claimed = await self.collection.update_one(
+            {"_id": key, "refs": {"$lte": 0}, "deleting": {"$exists": False}},
+            {"$set": {"deleting": token}}
+        )
+        if not claimed.modified_count:
+            return False
+        try:
+            await run_in_threadpool(self.backend.delete, key)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to delete blob {key}: {str(e)}")
+            await self.collection.update_one({"_id": key, "deleting": token}, {"$unset": {"deleting": ""}})
+            return False
+
+        # Content is gone; drop the document unless it was referenced again
+        # meanwhile, in which case that upload stores the content again
+        result = await self.collection.delete_one({"_id": key, "deleting": token, "refs": {"$lte": 0}})
+        if not result.deleted_count:
+            await self.collection.update_one({"_id": key, "deleting": token}, {"$unset": {"deleting": ""}})
+            return False
+        self.deleted += 1
+        return True
+
+    async def info(self, key: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": key})
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Filesystem path of a blob, or None when the backend is remote"""
+        return self.backend.local_path(key)
+
+    @asynccontextmanager
+    async def local_copy(self, key: str) -> AsyncIterator[Path]:
+        """A filesystem path with the blob's content, downloaded to staging for remote backends"""
+        local_path = self.backend.local_path(key)
+        if local_path is not None:
+            yield local_path
+            return
+        await run_in_threadpool(self.staging_dir.mkdir, parents=True, exist_ok=True)
+        staging = self.staging_dir / uuid.uuid4().hex
+        try:
+            with open(staging, "wb") as handle:
+                async for chunk in self.stream(key):
+                    await run_in_threadpool(handle.write, chunk)
+            yield staging
+        finally:
+            await run_in_threadpool(staging.unlink, missing_ok=True)
+
+    async def stream(self, key: str, start: int = 0, length: Optional[int] = None,
+                     chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Blob content in chunks, read in the thread pool"""
+        handle = await run_in_threadpool(self.backend.open, key, start)
+        try:
+            remaining = length
+            while remaining is None or remaining > 0:
+                size = chunk_size if remaining is None else min(chunk_size, remaining)
+                chunk = await run_in_threadpool(handle.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await run_in_threadpool(handle.close)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__,
+            "stored": self.stored,
+            "deduplicated": self.deduplicated,
+            "released": self.released,
+            "deleted": self.deleted,
+        }
+
+
+def create_backend():
+    if BLOB_STORE_BACKEND == "s3":
+        return S3BlobBackend(BLOB_S3_BUCKET, BLOB_S3_PREFIX, BLOB_S3_ENDPOINT_URL, BLOB_S3_REGION)
+    return LocalBlobBackend(BLOB_STORE_ROOT)
+
+
+blob_store = BlobStore(create_backend(), blobs_collection, os.path.join(BLOB_STORE_ROOT, ".staging"))
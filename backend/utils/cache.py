@@ -0,0 +1,128 @@
+"""
+Shared async read-through cache for rarely-changing content.
+
+Values are kept for a TTL and evicted explicitly by the admin handlers that
+change them. Concurrent misses for the same key share a single load, so a
+cold cache costs one MongoDB read no matter how many requests arrive.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_CACHE_TTL = float(os.environ.get('CONTENT_CACHE_TTL', 60))
+CONTENT_CACHE_MAX_ENTRIES = int(os.environ.get('CONTENT_CACHE_MAX_ENTRIES', 512))
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+class AsyncTTLCache:
+    """In-process TTL cache with single-flight loading.
+
+    Cached values are shared between requests - callers must treat them as
+    read-only.
+    """
+
+    def __init__(self, default_ttl: float = CONTENT_CACHE_TTL, max_entries: int = CONTENT_CACHE_MAX_ENTRIES):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Bumped on every invalidation so a load that started before an
+        # admin write cannot repopulate the cache with the old value.
+        self._generations: Dict[str, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    async def get_or_load(self, key: str, loader: Loader, ttl: Optional[float] = None) -> Any:
+        """Return the cached value for ``key``, calling ``loader`` on a miss"""
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        inflight = self._inflight.get(key)
+        if inflight:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generations.get(key, 0)
+        try:
+            self.loads += 1
+            value = await loader()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unshared failure is not logged as unhandled
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        if self._generations.get(key, 0) == generation:
+            self.set(key, value, ttl)
+        future.set_result(value)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value, e.g. to refresh a key right after an update"""
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            self._evict_one()
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+
+    def invalidate(self, key: str):
+        """Drop a key so the next read goes to MongoDB"""
+        self._generations[key] = self._generations.get(key, 0) + 1
+        if self._entries.pop(key, None) is not None:
+            self.evictions += 1
+
+    def invalidate_prefix(self, prefix: str):
+        """Drop every key starting with ``prefix``"""
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            self.invalidate(key)
+        for key in [k for k in self._inflight if k.startswith(prefix)]:
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def clear(self):
+        """Drop every key, including ones being loaded right now"""
+        self.invalidate_prefix("")
+
+    def _evict_one(self):
+        """Drop expired entries, or the one closest to expiry if none are"""
+        now = time.monotonic()
+        expired = [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]
+        if expired:
+            for key in expired:
+                self._entries.pop(key, None)
+            self.evictions += len(expired)
+            return
+        oldest = min(self._entries, key=lambda k: self._entries[k][0])
+        self._entries.pop(oldest, None)
+        self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Public singleton content: /content, /about, /pricing, /contact-page,
+# /booking-settings and /pages/{page_name}
+content_cache = AsyncTTLCache()
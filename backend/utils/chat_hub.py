@@ -0,0 +1,164 @@
+"""
+In-process pub/sub hub for live chat updates.
+
+Chat routes publish every new message to the conversation's topic and to the
+admin inbox topic; the Server-Sent Events endpoints in ``routes/chat.py``
+stream those events to subscribers, so an idle chat costs an open socket
+instead of a MongoDB query per poll.
+
+Each subscriber has a bounded queue. A subscriber that falls too far behind
+is disconnected rather than slowing down publishers; EventSource reconnects
+on its own and the client resyncs with the ``after`` cursor.
+
+The hub lives in the process: with several uvicorn workers a subscriber only
+sees events published by its own worker.
+"""
+import asyncio
+import json
+import logging
+import os
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+CHAT_STREAM_QUEUE_SIZE = int(os.environ.get('CHAT_STREAM_QUEUE_SIZE', 100))
+CHAT_STREAM_HEARTBEAT = float(os.environ.get('CHAT_STREAM_HEARTBEAT', 15))
+CHAT_STREAM_MAX_SUBSCRIBERS = int(os.environ.get('CHAT_STREAM_MAX_SUBSCRIBERS', 1000))
+
+INBOX_TOPIC = "inbox"
+
+
+def conversation_topic(conversation_id: str) -> str:
+    return f"conversation:{conversation_id}"
+
+
+class Subscription:
+    """One subscriber's bounded event queue"""
+
+    def __init__(self, hub: "ChatHub", topic: str, queue_size: int):
+        self.hub = hub
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def offer(self, event: Dict[str, Any]) -> bool:
+        """Queue an event without blocking; False if the subscriber is too slow"""
+        if self.overflowed:
+            return False
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.overflowed = True
+            return False
+
+    async def next_event(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Next event, or None if nothing arrived within ``timeout``"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class ChatHub:
+    """Topic-based fan-out to per-subscriber queues"""
+
+    def __init__(self, queue_size: int = CHAT_STREAM_QUEUE_SIZE,
+                 heartbeat_interval: float = CHAT_STREAM_HEARTBEAT,
+                 max_subscribers: int = CHAT_STREAM_MAX_SUBSCRIBERS):
+        self.queue_size = queue_size
+        self.heartbeat_interval = heartbeat_interval
+        self.max_subscribers = max_subscribers
+        self._topics: Dict[str, Set[Subscription]] = {}
+
+        self.published = 0
+        self.delivered = 0
+        self.dropped_subscribers = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subs) for subs in self._topics.values())
+
+    @property
+    def full(self) -> bool:
+        return self.subscriber_count >= self.max_subscribers
+
+    def subscribe(self, topic: str) -> Subscription:
+        """Register a subscriber; raises RuntimeError when the hub is full"""
+        if self.full:
+            raise RuntimeError("Too many live chat connections")
+        subscription = Subscription(self, topic, self.queue_size)
+        self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._topics.get(subscription.topic)
+        if not subscribers:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            self._topics.pop(subscription.topic, None)
+
+    def publish(self, topic: str, event: Dict[str, Any]) -> int:
+        """Fan an event out to a topic's subscribers; returns how many got it"""
+        self.published += 1
+        delivered = 0
+        for subscription in list(self._topics.get(topic, ())):
+            if subscription.offer(event):
+                delivered += 1
+            else:
+                # Too slow: cut it loose, the client reconnects and resyncs
+                self.unsubscribe(subscription)
+                self.dropped_subscribers += 1
+                logger.warning(f"⚠️ Dropped slow chat subscriber on {topic}")
+        self.delivered += delivered
+        return delivered
+
+    def publish_message(self, conversation_id: str, message: Dict[str, Any], **extra: Any):
+        """Publish a new chat message to its conversation and the admin inbox"""
+        event = {"type": "message", "conversationId": conversation_id, "message": message, **extra}
+        self.publish(conversation_topic(conversation_id), event)
+        self.publish(INBOX_TOPIC, event)
+
+    async def stream(self, topic: str, is_disconnected) -> AsyncIterator[str]:
+        """Server-Sent Events body for a topic.
+
+        Subscribes when the response starts sending, so a request dropped
+        before that never holds a slot. Sends a comment line as heartbeat
+        when idle so proxies keep the connection open, and ends the stream
+        when the subscriber overflowed or the client went away. If the hub
+        filled up in the meantime the stream ends at once and EventSource
+        retries.
+        """
+        try:
+            subscription = self.subscribe(topic)
+        except RuntimeError as e:
+            logger.warning(f"⚠️ Live chat stream refused on {topic}: {str(e)}")
+            return
+        try:
+            yield f"retry: 3000\nevent: ready\ndata: {json.dumps({'topic': subscription.topic})}\n\n"
+            while True:
+                event = await subscription.next_event(self.heartbeat_interval)
+                if subscription.overflowed or await is_disconnected():
+                    break
+                if event is None:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            subscription.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "topics": len(self._topics),
+            "subscribers": self.subscriber_count,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_subscribers": self.dropped_subscribers,
+        }
+
+
+chat_hub = ChatHub()
@@ -0,0 +1,245 @@
+"""
+Chat message store.
+
+Messages live in their own ``chat_messages`` collection, one document per
+message, indexed by (conversation_id, timestamp, id). The ``conversations``
+document only keeps header fields, counters and a preview of the last
+message, so it no longer grows with the history.
+
+Conversations written before the split still carry an embedded ``messages``
+array; ``ensure_migrated`` moves it into the store the first time such a
+conversation is touched (and ``scripts/maintenance/migrate_chat_messages.py``
+does it for all of them up front).
+"""
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError
+
+from database import chat_messages_collection, conversations_collection
+from utils.pagination import clamp_limit, encode_cursor, position_filter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+PREVIEW_LENGTH = 120
+
+_MESSAGE_PROJECTION = {"_id": 0, "conversation_id": 0}
+
+
+def message_preview(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Header-sized copy of a message for the conversation document"""
+    return {
+        "id": message["id"],
+        "sender": message["sender"],
+        "message": message["message"][:PREVIEW_LENGTH],
+        "timestamp": message["timestamp"],
+    }
+
+
+# ---------------- WRITES ----------------
+async def append_message(conversation_id: str, message: Dict[str, Any]):
+    """Store one message. ``message`` must have an ISO string ``timestamp``."""
+    await chat_messages_collection.insert_one({**message, "conversation_id": conversation_id})
+
+
+async def delete_messages(conversation_id: str) -> int:
+    result = await chat_messages_collection.delete_many({"conversation_id": conversation_id})
+    return result.deleted_count
+
+
+async def ensure_migrated(conversation: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Move a legacy embedded ``messages`` array into the store.
+
+    Returns the conversation without the array. Safe to call concurrently:
+    message ids are unique in the store, so a second copy is ignored.
+    """
+    if not conversation or "messages" not in conversation:
+        return conversation
+
+    messages = conversation.pop("messages") or []
+    if messages:
+        docs = [{**msg, "conversation_id": conversation["id"]} for msg in messages]
+        try:
+            await chat_messages_collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # Duplicate ids mean another request migrated them already
+            if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                raise
+
+    update: Dict[str, Any] = {"$unset": {"messages": ""}}
+    if messages:
+        last = messages[-1]
+        conversation["last_message"] = message_preview(last)
+        conversation["message_count"] = len(messages)
+        update["$set"] = {
+            "last_message": conversation["last_message"],
+            "message_count": len(messages),
+        }
+    await conversations_collection.update_one({"id": conversation["id"]}, update)
+    return conversation
+
+
+async def mark_conversation_read(conversation_id: str) -> bool:
+    """Mark the customer's messages as read without reading them first.
+
+    Returns False when the conversation does not exist. ``unread_count`` is
+    decremented by the number of messages actually flipped (never below
+    zero) instead of being reset, so a message that lands concurrently stays
+    counted.
+    """
+    # Not yet migrated: flip the embedded array in place
+    legacy = await conversations_collection.update_one(
+        {"id": conversation_id, "messages": {"$type": "array"}},
+        {"$set": {"messages.$[msg].read": True, "unread_count": 0}},
+        array_filters=[{"msg.sender": "customer", "msg.read": False}]
+    )
+    if legacy.matched_count:
+        return True
+
+    result = await chat_messages_collection.update_many(
+        {"conversation_id": conversation_id, "sender": "customer", "read": False},
+        {"$set": {"read": True}}
+    )
+    updated = await conversations_collection.update_one(
+        {"id": conversation_id},
+        [{"$set": {"unread_count": {
+            "$max": [0, {"$subtract": [{"$ifNull": ["$unread_count", 0]}, result.modified_count]}]
+        }}}]
+    )
+    return updated.matched_count > 0
+
+
+# ---------------- READS ----------------
+def _clamp(limit: Optional[int]) -> int:
+    return clamp_limit(limit, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+
+
+async def list_messages(
+    conversation_id: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+) -> Dict[str, Any]:
+    """One page of messages in chronological order.
+
+    Without cursors this is the most recent page. ``before`` pages back
+    through older history; ``after`` fetches messages newer than a cursor
+    (e.g. the last one the client has). ``next_cursor`` continues in the
+    same direction and is None when there is nothing more.
+    """
+    limit = _clamp(limit)
+    query: Dict[str, Any] = {"conversation_id": conversation_id}
+
+    if after:
+        query.update(position_filter(after, "$gt", "timestamp"))
+        sort = [("timestamp", ASCENDING), ("id", ASCENDING)]
+    else:
+        if before:
+            query.update(position_filter(before, "$lt", "timestamp"))
+        sort = [("timestamp", DESCENDING), ("id", DESCENDING)]
+
+    cursor = chat_messages_collection.find(query, _MESSAGE_PROJECTION).sort(sort).limit(limit + 1)
+    messages = await cursor.to_list(length=limit + 1)
+
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if not after:
+        messages.reverse()
+
+    next_cursor = None
+    if has_more and messages:
+        edge = messages[-1] if after else messages[0]
+        next_cursor = encode_cursor(edge["timestamp"], edge["id"])
+
+    return {"messages": messages, "next_cursor": next_cursor, "has_more": has_more}
+
+
+async def recent_messages_for(conversation_ids: Iterable[str], per_conversation: int = DEFAULT_PAGE_SIZE) -> Dict[str, List[Dict[str, Any]]]:
+    """Latest messages for many conversations in one aggregation"""
+    conversation_ids = list(conversation_ids)
+    if not conversation_ids:
+        return {}
+
+    pipeline = [
+        {"$match": {"conversation_id": {"$in": conversation_ids}}},
+        {"$sort": {"conversation_id": 1, "timestamp": 1, "id": 1}},
+        {"$group": {"_id": "$conversation_id", "messages": {"$push": "$$ROOT"}}},
+        {"$project": {"messages": {"$slice": ["$messages", -per_conversation]}}},
+    ]
+    result = {}
+    async for row in chat_messages_collection.aggregate(pipeline, allowDiskUse=True):
+        result[row["_id"]] = [
+            {k: v for k, v in msg.items() if k not in ("_id", "conversation_id")}
+            for msg in row["messages"]
+        ]
+    return result
+
+
+async def total_unread() -> int:
+    """Unread customer messages across all conversations"""
+    pipeline = [{"$group": {"_id": None, "total": {"$sum": "$unread_count"}}}]
+    rows = await conversations_collection.aggregate(pipeline).to_list(length=1)
+    return rows[0]["total"] if rows else 0
+
+
+async def list_conversation_summaries(limit: Optional[int] = None, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """Inbox page: header fields and last-message preview, newest first.
+
+    The page is a range scan of the (last_message_at, id) index; the
+    inbox-wide unread total is a separate query run alongside it. No
+    message bodies beyond the preview leave MongoDB.
+    """
+    limit = _clamp(limit)
+    match: Dict[str, Any] = position_filter(cursor, "$lt", "last_message_at") if cursor else {}
+
+    # Kept out of $facet: facet sub-pipelines cannot use indexes
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"last_message_at": -1, "id": -1}},
+        {"$limit": limit + 1},
+        {"$project": {
+            "_id": 0,
+            "id": 1,
+            "customer_name": 1,
+            "customer_email": 1,
+            "customer_phone": 1,
+            "unread_count": 1,
+            "last_message_at": 1,
+            "created_at": 1,
+            "last_message": 1,
+            "message_count": 1,
+            # Not yet migrated: derive the preview from the embedded array
+            "legacy_last_message": {"$arrayElemAt": ["$messages", -1]},
+            "legacy_message_count": {"$size": {"$ifNull": ["$messages", []]}},
+        }},
+    ]
+    page, unread = await asyncio.gather(
+        conversations_collection.aggregate(pipeline).to_list(length=limit + 1),
+        total_unread()
+    )
+
+    conversations = page[:limit]
+    has_more = len(page) > limit
+    for conv in conversations:
+        legacy_last = conv.pop("legacy_last_message", None)
+        legacy_count = conv.pop("legacy_message_count", 0)
+        if not conv.get("last_message") and legacy_last:
+            conv["last_message"] = message_preview(legacy_last)
+        if conv.get("message_count") is None:
+            conv["message_count"] = legacy_count
+
+    next_cursor = None
+    if has_more and conversations:
+        last = conversations[-1]
+        next_cursor = encode_cursor(last["last_message_at"], last["id"])
+
+    return {
+        "conversations": conversations,
+        "total_unread": unread,
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    }
@@ -0,0 +1,241 @@
+"""
+Resumable file downloads.
+
+``file_download_response`` serves a stored project file with the headers a
+download manager needs to resume: a strong ``ETag`` (the stored SHA-256),
+``Last-Modified``, ``Accept-Ranges`` and single-range ``Range`` requests,
+guarded by ``If-Range`` so a resumed download never mixes two versions.
+``If-None-Match`` answers 304. Multi-range requests are answered with the
+full file, which HTTP allows.
+
+The body avoids copying through Python where the server lets it:
+
+- the ASGI ``http.response.zerocopysend`` extension (sendfile) when offered
+- ``http.response.pathsend`` for a full file
+- otherwise the file is memory-mapped and sent in slices read in the
+  thread pool
+
+Files on a remote blob backend are streamed with a ranged read.
+"""
+import mmap
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from functools import partial
+from typing import Any, Dict, Optional, Tuple
+
+import anyio
+from fastapi import HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from utils.blob_store import attachment_header, blob_store
+from utils.uploads import UPLOAD_CHUNK_SIZE
+
+
+class RangeNotSatisfiable(Exception):
+    """The requested range starts past the end of the file"""
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """First and last byte (inclusive) of a single ``bytes=`` range.
+
+    None means the header is ignored and the full file is sent (other
+    units, multiple ranges, syntax errors).
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                raise RangeNotSatisfiable()
+            return max(0, size - suffix), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison against an ``If-None-Match`` list"""
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in header.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def _http_date(value: Any) -> Optional[str]:
+    if not value:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value, usegmt=True)
+
+
+class FileRangeResponse(Response):
+    """Sends ``length`` bytes of a local file or blob, starting at ``start``"""
+
+    def __init__(
+        self,
+        status_code: int,
+        headers: Dict[str, str],
+        start: int = 0,
+        length: int = 0,
+        path: Optional[str] = None,
+        blob_key: Optional[str] = None,
+        chunk_size: int = UPLOAD_CHUNK_SIZE,
+    ):
+        super().__init__(status_code=status_code, headers=headers, media_type="application/octet-stream")
+        self.start = start
+        self.length = length
+        self.path = path
+        self.blob_key = blob_key
+        self.chunk_size = chunk_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if not self.length or scope.get("method") == "HEAD":
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        extensions = scope.get("extensions") or {}
+        if self.path and "http.response.zerocopysend" in extensions:
+            await self._zerocopy(send)
+        elif self.path and "http.response.pathsend" in extensions and self.start == 0 and self.status_code == 200:
+            await send({"type": "http.response.pathsend", "path": self.path})
+        else:
+            # Stop reading as soon as the client goes away (a cancelled
+            # download of a large file would otherwise be read to the end)
+            async with anyio.create_task_group() as task_group:
+                async def wrap(func):
+                    await func()
+                    task_group.cancel_scope.cancel()
+
+                task_group.start_soon(wrap, partial(self._send_chunks, send))
+                await wrap(partial(self._listen_for_disconnect, receive))
+
+    async def _listen_for_disconnect(self, receive: Receive):
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+
+    async def _zerocopy(self, send: Send):
+        handle = await run_in_threadpool(open, self.path, "rb")
+        try:
+            await send({
+                "type": "http.response.zerocopysend",
+                "file": handle,
+                "offset": self.start,
+                "count": self.length,
+                "more_body": False,
+            })
+        finally:
+            await run_in_threadpool(handle.close)
+
+    async def _send_chunks(self, send: Send):
+        if self.path:
+            await self._send_mapped(send)
+        else:
+            async for chunk in blob_store.stream(self.blob_key, self.start, self.length, self.chunk_size):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+
+    async def _send_mapped(self, send: Send):
+        handle = await run_in_threadpool(open, self.path, "rb")
+        try:
+            mapped = await run_in_threadpool(mmap.mmap, handle.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                position, end = self.start, self.start + self.length
+                while position < end:
+                    # Page faults happen here, off the event loop
+                    chunk = await run_in_threadpool(mapped.__getitem__, slice(position, min(position + self.chunk_size, end)))
+                    position += len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": position < end})
+            finally:
+                mapped.close()
+        finally:
+            await run_in_threadpool(handle.close)
+
+
+async def _file_source(file_info: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], int]:
+    """(local path, remote blob key, size) of a project file; 404 when it is gone"""
+    blob_key = file_info.get("blob_key")
+    local_path = blob_store.local_path(blob_key) if blob_key else file_info.get("file_path")
+    if local_path is None:
+        blob = await blob_store.info(blob_key)
+        if blob:
+            return None, blob_key, blob.get("size", file_info.get("file_size") or 0)
+    else:
+        try:
+            stat = await run_in_threadpool(os.stat, local_path)
+            return str(local_path), None, stat.st_size
+        except OSError:
+            pass
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="File not found on server"
+    )
+
+
+async def file_download_response(request: Request, file_info: Dict[str, Any]) -> Response:
+    """Download response for a project file entry, honoring conditional and range headers"""
+    path, blob_key, size = await _file_source(file_info)
+
+    # Entries never change content, so the id is a valid fallback for files
+    # uploaded before checksums were stored
+    etag = f'"{file_info.get("sha256") or file_info["id"]}"'
+    last_modified = _http_date(file_info.get("uploaded_at"))
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": attachment_header(file_info["filename"]),
+    }
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # If-Range: resume only when the client still has this exact file
+    if range_header and (not if_range or if_range.strip() in (etag, last_modified)):
+        try:
+            byte_range = parse_range(range_header, size)
+        except RangeNotSatisfiable:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, headers=headers)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return FileRangeResponse(status.HTTP_200_OK, headers, 0, size, path, blob_key)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return FileRangeResponse(status.HTTP_206_PARTIAL_CONTENT, headers, start, end - start + 1, path, blob_key)
@@ -2,15 +2,20 @@ import os
 import requests
 from typing import Optional
 
+from utils.jobs import job_queue
+
 BREVO_API_KEY = os.environ.get('BREVO_API_KEY', '')
 BREVO_API_URL = "https://api.brevo.com/v3/smtp/email"
+BREVO_TIMEOUT = float(os.environ.get('BREVO_TIMEOUT', 10))
 ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@promptforgedev.com')
 BREVO_SENDER_EMAIL = os.environ.get('BREVO_SENDER_EMAIL', 'noreply@promptforgedev.com')
 BREVO_SENDER_NAME = os.environ.get('BREVO_SENDER_NAME', 'Prompt Forge')
 
-def send_contact_email(name: str, email: str, message: str, phone: Optional[str] = None) -> bool:
-    """Send contact form notification email via Brevo"""
-    
+def deliver_email(email_data: dict) -> bool:
+    """POST an email to Brevo (blocking). Raises on HTTP errors so callers can retry.
+
+    Returns False without sending when BREVO_API_KEY is not configured.
+    """
     if not BREVO_API_KEY:
         print("Warning: BREVO_API_KEY not configured. Email not sent.")
         return False
@@ -21,6 +26,17 @@ def send_contact_email(name: str, email: str, message: str, phone: Optional[str]
         "content-type": "application/json"
     }
     
+    response = requests.post(BREVO_API_URL, json=email_data, headers=headers, timeout=BREVO_TIMEOUT)
+    response.raise_for_status()
+    return True
+
+async def queue_email(email_data: dict, idempotency_key: Optional[str] = None) -> dict:
+    """Send an email from the background job queue; returns the job"""
+    return await job_queue.enqueue("send_email", {"email": email_data}, idempotency_key=idempotency_key)
+
+def send_contact_email(name: str, email: str, message: str, phone: Optional[str] = None) -> bool:
+    """Send contact form notification email via Brevo"""
+    
     phone_text = f"<p><strong>Phone:</strong> {phone}</p>" if phone else ""
     
     email_data = {
@@ -54,8 +70,8 @@ def send_contact_email(name: str, email: str, message: str, phone: Optional[str]
     }
     
     try:
-        response = requests.post(BREVO_API_URL, json=email_data, headers=headers)
-        response.raise_for_status()
+        if not deliver_email(email_data):
+            return False
         print(f"Email sent successfully to {ADMIN_EMAIL}")
         return True
     except requests.exceptions.RequestException as e:
@@ -65,16 +81,6 @@ def send_contact_email(name: str, email: str, message: str, phone: Optional[str]
 def send_chat_notification(customer_name: str, customer_email: str, message: str) -> bool:
     """Send notification when customer sends a chat message"""
     
-    if not BREVO_API_KEY:
-        print("Warning: BREVO_API_KEY not configured. Email not sent.")
-        return False
-    
-    headers = {
-        "accept": "application/json",
-        "api-key": BREVO_API_KEY,
-        "content-type": "application/json"
-    }
-    
     email_data = {
         "sender": {
             "name": BREVO_SENDER_NAME,
@@ -101,27 +107,16 @@ def send_chat_notification(customer_name: str, customer_email: str, message: str
     }
     
     try:
-        response = requests.post(BREVO_API_URL, json=email_data, headers=headers)
-        response.raise_for_status()
+        if not deliver_email(email_data):
+            return False
         print(f"Chat notification sent to {ADMIN_EMAIL}")
         return True
     except requests.exceptions.RequestException as e:
         print(f"Failed to send chat notification: {str(e)}")
         return False
 
-async def send_booking_notification(booking_data: dict) -> bool:
-    """Send notification when a new booking is created"""
-    
-    if not BREVO_API_KEY:
-        print("Warning: BREVO_API_KEY not configured. Email not sent.")
-        return False
-    
-    headers = {
-        "accept": "application/json",
-        "api-key": BREVO_API_KEY,
-        "content-type": "application/json"
-    }
-    
+def build_booking_notification(booking_data: dict) -> dict:
+    """Notification email for a new booking"""
     message_text = f"<p><strong>Message:</strong> {booking_data.get('message')}</p>" if booking_data.get('message') else ""
     
     email_data = {
@@ -159,11 +154,11 @@ async def send_booking_notification(booking_data: dict) -> bool:
         }
     }
     
-    try:
-        response = requests.post(BREVO_API_URL, json=email_data, headers=headers)
-        response.raise_for_status()
-        print(f"Booking notification sent to {ADMIN_EMAIL}")
-        return True
-    except requests.exceptions.RequestException as e:
-        print(f"Failed to send booking notification: {str(e)}")
-        return False
+    return email_data
+
+async def send_booking_notification(booking_data: dict) -> dict:
+    """Queue the notification for a new booking (sent by the job workers); returns the job"""
+    return await queue_email(
+        build_booking_notification(booking_data),
+        idempotency_key=f"booking-notification:{booking_data['id']}"
+    )
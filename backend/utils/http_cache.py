@@ -0,0 +1,153 @@
+"""
+HTTP conditional GET support (ETag / Last-Modified / 304).
+
+Public read routes take a ``ConditionalGet`` dependency, fetch their documents
+and ask it whether the client's cached copy is still current. The validator is
+derived from each document's ``id`` and ``updated_at`` (or a hash of the whole
+document when it has no ``updated_at``), so a 304 is answered before any
+response serialization happens.
+
+Lists get an ETag only. Their newest ``updated_at`` does not move when an
+item is deleted or unpublished, so a ``Last-Modified`` would let an
+``If-Modified-Since`` revalidation keep a stale list; the ETag covers the
+ids, so it changes.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Iterable, Optional, Union
+
+from fastapi import Request, Response
+
+
+class CachePolicy:
+    """Cache-Control directives for a route"""
+
+    def __init__(self, max_age: int = 0, s_maxage: Optional[int] = None,
+                 stale_while_revalidate: Optional[int] = None, private: bool = False):
+        self.max_age = max_age
+        self.s_maxage = s_maxage
+        self.stale_while_revalidate = stale_while_revalidate
+        self.private = private
+
+    def header(self) -> str:
+        directives = ["private" if self.private else "public", f"max-age={self.max_age}"]
+        if self.s_maxage is not None and not self.private:
+            directives.append(f"s-maxage={self.s_maxage}")
+        if self.stale_while_revalidate is not None:
+            directives.append(f"stale-while-revalidate={self.stale_while_revalidate}")
+        return ", ".join(directives)
+
+
+# Browsers revalidate after a minute; the CDN keeps a copy a little longer
+PUBLIC_LIST_POLICY = CachePolicy(max_age=60, s_maxage=300, stale_while_revalidate=60)
+PUBLIC_DETAIL_POLICY = CachePolicy(max_age=300, s_maxage=900, stale_while_revalidate=300)
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        # Timestamps are stored as naive UTC
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def documents_etag(documents: Union[Dict[str, Any], Iterable[Dict[str, Any]]]) -> str:
+    """Weak ETag for one document or a list of documents"""
+    if isinstance(documents, dict):
+        documents = [documents]
+
+    digest = hashlib.sha1()
+    for doc in documents:
+        if doc.get("updated_at") is not None:
+            digest.update(f"{doc.get('id')}|{doc['updated_at']}\n".encode("utf-8"))
+        else:
+            body = {k: v for k, v in doc.items() if k != "_id"}
+            digest.update(json.dumps(body, sort_keys=True, default=str).encode("utf-8"))
+            digest.update(b"\n")
+    return f'W/"{digest.hexdigest()}"'
+
+
+def documents_last_modified(documents: Union[Dict[str, Any], Iterable[Dict[str, Any]]]) -> Optional[datetime]:
+    """Newest ``updated_at`` across the documents, if every one has it"""
+    if isinstance(documents, dict):
+        documents = [documents]
+
+    newest = None
+    for doc in documents:
+        timestamp = _parse_timestamp(doc.get("updated_at"))
+        if timestamp is None:
+            return None
+        if newest is None or timestamp > newest:
+            newest = timestamp
+    return newest
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # Weak comparison: W/"x" and "x" are equivalent for If-None-Match
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ConditionalGet:
+    """Per-request helper that sets validators and answers 304s"""
+
+    def __init__(self, request: Request, response: Response, policy: CachePolicy):
+        self.request = request
+        self.response = response
+        self.policy = policy
+        self.headers: Dict[str, str] = {}
+
+    def is_fresh(self, documents) -> bool:
+        """Set ETag/Last-Modified/Cache-Control; True if the client copy is current
+
+        ``Last-Modified`` is only sent for a single document (a dict).
+        """
+        etag = documents_etag(documents)
+        self.headers = {"ETag": etag, "Cache-Control": self.policy.header()}
+
+        last_modified = documents_last_modified(documents) if isinstance(documents, dict) else None
+        if last_modified is not None:
+            self.headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+        self.response.headers.update(self.headers)
+
+        if_none_match = self.request.headers.get("if-none-match")
+        if if_none_match is not None:
+            return _etag_matches(if_none_match, etag)
+
+        if_modified_since = self.request.headers.get("if-modified-since")
+        if if_modified_since and last_modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return last_modified.replace(microsecond=0) <= since
+        return False
+
+    def not_modified(self) -> Response:
+        return Response(status_code=304, headers=self.headers)
+
+
+def conditional_get(policy: CachePolicy = PUBLIC_LIST_POLICY):
+    """Dependency factory: ``cache: ConditionalGet = Depends(conditional_get(...))``"""
+    def dependency(request: Request, response: Response) -> ConditionalGet:
+        return ConditionalGet(request, response, policy)
+    return dependency
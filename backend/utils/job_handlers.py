@@ -0,0 +1,64 @@
+"""
+Handlers for the background job queue (``utils/jobs.py``).
+
+Importing this module registers them; the app does so before starting the
+workers. Each handler raises to have its job retried.
+"""
+import logging
+import os
+from typing import Any, Dict
+
+from starlette.concurrency import run_in_threadpool
+
+from utils.blob_store import blob_store
+from utils.email_service import deliver_email
+from utils.jobs import job_queue
+
+logger = logging.getLogger(__name__)
+
+# Blob references a project file entry can hold
+PROJECT_FILE_BLOB_FIELDS = ("blob_key", "thumbnail_key", "preview_key")
+
+
+@job_queue.handler("send_email")
+async def send_email(payload: Dict[str, Any]):
+    """Deliver a Brevo email built by ``utils/email_service.py``"""
+    if await run_in_threadpool(deliver_email, payload["email"]):
+        logger.info(f"📧 Email sent: {payload['email'].get('subject')}")
+
+
+@job_queue.handler("release_blob")
+async def release_blob(payload: Dict[str, Any]):
+    # ``reference`` makes a re-run (expired lease, dead worker) a no-op
+    await blob_store.release(payload["key"], release_id=payload.get("reference"))
+
+
+@job_queue.handler("remove_file")
+async def remove_file(payload: Dict[str, Any]):
+    """Remove a file stored before the blob store existed"""
+    try:
+        await run_in_threadpool(os.remove, payload["path"])
+    except FileNotFoundError:
+        pass
+
+
+async def queue_project_file_cleanup(project_id: str, file_info: Dict[str, Any]):
+    """Queue removal of a deleted project file's content and previews.
+
+    One job per blob reference, keyed by file and field, so a reference is
+    released once even if the cleanup is queued twice.
+    """
+    for field in PROJECT_FILE_BLOB_FIELDS:
+        if file_info.get(field):
+            reference = f"release-blob:{project_id}:{file_info['id']}:{field}"
+            await job_queue.enqueue(
+                "release_blob",
+                {"key": file_info[field], "reference": reference},
+                idempotency_key=reference
+            )
+    if not file_info.get("blob_key") and file_info.get("file_path"):
+        await job_queue.enqueue(
+            "remove_file",
+            {"path": file_info["file_path"]},
+            idempotency_key=f"remove-file:{project_id}:{file_info['id']}"
+        )
@@ -0,0 +1,307 @@
+"""
+Durable background job queue.
+
+Request handlers call ``job_queue.enqueue(type, payload)`` for slow side
+effects (emails, file cleanup) and return straight away. Jobs are documents
+in the ``jobs`` collection, so they survive restarts, and a pool of worker
+tasks in the app process runs them through the handler registered for their
+type (see ``utils/job_handlers.py``).
+
+- Claiming is an atomic ``find_one_and_update`` that also sets a lease; a
+  job whose worker died is claimed again once the lease runs out. A worker
+  only records the outcome while its lease is the current one, so a slow
+  worker cannot overwrite the result of a newer claim.
+- A failed job is retried with exponential backoff (plus jitter) until it
+  has used ``max_attempts``, then it is parked as ``dead`` for an admin to
+  inspect and retry (``/admin/jobs/dead``).
+- ``idempotency_key`` is unique: enqueueing the same key again returns the
+  existing job instead of adding a second one.
+- Finished jobs are removed by a TTL index after ``JOB_RETENTION_DAYS``,
+  after which their idempotency keys can be used again.
+
+Handlers should be idempotent: a job can run again if its worker dies after
+the side effect but before the job is marked done.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from database import jobs_collection
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 4))
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 5.0))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 5))
+JOB_BACKOFF_BASE = float(os.environ.get('JOB_BACKOFF_BASE', 10.0))
+JOB_BACKOFF_MAX = float(os.environ.get('JOB_BACKOFF_MAX', 3600.0))
+JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', 300))
+JOB_RETENTION_DAYS = int(os.environ.get('JOB_RETENTION_DAYS', 7))
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def backoff_delay(attempts: int, base: float = JOB_BACKOFF_BASE, maximum: float = JOB_BACKOFF_MAX) -> float:
+    """Seconds before retry number ``attempts`` (1-based), doubled each time with ±20% jitter"""
+    delay = min(base * (2 ** (attempts - 1)), maximum)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class JobQueue:
+    """Mongo-backed job queue plus the in-process worker pool that drains it"""
+
+    def __init__(
+        self,
+        collection,
+        workers: int = JOB_WORKERS,
+        poll_interval: float = JOB_POLL_INTERVAL,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        lease_seconds: int = JOB_LEASE_SECONDS,
+    ):
+        self.collection = collection
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+
+        self._handlers: Dict[str, Handler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._closing = False
+
+        self.enqueued = 0
+        self.deduplicated = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.dead = 0
+
+    # ---------------- HANDLERS ----------------
+    def handler(self, job_type: str):
+        """Decorator registering the coroutine that runs jobs of ``job_type``"""
+        def register(func: Handler) -> Handler:
+            self._handlers[job_type] = func
+            return func
+        return register
+
+    # ---------------- LIFECYCLE ----------------
+    def start(self):
+        """Start the workers on the running event loop"""
+        if self._tasks:
+            return
+        self._closing = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"job-worker-{n}")
+            for n in range(self.workers)
+        ]
+        logger.info(f"⚙️ Job workers started ({self.workers}, handlers: {', '.join(sorted(self._handlers))})")
+
+    async def stop(self, timeout: float = 10.0):
+        """Let running jobs finish (up to ``timeout``), then stop the workers"""
+        self._closing = True
+        if not self._tasks:
+            return
+        self._wakeup.set()
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            # Interrupted jobs are claimed again when their lease runs out
+            task.cancel()
+        self._tasks = []
+        logger.info("⚙️ Job workers stopped")
+
+    # ---------------- JOBS ----------------
+    async def enqueue(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+        delay: float = 0,
+        max_attempts: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Add a job; with an ``idempotency_key`` already queued, return that job instead"""
+        now = datetime.utcnow()
+        job = {
+            "id": str(uuid.uuid4()),
+            "type": job_type,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "max_attempts": max_attempts or self.max_attempts,
+            "run_at": (now + timedelta(seconds=delay)).isoformat(),
+            "last_error": None,
+            "created_at": now.isoformat(),
+            "updated_at": now.isoformat(),
+        }
+        if idempotency_key:
+            job["idempotency_key"] = idempotency_key
+        try:
+            await self.collection.insert_one(job)
+        except DuplicateKeyError:
+            self.deduplicated += 1
+            return await self.collection.find_one({"idempotency_key": idempotency_key}, {"_id": 0})
+        job.pop("_id", None)
+        self.enqueued += 1
+        if self._wakeup:
+            self._wakeup.set()
+        return job
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {
+                "type": {"$in": list(self._handlers)},
+                "$or": [
+                    {"status": "pending", "run_at": {"$lte": now.isoformat()}},
+                    # Worker died mid-job
+                    {"status": "running", "lease_until": {"$lt": now.isoformat()}},
+                ],
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "started_at": now.isoformat(),
+                    "lease_until": (now + timedelta(seconds=self.lease_seconds)).isoformat(),
+                    "updated_at": now.isoformat(),
+                },
+                "$inc": {"attempts": 1},
+            },
+            projection={"_id": 0},
+            sort=[("run_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _run(self):
+        while not self._closing:
+            try:
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Job claim failed: {str(e)}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self.run_job(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Recording the outcome failed (e.g. a failover); the job
+                # is claimed again when its lease runs out
+                logger.warning(f"⚠️ Job {job['type']} {job['id']} outcome not recorded: {str(e)}")
+
+    async def run_job(self, job: Dict[str, Any]):
+        """Run one claimed job and record the outcome"""
+        started = time.perf_counter()
+        try:
+            await self._handlers[job["type"]](job["payload"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self._failed(job, f"{type(e).__name__}: {str(e)}")
+            return
+
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            self._lease_filter(job),
+            {
+                "$set": {
+                    "status": "done",
+                    "finished_at": now.isoformat(),
+                    "updated_at": now.isoformat(),
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                    "expires_at": now + timedelta(days=JOB_RETENTION_DAYS),
+                },
+                "$unset": {"lease_until": ""},
+            }
+        )
+        if result.matched_count:
+            self.succeeded += 1
+        else:
+            self._lease_lost(job)
+
+    def _lease_filter(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Matches the job only while this worker's claim is still current"""
+        return {"id": job["id"], "status": "running", "lease_until": job["lease_until"]}
+
+    def _lease_lost(self, job: Dict[str, Any]):
+        # The lease ran out and another worker claimed the job; its outcome wins
+        logger.warning(f"⚠️ Job {job['type']} {job['id']} lease expired before it finished, outcome discarded")
+
+    async def _failed(self, job: Dict[str, Any], error: str):
+        now = datetime.utcnow()
+        update: Dict[str, Any] = {"last_error": error, "updated_at": now.isoformat()}
+        dead = job["attempts"] >= job.get("max_attempts", self.max_attempts)
+        if dead:
+            update.update(status="dead", finished_at=now.isoformat())
+        else:
+            delay = backoff_delay(job["attempts"])
+            update.update(status="pending", run_at=(now + timedelta(seconds=delay)).isoformat())
+        result = await self.collection.update_one(self._lease_filter(job), {"$set": update, "$unset": {"lease_until": ""}})
+        if not result.matched_count:
+            self._lease_lost(job)
+        elif dead:
+            self.dead += 1
+            logger.error(f"❌ Job {job['type']} {job['id']} moved to dead letters: {error}")
+        else:
+            self.retried += 1
+            logger.warning(f"⚠️ Job {job['type']} {job['id']} failed (attempt {job['attempts']}), retrying in {delay:.0f}s: {error}")
+
+    # ---------------- DEAD LETTERS ----------------
+    async def dead_letters(self, job_type: Optional[str] = None, limit: int = 50, skip: int = 0) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {"status": "dead"}
+        if job_type:
+            query["type"] = job_type
+        cursor = self.collection.find(query, {"_id": 0}).sort("updated_at", -1).skip(skip).limit(limit)
+        return await cursor.to_list(length=limit)
+
+    async def retry(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Put a dead job back in the queue with a fresh set of attempts"""
+        now = datetime.utcnow().isoformat()
+        return await self.collection.find_one_and_update(
+            {"id": job_id, "status": "dead"},
+            {"$set": {"status": "pending", "attempts": 0, "run_at": now, "updated_at": now}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def discard(self, job_id: str) -> bool:
+        result = await self.collection.delete_one({"id": job_id, "status": "dead"})
+        return result.deleted_count > 0
+
+    async def stats(self) -> Dict[str, Any]:
+        by_status = await self.collection.aggregate([
+            {"$group": {"_id": {"type": "$type", "status": "$status"}, "count": {"$sum": 1}}}
+        ]).to_list(length=None)
+        jobs: Dict[str, Dict[str, int]] = {}
+        for row in by_status:
+            jobs.setdefault(row["_id"]["type"], {})[row["_id"]["status"]] = row["count"]
+        return {
+            "workers": self.workers,
+            "running": len(self._tasks),
+            "handlers": sorted(self._handlers),
+            "jobs": jobs,
+            "enqueued": self.enqueued,
+            "deduplicated": self.deduplicated,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "dead": self.dead,
+        }
+
+
+job_queue = JobQueue(jobs_collection)
@@ -0,0 +1,37 @@
+"""
+Opaque keyset cursors shared by the paginated stores.
+
+A cursor encodes the (sort value, id) position of the last item returned, so
+the next page is an indexed range query instead of a growing skip.
+"""
+import base64
+from typing import Any, Dict, Optional, Tuple
+
+
+def encode_cursor(sort_value: str, doc_id: str) -> str:
+    """Opaque cursor pointing at a (sort value, id) position"""
+    raw = f"{sort_value}|{doc_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        sort_value, doc_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    return sort_value, doc_id
+
+
+def position_filter(cursor: str, op: str, field: str) -> Dict[str, Any]:
+    """Match documents before (``$lt``) or after (``$gt``) a cursor position"""
+    sort_value, doc_id = decode_cursor(cursor)
+    return {"$or": [
+        {field: {op: sort_value}},
+        {field: sort_value, "id": {op: doc_id}},
+    ]}
+
+
+def clamp_limit(limit: Optional[int], default: int, maximum: int) -> int:
+    if not limit or limit < 1:
+        return default
+    return min(limit, maximum)
@@ -0,0 +1,399 @@
+"""
+Background thumbnail and preview generation for project files.
+
+Uploading an image or a PDF to a project records a job in the
+``preview_jobs`` collection. A small pool of worker tasks claims pending
+jobs with an atomic ``find_one_and_update``, renders a thumbnail and a
+larger preview (the first page, for PDFs; PDFium is not thread-safe, so PDF
+renders run one at a time) in the thread pool, stores both
+in the blob store and records their keys on the file entry; the serializer
+turns those into client or admin URLs. List views can then show previews of
+a few kilobytes instead of downloading originals.
+
+The pool size bounds how many renders run at once. Jobs survive restarts:
+jobs left ``running`` by a crashed worker are put back after
+``PREVIEW_JOB_TIMEOUT``, and failed renders are retried up to
+``PREVIEW_MAX_ATTEMPTS`` times (a job still running when its last attempt
+times out is failed). A worker only records its result while it still
+holds the claim, so a slow render that was reclaimed cannot overwrite the
+newer attempt.
+
+Previews keep this pool instead of running as ``utils/jobs.py`` handlers.
+Renders are CPU-bound work in the thread pool and get their own
+concurrency cap (``PREVIEW_WORKERS``), so a burst of uploads cannot hold
+every job worker while emails and file cleanup wait. Jobs are also
+discarded by project or file when those are deleted, and stats are kept
+per status.
+
+Rendering uses Pillow and pypdfium2 (both in requirements.txt). An
+environment without them still starts: its jobs are marked ``skipped`` and
+files simply have no preview.
+"""
+import asyncio
+import io
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, status
+from fastapi.responses import FileResponse, StreamingResponse
+from pymongo import ReturnDocument
+from starlette.concurrency import run_in_threadpool
+
+from database import client_projects_collection, preview_jobs_collection
+from utils.blob_store import blob_store
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # in requirements; without it previews are skipped
+    Image = None
+
+try:
+    import pypdfium2
+except ImportError:  # in requirements; without it PDF previews are skipped
+    pypdfium2 = None
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_WORKERS = int(os.environ.get('PREVIEW_WORKERS', 2))
+PREVIEW_POLL_INTERVAL = float(os.environ.get('PREVIEW_POLL_INTERVAL', 10.0))
+PREVIEW_MAX_ATTEMPTS = int(os.environ.get('PREVIEW_MAX_ATTEMPTS', 3))
+PREVIEW_JOB_TIMEOUT = int(os.environ.get('PREVIEW_JOB_TIMEOUT', 300))
+PREVIEW_THUMBNAIL_SIZE = int(os.environ.get('PREVIEW_THUMBNAIL_SIZE', 256))
+PREVIEW_IMAGE_SIZE = int(os.environ.get('PREVIEW_IMAGE_SIZE', 1024))
+PREVIEW_JPEG_QUALITY = int(os.environ.get('PREVIEW_JPEG_QUALITY', 80))
+
+PREVIEW_MEDIA_TYPE = "image/jpeg"
+PREVIEW_KINDS = ("thumbnail", "preview")
+
+# PDFium is not thread-safe, not even across documents: one PDF render at a
+# time, whatever the number of preview workers
+_pdfium_lock = threading.Lock()
+
+# Vector and icon formats Pillow cannot (or should not) rasterize
+UNSUPPORTED_IMAGE_TYPES = {"image/svg+xml", "image/x-icon", "image/vnd.microsoft.icon"}
+
+
+def can_preview(content_type: Optional[str]) -> bool:
+    """Whether previews are generated for a MIME type"""
+    if not content_type:
+        return False
+    if content_type == "application/pdf":
+        return True
+    return content_type.startswith("image/") and content_type not in UNSUPPORTED_IMAGE_TYPES
+
+
+def missing_renderer(content_type: str) -> Optional[str]:
+    """Name of the library a render needs but is not installed, if any"""
+    if Image is None:
+        return "Pillow"
+    if content_type == "application/pdf" and pypdfium2 is None:
+        return "pypdfium2"
+    return None
+
+
+# ---------------- RENDERING (thread pool) ----------------
+def _open_image(path: str, content_type: str):
+    if content_type == "application/pdf":
+        with _pdfium_lock:
+            pdf = pypdfium2.PdfDocument(path)
+            try:
+                page = pdf[0]
+                width, height = page.get_size()
+                bitmap = page.render(scale=PREVIEW_IMAGE_SIZE / max(width, height, 1))
+                # Copy out of PDFium's buffer before the document is closed
+                return bitmap.to_pil().copy()
+            finally:
+                pdf.close()
+
+    image = Image.open(path)
+    # JPEG can decode straight at a reduced scale
+    image.draft("RGB", (PREVIEW_IMAGE_SIZE, PREVIEW_IMAGE_SIZE))
+    return ImageOps.exif_transpose(image)
+
+
+def _encode(image) -> bytes:
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=PREVIEW_JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def render_previews(path: str, content_type: str) -> Dict[str, bytes]:
+    """JPEG preview and thumbnail of an image or the first page of a PDF"""
+    image = _open_image(path, content_type)
+    renders = {}
+    # Largest first, each shrinks the image in place
+    for kind, size in (("preview", PREVIEW_IMAGE_SIZE), ("thumbnail", PREVIEW_THUMBNAIL_SIZE)):
+        image.thumbnail((size, size))
+        renders[kind] = _encode(image)
+    return renders
+
+
+# ---------------- WORKER POOL ----------------
+class PreviewWorkerPool:
+    """Fixed number of worker tasks draining the persistent job collection"""
+
+    def __init__(
+        self,
+        collection,
+        workers: int = PREVIEW_WORKERS,
+        poll_interval: float = PREVIEW_POLL_INTERVAL,
+        max_attempts: int = PREVIEW_MAX_ATTEMPTS,
+        job_timeout: int = PREVIEW_JOB_TIMEOUT,
+    ):
+        self.collection = collection
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.job_timeout = job_timeout
+
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._closing = False
+
+        self.enqueued = 0
+        self.generated = 0
+        self.skipped = 0
+        self.retried = 0
+        self.failed = 0
+        self.total_render_ms = 0.0
+
+    # ---------------- LIFECYCLE ----------------
+    def start(self):
+        """Start the workers on the running event loop"""
+        if self._tasks:
+            return
+        self._closing = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run(), name=f"preview-worker-{n}")
+            for n in range(self.workers)
+        ]
+        logger.info(f"🖼️ Preview workers started ({self.workers})")
+
+    async def stop(self, timeout: float = 10.0):
+        """Let running renders finish (up to ``timeout``), then stop the workers"""
+        self._closing = True
+        if not self._tasks:
+            return
+        self._wakeup.set()
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            # Interrupted jobs stay "running" and are picked up again after a restart
+            task.cancel()
+        self._tasks = []
+        logger.info("🖼️ Preview workers stopped")
+
+    # ---------------- JOBS ----------------
+    async def enqueue(self, project_id: str, file_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Record a preview job for a newly uploaded file, if its type has previews"""
+        if not file_info.get("blob_key") or not can_preview(file_info.get("file_type")):
+            return None
+        now = datetime.utcnow().isoformat()
+        job = {
+            "id": str(uuid.uuid4()),
+            "project_id": project_id,
+            "file_id": file_info["id"],
+            "blob_key": file_info["blob_key"],
+            "content_type": file_info["file_type"],
+            "status": "pending",
+            "attempts": 0,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        await self.collection.insert_one(job)
+        job.pop("_id", None)
+        self.enqueued += 1
+        if self._wakeup:
+            self._wakeup.set()
+        return job
+
+    async def discard(self, project_id: str, file_id: Optional[str] = None):
+        """Drop queued jobs of a deleted file (or every file of a deleted project)"""
+        query: Dict[str, Any] = {"project_id": project_id, "status": "pending"}
+        if file_id:
+            query["file_id"] = file_id
+        await self.collection.delete_many(query)
+
+    async def recover_stale(self) -> int:
+        """Put jobs left running by a crashed worker back in the queue.
+
+        A job that already used all its attempts is failed instead, so a file
+        that crashes the worker every time is not retried forever. Returns how
+        many jobs were recovered either way.
+        """
+        now = datetime.utcnow().isoformat()
+        cutoff = (datetime.utcnow() - timedelta(seconds=self.job_timeout)).isoformat()
+        stale = {"status": "running", "started_at": {"$lt": cutoff}}
+        exhausted = await self.collection.update_many(
+            {**stale, "attempts": {"$gte": self.max_attempts}},
+            {"$set": {"status": "failed", "error": "Worker stopped during render", "updated_at": now, "finished_at": now}}
+        )
+        if exhausted.modified_count:
+            self.failed += exhausted.modified_count
+            logger.warning(f"❌ {exhausted.modified_count} preview job(s) failed after {self.max_attempts} attempts")
+        requeued = await self.collection.update_many(
+            stale,
+            {"$set": {"status": "pending", "updated_at": now}}
+        )
+        return exhausted.modified_count + requeued.modified_count
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow().isoformat()
+        return await self.collection.find_one_and_update(
+            {"status": "pending"},
+            {"$set": {"status": "running", "started_at": now, "updated_at": now}, "$inc": {"attempts": 1}},
+            projection={"_id": 0},
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _finish(self, job: Dict[str, Any], status_value: str, **fields) -> bool:
+        """Record the outcome of a claimed job; False if the claim was lost.
+
+        A job that ran past ``job_timeout`` may have been put back and claimed
+        again by another worker, which owns it from then on.
+        """
+        now = datetime.utcnow().isoformat()
+        result = await self.collection.update_one(
+            {"id": job["id"], "status": "running", "started_at": job["started_at"]},
+            {"$set": {"status": status_value, "updated_at": now, "finished_at": now, **fields}}
+        )
+        return result.modified_count > 0
+
+    async def _run(self):
+        last_recovery = 0.0
+        while not self._closing:
+            try:
+                if time.monotonic() - last_recovery > self.poll_interval:
+                    last_recovery = time.monotonic()
+                    await self.recover_stale()
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Preview job claim failed: {str(e)}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self.process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep the worker alive; the job is reclaimed as stale
+                logger.warning(f"⚠️ Preview job {job['id']} failed: {str(e)}")
+
+    async def process(self, job: Dict[str, Any]):
+        """Render, store and attach the previews of one claimed job"""
+        missing = missing_renderer(job["content_type"])
+        if missing:
+            self.skipped += 1
+            await self._finish(job, "skipped", error=f"{missing} is not installed")
+            return
+
+        started = time.perf_counter()
+        try:
+            async with blob_store.local_copy(job["blob_key"]) as path:
+                renders = await run_in_threadpool(render_previews, str(path), job["content_type"])
+        except Exception as e:
+            if job["attempts"] < self.max_attempts:
+                self.retried += 1
+                await self._finish(job, "pending", error=str(e))
+            else:
+                self.failed += 1
+                await self._finish(job, "failed", error=str(e))
+                logger.warning(f"❌ Preview for file {job['file_id']} failed: {str(e)}")
+            return
+        render_ms = (time.perf_counter() - started) * 1000
+
+        fields = {}
+        keys = []
+        for kind in PREVIEW_KINDS:
+            stored = await blob_store.store_bytes(renders[kind], PREVIEW_MEDIA_TYPE)
+            keys.append(stored.key)
+            fields[f"files.$.{kind}_key"] = stored.key
+
+        # Only the worker still holding the claim attaches its renders
+        claimed = await self._finish(
+            job, "done", error=None, render_ms=round(render_ms, 2),
+            thumbnail_key=keys[0], preview_key=keys[1]
+        )
+        if not claimed:
+            for key in keys:
+                await blob_store.release(key)
+            logger.warning(f"⚠️ Preview job {job['id']} was reclaimed while rendering, result dropped")
+            return
+
+        result = await client_projects_collection.update_one(
+            {"id": job["project_id"], "files.id": job["file_id"]},
+            {"$set": fields}
+        )
+        if result.matched_count == 0:
+            # The file was deleted while rendering
+            for key in keys:
+                await blob_store.release(key)
+            self.skipped += 1
+            await self.collection.update_one(
+                {"id": job["id"]},
+                {"$set": {"status": "skipped", "error": "File was deleted", "thumbnail_key": None, "preview_key": None}}
+            )
+            return
+
+        self.generated += 1
+        self.total_render_ms += render_ms
+
+    async def stats(self) -> Dict[str, Any]:
+        by_status = await self.collection.aggregate([
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ]).to_list(length=None)
+        return {
+            "workers": self.workers,
+            "running": len(self._tasks),
+            "jobs": {row["_id"]: row["count"] for row in by_status},
+            "enqueued": self.enqueued,
+            "generated": self.generated,
+            "skipped": self.skipped,
+            "retried": self.retried,
+            "failed": self.failed,
+            "avg_render_ms": round(self.total_render_ms / self.generated, 2) if self.generated else 0.0,
+            "renderers": {"pillow": Image is not None, "pypdfium2": pypdfium2 is not None},
+        }
+
+
+preview_workers = PreviewWorkerPool(preview_jobs_collection)
+
+
+def preview_response(file_info: Dict[str, Any], kind: str):
+    """Serve the thumbnail or preview of a project file entry"""
+    key = file_info.get(f"{kind}_key")
+    if not key:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Preview not available"
+        )
+    # A file's preview never changes once generated
+    headers = {"ETag": f'"{key}"', "Cache-Control": "private, max-age=86400"}
+    local_path = blob_store.local_path(key)
+    if local_path is not None:
+        return FileResponse(path=local_path, media_type=PREVIEW_MEDIA_TYPE, headers=headers)
+    return StreamingResponse(blob_store.stream(key), media_type=PREVIEW_MEDIA_TYPE, headers=headers)
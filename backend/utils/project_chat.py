@@ -0,0 +1,36 @@
+"""
+Read-marking for client project chat.
+
+Both the admin and the client side mark the other party's messages as read
+when they open the chat. This is a single server-side ``update_many`` on the
+chat collection, so nothing is rewritten from a stale copy and messages that
+arrive in the meantime are not lost.
+"""
+from typing import Any, Dict, List, Optional
+
+from database import client_projects_collection, project_chat_collection
+from utils.project_store import LEGACY_PROJECTION, ensure_migrated, list_children
+
+
+async def mark_project_chat_read(
+    query: Dict[str, Any],
+    sender_type: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """Mark every unread message from ``sender_type`` as read.
+
+    Returns the most recent page of the project's chat (or the page before
+    ``before``) after the update, or None when no project matches ``query``.
+    """
+    project = await client_projects_collection.find_one(query, LEGACY_PROJECTION)
+    if project is None:
+        return None
+    await ensure_migrated(project)
+
+    await project_chat_collection.update_many(
+        {"project_id": project["id"], "sender_type": sender_type, "read": {"$ne": True}},
+        {"$set": {"read": True}}
+    )
+    page = await list_children("chat_messages", project["id"], limit=limit, before=before)
+    return page["items"]
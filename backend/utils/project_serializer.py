@@ -0,0 +1,219 @@
+"""
+Client project document → JSON converter.
+
+Shared by the admin and client project routes. Each response type is
+described once as a table of ``(field, kind, default)`` rows and documents
+are converted straight into plain dicts, with the fallback timestamp taken
+once per project instead of once per field.
+
+Project bodies are returned as ``ProjectJSONResponse``: a ``Response`` is
+sent as-is by FastAPI, so the dicts are not validated a second time through
+``response_model`` (which is still declared for the OpenAPI schema). The
+converter is what guarantees the shape, so it is tolerant of legacy
+documents: missing fields get the same defaults the client views always
+used. ``scripts/benchmarks/bench_project_serializer.py`` measures it.
+
+Files only store the blob keys of their thumbnail and preview. The URLs are
+built here under the routes of whoever is asking (``CLIENT_PROJECTS_PATH``
+or ``ADMIN_PROJECTS_PATH``), since each side authenticates differently.
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional, the standard library encoder is used without it
+    orjson = None
+
+# Field kinds
+VALUE = 0      # stored value, ``default`` when missing or None
+ID = 1         # stored id, the entry's position when missing
+DATE = 2       # str() of a stored date, None when empty
+TIMESTAMP = 3  # ISO string, the conversion time when missing
+PREVIEW = 4    # URL of the ``default`` render when its key is stored, else None
+
+# Where each side fetches file thumbnails and previews
+CLIENT_PROJECTS_PATH = "/api/client/projects"
+ADMIN_PROJECTS_PATH = "/api/admin/client-projects"
+
+Fields = Tuple[Tuple[str, int, Any], ...]
+
+MILESTONE_FIELDS: Fields = (
+    ("id", ID, None),
+    ("title", VALUE, ""),
+    ("description", VALUE, None),
+    ("due_date", DATE, None),
+    ("status", VALUE, "pending"),
+    ("completion_date", VALUE, None),
+    ("order", VALUE, 0),
+    ("created_at", TIMESTAMP, None),
+)
+
+TASK_FIELDS: Fields = (
+    ("id", ID, None),
+    ("title", VALUE, ""),
+    ("description", VALUE, None),
+    ("status", VALUE, "todo"),
+    ("priority", VALUE, "medium"),
+    ("assigned_to", VALUE, None),
+    ("due_date", DATE, None),
+    ("completed_at", VALUE, None),
+    ("milestone_id", VALUE, None),
+    ("created_at", TIMESTAMP, None),
+)
+
+FILE_FIELDS: Fields = (
+    ("id", ID, None),
+    ("filename", VALUE, "file"),
+    ("file_path", VALUE, ""),
+    ("uploaded_at", TIMESTAMP, None),
+    ("uploaded_by", VALUE, "system"),
+    ("file_size", VALUE, 0),
+    ("file_type", VALUE, None),
+    ("sha256", VALUE, None),
+    ("thumbnail_url", PREVIEW, "thumbnail"),
+    ("preview_url", PREVIEW, "preview"),
+)
+
+COMMENT_FIELDS: Fields = (
+    ("id", ID, None),
+    ("user_id", VALUE, ""),
+    ("user_name", VALUE, "User"),
+    ("user_type", VALUE, "client"),
+    ("message", VALUE, ""),
+    ("created_at", TIMESTAMP, None),
+)
+
+CHAT_MESSAGE_FIELDS: Fields = (
+    ("id", ID, None),
+    ("sender_id", VALUE, ""),
+    ("sender_name", VALUE, "User"),
+    ("sender_type", VALUE, "client"),
+    ("message", VALUE, ""),
+    ("read", VALUE, False),
+    ("created_at", TIMESTAMP, None),
+)
+
+ACTIVITY_FIELDS: Fields = (
+    ("id", ID, None),
+    ("action", VALUE, "unknown"),
+    ("description", VALUE, ""),
+    ("user_id", VALUE, ""),
+    ("user_name", VALUE, "System"),
+    ("timestamp", TIMESTAMP, None),
+    ("metadata", VALUE, None),
+)
+
+TEAM_MEMBER_FIELDS: Fields = (
+    ("admin_id", VALUE, ""),
+    ("admin_name", VALUE, "Admin"),
+    ("role", VALUE, None),
+    ("added_at", TIMESTAMP, None),
+)
+
+BUDGET_FIELDS: Fields = (
+    ("total_amount", VALUE, 0.0),
+    ("currency", VALUE, "USD"),
+    ("paid_amount", VALUE, 0.0),
+    ("pending_amount", VALUE, 0.0),
+    ("payment_terms", VALUE, None),
+)
+
+PROJECT_FIELDS: Fields = (
+    ("id", VALUE, None),
+    ("name", VALUE, ""),
+    ("client_id", VALUE, ""),
+    ("description", VALUE, None),
+    ("status", VALUE, "pending"),
+    ("priority", VALUE, "medium"),
+    ("progress", VALUE, 0),
+    ("start_date", DATE, None),
+    ("expected_delivery", DATE, None),
+    ("actual_delivery", DATE, None),
+    ("notes", VALUE, None),
+)
+
+# After the embedded lists and the budget, in ``ClientProjectResponse`` order
+PROJECT_TRAILING_FIELDS: Fields = (
+    ("tags", VALUE, []),
+    ("created_at", TIMESTAMP, None),
+    ("updated_at", VALUE, None),
+    ("last_activity_at", VALUE, None),
+)
+
+# Embedded lists of a project and the table for their entries
+PROJECT_LISTS: Dict[str, Fields] = {
+    "milestones": MILESTONE_FIELDS,
+    "tasks": TASK_FIELDS,
+    "files": FILE_FIELDS,
+    "comments": COMMENT_FIELDS,
+    "chat_messages": CHAT_MESSAGE_FIELDS,
+    "activity_log": ACTIVITY_FIELDS,
+    "team_members": TEAM_MEMBER_FIELDS,
+}
+
+
+def convert_entry(fields: Fields, doc: Dict[str, Any], index: int = 0, now: Optional[str] = None,
+                  files_path: Optional[str] = None) -> Dict[str, Any]:
+    """Convert one document with a field table
+
+    ``files_path`` is the files route of the project the entry belongs to,
+    needed for ``PREVIEW`` fields.
+    """
+    out = {}
+    for name, kind, default in fields:
+        value = doc.get(name)
+        if kind == VALUE:
+            out[name] = default if value is None else value
+        elif kind == TIMESTAMP:
+            if not value:
+                value = now or datetime.utcnow().isoformat()
+            elif not isinstance(value, str):
+                value = value.isoformat()
+            out[name] = value
+        elif kind == ID:
+            out[name] = str(index) if value is None else value
+        elif kind == PREVIEW:
+            if files_path and doc.get(f"{default}_key"):
+                out[name] = f"{files_path}/{out['id']}/{default}"
+            else:
+                out[name] = None
+        else:
+            out[name] = str(value) if value else None
+    return out
+
+
+def convert_entries(fields: Fields, docs: Optional[Iterable[Dict[str, Any]]], now: Optional[str] = None,
+                    files_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    return [convert_entry(fields, doc, index, now, files_path) for index, doc in enumerate(docs or ())]
+
+
+def convert_project_to_response(project_doc: Dict[str, Any], projects_path: str = CLIENT_PROJECTS_PATH) -> Dict[str, Any]:
+    """Convert a project document to a ``ClientProjectResponse`` dict
+
+    Tasks, comments, chat and activity are stored separately; load them
+    onto the document with ``attach_children`` first. ``projects_path`` is
+    the projects route file previews are linked under.
+    """
+    now = datetime.utcnow().isoformat()
+    project = convert_entry(PROJECT_FIELDS, project_doc, now=now)
+    files_path = f"{projects_path}/{project['id']}/files"
+    for field, fields in PROJECT_LISTS.items():
+        project[field] = convert_entries(fields, project_doc.get(field), now, files_path)
+    budget = project_doc.get("budget")
+    project["budget"] = convert_entry(BUDGET_FIELDS, budget) if budget else None
+    project.update(convert_entry(PROJECT_TRAILING_FIELDS, project_doc, now=now))
+    return project
+
+
+class ProjectJSONResponse(Response):
+    """JSON response for converted project dicts, encoded with orjson when installed"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=str)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
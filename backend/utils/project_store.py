@@ -0,0 +1,495 @@
+"""
+Client project sub-entity store.
+
+Tasks, comments, chat messages and activity entries live in their own
+collections, one document per entry keyed by ``project_id`` and indexed by
+(project_id, time, id). The project document keeps only its header fields
+and the small bounded lists (milestones, files, team members), so it no
+longer grows with every action.
+
+Projects written before the split still embed the arrays; ``ensure_migrated``
+moves them out the first time such a project is touched (and
+``scripts/maintenance/migrate_client_project_children.py`` does it for all of
+them up front). ``attach_children`` puts them back on a project document so
+``ClientProjectResponse`` can still be assembled.
+
+The activity collection is the append-only archive of a project's history.
+The project document additionally carries ``recent_activity``, a window of
+the newest entries capped with ``$push``/``$slice``, which is all the project
+views return; older entries are paged from the archive.
+"""
+import asyncio
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError
+
+from database import (
+    client_projects_collection,
+    project_activity_collection,
+    project_chat_collection,
+    project_comments_collection,
+    project_tasks_collection,
+)
+from utils.pagination import clamp_limit, encode_cursor, position_filter
+from utils.repository import DEFAULT_PROJECTION, update_document
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+ACTIVITY_WINDOW_SIZE = int(os.environ.get('PROJECT_ACTIVITY_WINDOW_SIZE', 20))
+
+# Ids of projects known to hold no embedded arrays, so edits skip the check.
+# A project never goes back to embedding them; cleared when it gets large.
+MIGRATED_CACHE_SIZE = 10000
+_migrated: Set[str] = set()
+
+_CHILD_PROJECTION = {"_id": 0, "project_id": 0}
+
+# For checking that a project exists without loading it
+EXISTS_PROJECTION = {"_id": 1}
+
+
+@dataclass
+class ChildSpec:
+    """A sub-entity: its collection and the time field it is ordered by.
+
+    With a ``window_field`` the newest ``window_size`` entries are also kept
+    on the project document and the project views only return those. Only
+    append-only sub-entities get a window: it is not touched on update or
+    delete.
+    """
+    collection: Any
+    time_field: str
+    window_field: Optional[str] = None
+    window_size: int = 0
+
+
+# Keyed by the field the entries used to be embedded under (and are returned in)
+CHILDREN: Dict[str, ChildSpec] = {
+    "tasks": ChildSpec(project_tasks_collection, "created_at"),
+    "comments": ChildSpec(project_comments_collection, "created_at"),
+    "chat_messages": ChildSpec(project_chat_collection, "created_at"),
+    "activity_log": ChildSpec(project_activity_collection, "timestamp", "recent_activity", ACTIVITY_WINDOW_SIZE),
+}
+
+# Projection that is tiny for migrated projects and carries the arrays for legacy ones
+LEGACY_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    **{field: 1 for field in CHILDREN},
+    **{spec.window_field: 1 for spec in CHILDREN.values() if spec.window_field},
+}
+
+
+def _spec(kind: str) -> ChildSpec:
+    try:
+        return CHILDREN[kind]
+    except KeyError:
+        raise ValueError(f"Unknown project sub-entity: {kind}")
+
+
+def _window_push(spec: ChildSpec, doc: Dict[str, Any]) -> Dict[str, Any]:
+    """``$push`` that appends an entry to the project's capped window"""
+    return {spec.window_field: {"$each": [doc], "$slice": -spec.window_size}}
+
+
+def _stored(spec: ChildSpec, project_id: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of an entry as stored: keyed by project, ISO string timestamps"""
+    doc = {**entry, "project_id": project_id}
+    doc.pop("_id", None)
+    if not doc.get("id"):
+        doc["id"] = str(uuid.uuid4())
+    for key, value in doc.items():
+        if isinstance(value, datetime):
+            doc[key] = value.isoformat()
+    if not doc.get(spec.time_field):
+        doc[spec.time_field] = datetime.utcnow().isoformat()
+    return doc
+
+
+# ---------------- MIGRATION ----------------
+async def ensure_migrated(project: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Move legacy embedded arrays into their collections.
+
+    Returns the project without the arrays. Safe to call concurrently:
+    entry ids are unique per collection, so a second copy is ignored.
+    """
+    if not project:
+        return project
+    present = [kind for kind in CHILDREN if kind in project]
+    if not present:
+        _mark_migrated(project["id"])
+        return project
+
+    windows: Dict[str, Any] = {}
+    for kind in present:
+        spec = CHILDREN[kind]
+        entries = project.pop(kind) or []
+        if not entries:
+            continue
+        docs = [_stored(spec, project["id"], entry) for entry in entries]
+        if spec.window_field:
+            # Entries pushed to the window before the migration are newer
+            legacy_ids = {doc["id"] for doc in docs}
+            recent = [entry for entry in project.get(spec.window_field) or [] if entry.get("id") not in legacy_ids]
+            windows[spec.window_field] = [
+                {k: v for k, v in doc.items() if k != "project_id"}
+                for doc in docs + recent
+            ][-spec.window_size:]
+        try:
+            await spec.collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # Duplicate ids mean another request migrated them already
+            if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                raise
+
+    update: Dict[str, Any] = {"$unset": {kind: "" for kind in present}}
+    if windows:
+        update["$set"] = windows
+        project.update(windows)
+    await client_projects_collection.update_one({"id": project["id"]}, update)
+    _mark_migrated(project["id"])
+    return project
+
+
+def _mark_migrated(project_id: str):
+    if len(_migrated) >= MIGRATED_CACHE_SIZE:
+        _migrated.clear()
+    _migrated.add(project_id)
+
+
+async def seed_window(kind: str, project_id: str) -> bool:
+    """Build a missing window on the project from the newest stored entries.
+
+    For projects migrated before windows existed. Returns False when the
+    project already has a window (or does not exist).
+    """
+    spec = _spec(kind)
+    cursor = spec.collection.find({"project_id": project_id}, _CHILD_PROJECTION).sort(
+        [(spec.time_field, DESCENDING), ("id", DESCENDING)]
+    ).limit(spec.window_size)
+    window = await cursor.to_list(length=spec.window_size)
+    window.reverse()
+    result = await client_projects_collection.update_one(
+        {"id": project_id, spec.window_field: {"$exists": False}},
+        {"$set": {spec.window_field: window}}
+    )
+    return result.modified_count > 0
+
+
+async def migrate_project(project_id: str):
+    """Migrate one project by id if it still embeds any sub-entity array
+
+    Free for projects this process has already seen migrated.
+    """
+    if project_id in _migrated:
+        return
+    legacy = await client_projects_collection.find_one(
+        {"id": project_id, "$or": [{field: {"$exists": True}} for field in CHILDREN]},
+        LEGACY_PROJECTION
+    )
+    if legacy:
+        await ensure_migrated(legacy)
+    else:
+        _mark_migrated(project_id)
+
+
+# ---------------- WRITES ----------------
+async def add_child(kind: str, project_id: str, entry: Dict[str, Any], touch: bool = False) -> Dict[str, Any]:
+    """Store one entry; returns it as stored (without ``project_id``)
+
+    With ``touch`` the project's ``last_activity_at`` is set in the same
+    write that appends to the window.
+    """
+    spec = _spec(kind)
+    doc = _stored(spec, project_id, entry)
+    await spec.collection.insert_one(dict(doc))
+    doc.pop("project_id", None)
+
+    query: Dict[str, Any] = {"id": project_id}
+    update: Dict[str, Any] = {}
+    if spec.window_field:
+        query[spec.window_field] = {"$exists": True}
+        update["$push"] = _window_push(spec, doc)
+    touched = {"last_activity_at": datetime.utcnow().isoformat()} if touch else None
+    if touched:
+        update["$set"] = touched
+    if not update:
+        return doc
+
+    result = await client_projects_collection.update_one(query, update)
+    if spec.window_field and not result.matched_count:
+        # The seeded window already holds the new entry
+        await seed_window(kind, project_id)
+        if touched:
+            await client_projects_collection.update_one({"id": project_id}, {"$set": touched})
+    return doc
+
+
+async def record_activity(project_id: str, activity: Dict[str, Any], touch: bool = False) -> Dict[str, Any]:
+    return await add_child("activity_log", project_id, activity, touch)
+
+
+async def update_project_fields(
+    project_id: str,
+    fields: Dict[str, Any],
+    activity: Optional[Dict[str, Any]] = None,
+) -> Optional[Dict[str, Any]]:
+    """``$set`` fields on a project and add ``activity`` to its window in one write.
+
+    Returns the updated project, or None when it does not exist; the
+    activity is only archived when the project was updated. A project
+    without a window gets one seeded, like ``add_child`` does.
+    """
+    if activity is None:
+        return await update_document(client_projects_collection, {"id": project_id}, {"$set": fields})
+
+    spec = CHILDREN["activity_log"]
+    doc = _stored(spec, project_id, activity)
+    doc.pop("project_id")
+    project = await update_document(
+        client_projects_collection,
+        {"id": project_id, spec.window_field: {"$exists": True}},
+        {"$set": fields, "$push": _window_push(spec, doc)}
+    )
+    if project is not None:
+        await spec.collection.insert_one({**doc, "project_id": project_id})
+        return project
+
+    project = await update_document(client_projects_collection, {"id": project_id}, {"$set": fields})
+    if project is None:
+        return None
+    await spec.collection.insert_one({**doc, "project_id": project_id})
+    if await seed_window("activity_log", project_id):
+        project = await client_projects_collection.find_one({"id": project_id}, DEFAULT_PROJECTION)
+    return project
+
+
+async def update_child(kind: str, project_id: str, child_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """``$set`` fields on one entry; returns the updated entry or None"""
+    spec = _spec(kind)
+    await migrate_project(project_id)
+    return await update_document(
+        spec.collection,
+        {"project_id": project_id, "id": child_id},
+        {"$set": fields},
+        projection=_CHILD_PROJECTION
+    )
+
+
+async def delete_child(kind: str, project_id: str, child_id: str) -> bool:
+    spec = _spec(kind)
+    await migrate_project(project_id)
+    result = await spec.collection.delete_one({"project_id": project_id, "id": child_id})
+    return result.deleted_count > 0
+
+
+async def delete_children(project_id: str):
+    """Remove every sub-entity of a deleted project"""
+    for spec in CHILDREN.values():
+        await spec.collection.delete_many({"project_id": project_id})
+
+
+# ---------------- READS ----------------
+async def list_children(
+    kind: str,
+    project_id: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+) -> Dict[str, Any]:
+    """One page of entries in chronological order.
+
+    Without cursors this is the most recent page; ``before`` pages back
+    through older entries and ``after`` fetches newer ones. Raises
+    ValueError for a malformed cursor.
+    """
+    spec = _spec(kind)
+    limit = clamp_limit(limit, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    query: Dict[str, Any] = {"project_id": project_id}
+
+    if after:
+        query.update(position_filter(after, "$gt", spec.time_field))
+        sort = [(spec.time_field, ASCENDING), ("id", ASCENDING)]
+    else:
+        if before:
+            query.update(position_filter(before, "$lt", spec.time_field))
+        sort = [(spec.time_field, DESCENDING), ("id", DESCENDING)]
+
+    cursor = spec.collection.find(query, _CHILD_PROJECTION).sort(sort).limit(limit + 1)
+    items = await cursor.to_list(length=limit + 1)
+
+    has_more = len(items) > limit
+    items = items[:limit]
+    if not after:
+        items.reverse()
+
+    next_cursor = None
+    if has_more and items:
+        edge = items[-1] if after else items[0]
+        next_cursor = encode_cursor(edge[spec.time_field], edge["id"])
+
+    return {"items": items, "next_cursor": next_cursor, "has_more": has_more}
+
+
+async def count_children(kind: str, project_id: str, query: Optional[Dict[str, Any]] = None) -> int:
+    spec = _spec(kind)
+    return await spec.collection.count_documents({"project_id": project_id, **(query or {})})
+
+
+async def attach_children(projects: Iterable[Dict[str, Any]], per_project: int = MAX_PAGE_SIZE) -> List[Dict[str, Any]]:
+    """Compatibility layer: put sub-entities back on project documents.
+
+    Legacy projects are migrated first. Each sub-entity is then read with one
+    aggregation for all projects, keeping the ``per_project`` most recent
+    entries in chronological order. Windowed sub-entities come from the
+    project's own window instead and are only queried for projects that do
+    not have one yet.
+    """
+    projects = list(projects)
+    for project in projects:
+        await ensure_migrated(project)
+
+    for kind, spec in CHILDREN.items():
+        limit = per_project
+        pending = projects
+        if spec.window_field:
+            limit = min(per_project, spec.window_size)
+            pending = []
+            for project in projects:
+                window = project.pop(spec.window_field, None)
+                if window is None:
+                    pending.append(project)
+                else:
+                    project[kind] = window[-limit:]
+        project_ids = [project["id"] for project in pending]
+
+        by_project: Dict[str, List[Dict[str, Any]]] = {}
+        if project_ids:
+            pipeline = [
+                {"$match": {"project_id": {"$in": project_ids}}},
+                {"$sort": {"project_id": 1, spec.time_field: 1, "id": 1}},
+                {"$group": {"_id": "$project_id", "items": {"$push": "$$ROOT"}}},
+                {"$project": {"items": {"$slice": ["$items", -limit]}}},
+            ]
+            async for row in spec.collection.aggregate(pipeline, allowDiskUse=True):
+                by_project[row["_id"]] = [
+                    {k: v for k, v in item.items() if k not in ("_id", "project_id")}
+                    for item in row["items"]
+                ]
+        for project in pending:
+            project[kind] = by_project.get(project["id"], [])
+
+    return projects
+
+
+async def project_child_page(
+    project_query: Dict[str, Any],
+    kind: str,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """``list_children`` for the project matching ``project_query``, or None if there is none"""
+    project = await client_projects_collection.find_one(project_query, LEGACY_PROJECTION)
+    if project is None:
+        return None
+    await ensure_migrated(project)
+    return await list_children(kind, project["id"], limit=limit, before=before, after=after)
+
+
+# ---------------- LIST SUMMARIES ----------------
+SUMMARY_PAGE_SIZE = 20
+MAX_SUMMARY_PAGE_SIZE = 100
+SUMMARY_SORT_FIELDS = ("last_activity_at", "created_at", "updated_at", "name", "status", "priority", "progress")
+
+_SUMMARY_HEADER_FIELDS = (
+    "id", "name", "client_id", "description", "status", "priority", "progress",
+    "start_date", "expected_delivery", "actual_delivery", "tags",
+    "created_at", "updated_at", "last_activity_at",
+)
+
+
+def _lookup_count(kind: str, match: Dict[str, Any], as_field: str) -> Dict[str, Any]:
+    """$lookup that returns only a count of matching entries"""
+    return {"$lookup": {
+        "from": CHILDREN[kind].collection.name,
+        "localField": "id",
+        "foreignField": "project_id",
+        "pipeline": [{"$match": match}, {"$count": "n"}],
+        "as": as_field,
+    }}
+
+
+def _stored_plus_embedded(rows_field: str, embedded_field: str, cond: Dict[str, Any]) -> Dict[str, Any]:
+    """Count from a $lookup plus matches still embedded in a legacy array"""
+    return {"$add": [
+        {"$ifNull": [{"$first": f"${rows_field}.n"}, 0]},
+        {"$size": {"$filter": {"input": {"$ifNull": [f"${embedded_field}", []]}, "cond": cond}}},
+    ]}
+
+
+async def summarize_projects(
+    match: Dict[str, Any],
+    unread_from: str,
+    page: int = 1,
+    limit: int = 20,
+    sort: str = "last_activity_at",
+    descending: bool = True,
+) -> Dict[str, Any]:
+    """One page of project headers with computed counts.
+
+    Counts (open tasks, unread chat from ``unread_from``, files) are computed
+    in MongoDB, so no task, chat or file array is sent to the application.
+    The page is a plain pipeline, so the sort can use an index, and the total
+    is a separate ``count_documents`` run alongside it. Raises ValueError for
+    an unknown sort field.
+    """
+    if sort not in SUMMARY_SORT_FIELDS:
+        raise ValueError(f"sort must be one of: {', '.join(SUMMARY_SORT_FIELDS)}")
+    page = max(page, 1)
+    limit = clamp_limit(limit, SUMMARY_PAGE_SIZE, MAX_SUMMARY_PAGE_SIZE)
+    direction = -1 if descending else 1
+    open_task_match = {"status": {"$ne": "completed"}}
+    unread_match = {"sender_type": unread_from, "read": {"$ne": True}}
+
+    pipeline = [
+        {"$match": match},
+        {"$sort": {sort: direction, "id": direction}},
+        {"$skip": (page - 1) * limit},
+        {"$limit": limit},
+        _lookup_count("tasks", open_task_match, "open_task_rows"),
+        _lookup_count("chat_messages", unread_match, "unread_rows"),
+        {"$project": {
+            "_id": 0,
+            **{field: 1 for field in _SUMMARY_HEADER_FIELDS},
+            "file_count": {"$size": {"$ifNull": ["$files", []]}},
+            "milestone_count": {"$size": {"$ifNull": ["$milestones", []]}},
+            "open_tasks": _stored_plus_embedded(
+                "open_task_rows", "tasks", {"$ne": ["$$this.status", "completed"]}
+            ),
+            "unread_messages": _stored_plus_embedded(
+                "unread_rows", "chat_messages",
+                {"$and": [{"$eq": ["$$this.sender_type", unread_from]}, {"$ne": ["$$this.read", True]}]}
+            ),
+        }},
+    ]
+
+    items, total = await asyncio.gather(
+        client_projects_collection.aggregate(pipeline).to_list(length=limit),
+        client_projects_collection.count_documents(match),
+    )
+    return {
+        "items": items,
+        "total": total,
+        "page": page,
+        "limit": limit,
+    }
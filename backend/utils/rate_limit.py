@@ -0,0 +1,431 @@
+"""
+Rate limiting: sliding-window counters and token buckets.
+
+Sliding windows (login throttling, ``auth/login_throttle.py``)
+--------------------------------------------------------------
+
+``store.hit(key, limit, window)`` counts one event for ``key`` and says
+whether it is within ``limit`` events per ``window`` seconds. The window
+slides: the count is the current fixed window plus the previous one,
+weighted by how much of it still overlaps, which is smooth at window
+boundaries and needs only two counters per key.
+
+Two stores share that interface:
+
+- ``MemoryRateLimitStore``: a dict in this process; enough for one worker
+- ``MongoRateLimitStore``: counters in the ``rate_limits`` collection, so
+  every worker and instance sees the same counts; a TTL index removes
+  finished windows
+
+Token buckets (request rate limits, ``RateLimitMiddleware``)
+------------------------------------------------------------
+``rate_limiter.check(method, path, ip)`` finds the rule for the route
+(``RATE_LIMIT_RULES``) and takes a token from the client's bucket for that
+rule, so routes sharing a policy still count separately (a page full of
+analytics events does not use up the contact form).
+Buckets refill continuously at the policy rate up to its burst size, and
+each check is a constant amount of work. The memory store drops buckets
+that have refilled completely from a background task; the Mongo store
+updates a bucket in one atomic pipeline update and leaves idle ones to the
+TTL index.
+
+``RATE_LIMIT_STORE`` picks the store for both (``memory`` or ``mongo``).
+"""
+import asyncio
+import logging
+import math
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import Request
+from pymongo import ReturnDocument
+
+from database import rate_limits_collection
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'memory').lower()
+# Memory stores: drop idle counters and full buckets this often
+RATE_LIMIT_SWEEP_INTERVAL = float(os.environ.get('RATE_LIMIT_SWEEP_INTERVAL', 60.0))
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    # Weighted number of events in the sliding window, this one included
+    count: float
+    # Seconds until another event would be allowed (0 when allowed)
+    retry_after: int
+
+
+def client_ip(request: Request) -> str:
+    """Address of the client, taken from X-Forwarded-For behind a trusted proxy.
+
+    The proxy appends the address it saw, so the last entry is the one that
+    cannot be spoofed.
+    """
+    if os.environ.get("TRUST_PROXY") == "true":
+        forwarded_for = request.headers.get("X-Forwarded-For")
+        if forwarded_for:
+            return forwarded_for.split(",")[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def _window_position(window: float, now: float) -> Tuple[int, float]:
+    """(index of the current fixed window, fraction of it elapsed)"""
+    index = int(now // window)
+    return index, (now - index * window) / window
+
+
+def _evaluate(current: int, previous: int, elapsed: float, limit: int, window: float) -> RateLimitResult:
+    count = previous * (1 - elapsed) + current
+    if count <= limit:
+        return RateLimitResult(True, count, 0)
+    if current + 1 > limit:
+        # Wait for the next window, then for this one to decay enough
+        wait = (1 - elapsed) * window + window * (1 - (limit - 1) / current)
+    else:
+        wait = window * (1 - (limit - 1 - current) / previous) - elapsed * window
+    return RateLimitResult(False, count, max(1, math.ceil(wait)))
+
+
+class MemoryRateLimitStore:
+    """In-process sliding-window counters"""
+
+    def __init__(self, sweep_interval: float = RATE_LIMIT_SWEEP_INTERVAL):
+        self.sweep_interval = sweep_interval
+        # key -> [window index, current count, previous count, window length]
+        self._counters: Dict[str, List] = {}
+        self._next_sweep = time.time() + sweep_interval
+
+    async def hit(self, key: str, limit: int, window: float) -> RateLimitResult:
+        now = time.time()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        index, elapsed = _window_position(window, now)
+        counter = self._counters.get(key)
+        if counter is None or counter[0] < index - 1:
+            counter = self._counters[key] = [index, 0, 0, window]
+        elif counter[0] == index - 1:
+            counter[0], counter[1], counter[2] = index, 0, counter[1]
+        counter[1] += 1
+        return _evaluate(counter[1], counter[2], elapsed, limit, window)
+
+    async def reset(self, key: str, window: float):
+        self._counters.pop(key, None)
+
+    def _sweep(self, now: float):
+        """Drop counters with no events in the last two windows"""
+        self._next_sweep = now + self.sweep_interval
+        idle = [
+            key for key, (index, _, _, window) in self._counters.items()
+            if index < int(now // window) - 1
+        ]
+        for key in idle:
+            del self._counters[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"backend": "memory", "keys": len(self._counters)}
+
+
+class MongoRateLimitStore:
+    """Sliding-window counters shared through MongoDB.
+
+    One document per key and fixed window (``_id`` is ``key:index``); a
+    TTL index on ``expires_at`` removes it once it can no longer count.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def hit(self, key: str, limit: int, window: float) -> RateLimitResult:
+        index, elapsed = _window_position(window, time.time())
+        current = await self.collection.find_one_and_update(
+            {"_id": f"{key}:{index}"},
+            {
+                "$inc": {"count": 1},
+                "$setOnInsert": {"expires_at": datetime.utcfromtimestamp((index + 2) * window)},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        previous = await self.collection.find_one({"_id": f"{key}:{index - 1}"})
+        return _evaluate(current["count"], previous["count"] if previous else 0, elapsed, limit, window)
+
+    async def reset(self, key: str, window: float):
+        index, _ = _window_position(window, time.time())
+        await self.collection.delete_many({"_id": {"$in": [f"{key}:{index}", f"{key}:{index - 1}"]}})
+
+    def stats(self) -> Dict[str, str]:
+        return {"backend": "mongo"}
+
+
+def create_store(backend: str = RATE_LIMIT_STORE):
+    """Rate limit store for ``RATE_LIMIT_STORE`` (``memory`` or ``mongo``)"""
+    if backend == "mongo":
+        return MongoRateLimitStore(rate_limits_collection)
+    if backend != "memory":
+        raise ValueError(f"Unknown RATE_LIMIT_STORE: {backend}")
+    return MemoryRateLimitStore()
+
+
+# ---------------- TOKEN BUCKETS ----------------
+class RateLimitPolicy(NamedTuple):
+    name: str
+    # Tokens added per second
+    rate: float
+    # Bucket size: requests allowed at once after being idle
+    burst: int
+
+
+def per_minute(name: str, requests: int, burst: int) -> RateLimitPolicy:
+    return RateLimitPolicy(name, requests / 60.0, burst)
+
+
+class BucketResult(NamedTuple):
+    allowed: bool
+    # Whole tokens left after this request
+    remaining: int
+    # Seconds until the next token (0 when allowed)
+    retry_after: int
+
+
+def _take(tokens: float, policy: RateLimitPolicy) -> Tuple[bool, float, BucketResult]:
+    """Take one token from a bucket already refilled to ``tokens``"""
+    if tokens >= 1:
+        tokens -= 1
+        return True, tokens, BucketResult(True, int(tokens), 0)
+    return False, tokens, BucketResult(False, 0, max(1, math.ceil((1 - tokens) / policy.rate)))
+
+
+class MemoryBucketStore:
+    """In-process token buckets; full buckets are evicted by ``sweep``"""
+
+    def __init__(self):
+        # key -> [tokens, last refill time, time the bucket is full again]
+        self._buckets: Dict[str, List[float]] = {}
+        self.evicted = 0
+
+    async def take(self, key: str, policy: RateLimitPolicy) -> BucketResult:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = float(policy.burst)
+        else:
+            tokens = min(policy.burst, bucket[0] + (now - bucket[1]) * policy.rate)
+        allowed, tokens, result = _take(tokens, policy)
+        full_at = now + (policy.burst - tokens) / policy.rate
+        if bucket is None:
+            self._buckets[key] = [tokens, now, full_at]
+        else:
+            bucket[0], bucket[1], bucket[2] = tokens, now, full_at
+        return result
+
+    async def sweep(self, batch: int = 5000):
+        """Drop buckets that have refilled (a missing bucket counts as full)"""
+        now = time.monotonic()
+        full = [key for key, bucket in self._buckets.items() if bucket[2] <= now]
+        for start in range(0, len(full), batch):
+            for key in full[start:start + batch]:
+                bucket = self._buckets.get(key)
+                if bucket is not None and bucket[2] <= now:
+                    del self._buckets[key]
+                    self.evicted += 1
+            # Let requests run between batches
+            await asyncio.sleep(0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", "keys": len(self._buckets), "evicted": self.evicted}
+
+
+class MongoBucketStore:
+    """Token buckets shared through MongoDB, one document per key"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def take(self, key: str, policy: RateLimitPolicy) -> BucketResult:
+        now = time.time()
+        bucket = await self.collection.find_one_and_update(
+            {"_id": f"bucket:{key}"},
+            [
+                {"$set": {
+                    "tokens": {"$min": [policy.burst, {"$add": [
+                        {"$ifNull": ["$tokens", policy.burst]},
+                        # Clocks of different workers may disagree slightly
+                        {"$multiply": [{"$max": [0, {"$subtract": [now, {"$ifNull": ["$refilled_at", now]}]}]}, policy.rate]},
+                    ]}]},
+                    "refilled_at": now,
+                }},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {
+                    "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    # Idle past this point the bucket is full, same as absent
+                    "expires_at": datetime.utcnow() + timedelta(seconds=policy.burst / policy.rate),
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if bucket["allowed"]:
+            return BucketResult(True, int(bucket["tokens"]), 0)
+        return _take(bucket["tokens"], policy)[2]
+
+    async def sweep(self):
+        # The TTL index removes idle buckets
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "mongo"}
+
+
+def create_bucket_store(backend: str = RATE_LIMIT_STORE):
+    """Token bucket store for ``RATE_LIMIT_STORE`` (``memory`` or ``mongo``)"""
+    if backend == "mongo":
+        return MongoBucketStore(rate_limits_collection)
+    if backend != "memory":
+        raise ValueError(f"Unknown RATE_LIMIT_STORE: {backend}")
+    return MemoryBucketStore()
+
+
+def _policy_from_env(name: str, requests: int, burst: int) -> RateLimitPolicy:
+    prefix = f"RATE_LIMIT_{name.upper()}"
+    return per_minute(
+        name,
+        int(os.environ.get(f"{prefix}_PER_MINUTE", requests)),
+        int(os.environ.get(f"{prefix}_BURST", burst))
+    )
+
+
+PUBLIC_WRITE_POLICY = _policy_from_env("public_write", 10, 5)
+# Page views and clicks: several per page load
+ANALYTICS_EVENT_POLICY = _policy_from_env("analytics_event", 120, 30)
+ADMIN_READ_POLICY = _policy_from_env("admin_read", 600, 120)
+DEFAULT_POLICY = _policy_from_env("default", 300, 60)
+
+# (methods, path, prefix match, policy); the first match wins, paths have no
+# trailing slash. Each rule has its own buckets, even where policies repeat
+RATE_LIMIT_RULES: List[Tuple[frozenset, str, bool, Optional[RateLimitPolicy]]] = [
+    # Health checks and CORS preflights are never limited
+    (frozenset({"GET", "HEAD"}), "", False, None),
+    (frozenset({"GET", "HEAD"}), "/api", False, None),
+    (frozenset({"OPTIONS"}), "/", True, None),
+    # Anonymous forms and trackers
+    (frozenset({"POST"}), "/api/contacts", False, PUBLIC_WRITE_POLICY),
+    (frozenset({"POST"}), "/api/chat/messages", False, PUBLIC_WRITE_POLICY),
+    (frozenset({"POST"}), "/api/newsletter/subscribe", False, PUBLIC_WRITE_POLICY),
+    (frozenset({"POST"}), "/api/testimonials/submit", False, PUBLIC_WRITE_POLICY),
+    (frozenset({"POST"}), "/api/analytics/event", False, ANALYTICS_EVENT_POLICY),
+    # Admin panel reads (dashboards poll several endpoints at once); admin
+    # routes outside /api/admin keep an admin path under their own router
+    (frozenset({"GET", "HEAD"}), "/api/admin/", True, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/admins/", True, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/analytics/", True, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/blogs/admin/", True, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/booking-settings/admin", False, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/bookings/admin/", True, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/chat/conversations", False, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/chat/conversations/", True, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/chat/stream-stats", False, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/contacts/admin/", True, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/credentials", False, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/credentials/", True, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/newsletter/admin/", True, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/notes", False, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/notes/", True, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/projects/all", False, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/storage/items", False, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/storage/upload-stats", False, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/storage/blob-stats", False, ADMIN_READ_POLICY),
+    (frozenset({"GET", "HEAD"}), "/api/testimonials/admin/", True, ADMIN_READ_POLICY),
+]
+
+
+class RateLimiter:
+    """Picks the policy for a request and charges the client's bucket"""
+
+    def __init__(
+        self,
+        store,
+        rules=RATE_LIMIT_RULES,
+        default: Optional[RateLimitPolicy] = DEFAULT_POLICY,
+        sweep_interval: float = RATE_LIMIT_SWEEP_INTERVAL,
+    ):
+        self.store = store
+        self.rules = rules
+        self.default = default
+        self.sweep_interval = sweep_interval
+        self._task: Optional[asyncio.Task] = None
+
+        self.allowed: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+        self.store_errors = 0
+
+    def policy_for(self, method: str, path: str) -> Tuple[Optional[RateLimitPolicy], str]:
+        """Policy of the first matching rule and that rule's path ("" for the default)"""
+        path = path.rstrip("/")
+        for methods, rule_path, prefix, policy in self.rules:
+            if method in methods and (path.startswith(rule_path) if prefix else path == rule_path):
+                return policy, rule_path
+        return self.default, ""
+
+    async def check(self, method: str, path: str, ip: str) -> Optional[BucketResult]:
+        """Charge one request; None when the route is not limited"""
+        policy, rule_path = self.policy_for(method, path)
+        if policy is None:
+            return None
+        try:
+            result = await self.store.take(f"{policy.name}:{rule_path}:{ip}", policy)
+        except Exception as e:
+            # Fail open: a store outage must not take the API down
+            self.store_errors += 1
+            logger.warning(f"⚠️ Rate limit store failed, allowing request: {str(e)}")
+            return None
+        counts = self.allowed if result.allowed else self.rejected
+        counts[policy.name] = counts.get(policy.name, 0) + 1
+        return result
+
+    # ---------------- LIFECYCLE ----------------
+    def start(self):
+        """Start evicting idle buckets on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="rate-limit-sweeper")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.store.sweep()
+            except Exception as e:
+                logger.warning(f"⚠️ Rate limit sweep failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        policies = {policy.name: policy for *_, policy in self.rules if policy}
+        if self.default:
+            policies[self.default.name] = self.default
+        return {
+            "enabled": RATE_LIMIT_ENABLED,
+            "store": self.store.stats(),
+            "policies": {
+                name: {"per_minute": round(policy.rate * 60, 2), "burst": policy.burst}
+                for name, policy in policies.items()
+            },
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "store_errors": self.store_errors,
+        }
+
+
+rate_limiter = RateLimiter(create_bucket_store())
@@ -0,0 +1,38 @@
+"""
+Single round-trip document updates.
+
+Edit routes used to read a document to check that it exists, update it and
+read it again for the response. ``update_document`` does all of that with
+one ``find_one_and_update`` that returns the document as it is after the
+update, or None when nothing matched, so a missing document is still a 404.
+"""
+from typing import Any, Dict, List, Optional, Union
+
+from pymongo import ReturnDocument
+
+DEFAULT_PROJECTION = {"_id": 0}
+
+
+async def update_document(
+    collection,
+    query: Dict[str, Any],
+    update: Union[Dict[str, Any], List[Dict[str, Any]]],
+    projection: Optional[Dict[str, Any]] = None,
+) -> Optional[Dict[str, Any]]:
+    """Apply update operators (``$set``, ``$push``, ...) and return the updated document.
+
+    ``update`` may also be an update pipeline, for values computed from the
+    current document. Empty operators are dropped; with nothing left to
+    apply the matching document is returned unchanged.
+    """
+    projection = projection or DEFAULT_PROJECTION
+    if isinstance(update, dict):
+        update = {op: fields for op, fields in update.items() if fields}
+    if not update:
+        return await collection.find_one(query, projection)
+    return await collection.find_one_and_update(
+        query,
+        update,
+        projection=projection,
+        return_document=ReturnDocument.AFTER
+    )
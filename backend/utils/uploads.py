@@ -0,0 +1,166 @@
+"""
+Streaming upload writer.
+
+``save_upload`` copies an ``UploadFile`` to disk in fixed-size chunks. Each
+chunk is hashed and written in the thread pool, so a large upload never
+blocks the event loop. The SHA-256 is computed on the way through and a size
+cap is enforced while streaming. The bytes go to a temporary file next to
+the destination, which is only renamed into place once complete, so a
+failed or rejected upload never leaves a partial file behind.
+
+Starlette has already spooled the multipart body by the time a handler
+runs; uploads with a known size above the cap are rejected before any of it
+is copied.
+"""
+import hashlib
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Union
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 1024 * 1024))
+PROJECT_FILE_MAX_BYTES = int(os.environ.get('PROJECT_FILE_MAX_BYTES', 100 * 1024 * 1024))
+STORAGE_UPLOAD_MAX_BYTES = int(os.environ.get('STORAGE_UPLOAD_MAX_BYTES', 25 * 1024 * 1024))
+
+
+class UploadTooLarge(Exception):
+    """The upload is bigger than the route allows"""
+
+    def __init__(self, max_bytes: int):
+        if max_bytes >= 1024 * 1024:
+            limit = f"{max_bytes / (1024 * 1024):g} MB"
+        else:
+            limit = f"{max_bytes / 1024:g} KB"
+        super().__init__(f"File exceeds the {limit} upload limit")
+        self.max_bytes = max_bytes
+
+
+@dataclass
+class StoredUpload:
+    path: Path
+    size: int
+    sha256: str
+
+
+class UploadMetrics:
+    """Upload counters, overall and per route"""
+
+    def __init__(self):
+        self.routes: Dict[str, Dict[str, float]] = {}
+
+    def _route(self, route: str) -> Dict[str, float]:
+        return self.routes.setdefault(route, {
+            "uploads": 0,
+            "rejected": 0,
+            "failed": 0,
+            "bytes_written": 0,
+            "seconds": 0.0,
+            "last_throughput_bps": 0.0,
+        })
+
+    def record_upload(self, route: str, size: int, seconds: float):
+        counters = self._route(route)
+        counters["uploads"] += 1
+        counters["bytes_written"] += size
+        counters["seconds"] += seconds
+        counters["last_throughput_bps"] = size / seconds if seconds > 0 else 0.0
+
+    def record_rejected(self, route: str):
+        self._route(route)["rejected"] += 1
+
+    def record_failed(self, route: str):
+        self._route(route)["failed"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        routes = {}
+        for route, counters in self.routes.items():
+            seconds = counters["seconds"]
+            routes[route] = {
+                "uploads": int(counters["uploads"]),
+                "rejected": int(counters["rejected"]),
+                "failed": int(counters["failed"]),
+                "bytes_written": int(counters["bytes_written"]),
+                "avg_throughput_bps": round(counters["bytes_written"] / seconds, 2) if seconds > 0 else 0.0,
+                "last_throughput_bps": round(counters["last_throughput_bps"], 2),
+            }
+        return {
+            "uploads": sum(r["uploads"] for r in routes.values()),
+            "bytes_written": sum(r["bytes_written"] for r in routes.values()),
+            "routes": routes,
+        }
+
+
+upload_metrics = UploadMetrics()
+
+
+def _write_chunk(buffer: BinaryIO, digest, chunk: bytes):
+    digest.update(chunk)
+    buffer.write(chunk)
+
+
+def _finish(buffer: BinaryIO, temp_path: Path, destination: Path):
+    buffer.flush()
+    os.fsync(buffer.fileno())
+    buffer.close()
+    os.replace(temp_path, destination)
+
+
+def _discard(buffer: BinaryIO, temp_path: Path):
+    buffer.close()
+    temp_path.unlink(missing_ok=True)
+
+
+async def save_upload(
+    upload: UploadFile,
+    destination: Union[str, Path],
+    max_bytes: int,
+    route: str,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+) -> StoredUpload:
+    """Stream ``upload`` to ``destination`` atomically.
+
+    Raises UploadTooLarge (nothing is written) when the upload exceeds
+    ``max_bytes``; other errors propagate after the temporary file is removed.
+    """
+    destination = Path(destination)
+    if upload.size is not None and upload.size > max_bytes:
+        upload_metrics.record_rejected(route)
+        raise UploadTooLarge(max_bytes)
+
+    temp_path = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    started = time.perf_counter()
+
+    buffer = await run_in_threadpool(open, temp_path, "wb")
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(max_bytes)
+            await run_in_threadpool(_write_chunk, buffer, digest, chunk)
+        await run_in_threadpool(_finish, buffer, temp_path, destination)
+    except UploadTooLarge:
+        _discard(buffer, temp_path)
+        upload_metrics.record_rejected(route)
+        raise
+    except BaseException:
+        # Also on cancellation (client went away): close and unlink are quick
+        _discard(buffer, temp_path)
+        upload_metrics.record_failed(route)
+        logger.warning(f"❌ Upload to {destination} failed, partial file removed")
+        raise
+
+    upload_metrics.record_upload(route, size, time.perf_counter() - started)
+    return StoredUpload(path=destination, size=size, sha256=digest.hexdigest())
@@ -67,12 +67,19 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
 
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Simple in-memory rate limiting (use Redis in production)"""
+    """Simple in-memory token-bucket rate limiting (one bucket per client IP).
+
+    Each request costs O(1); buckets that have refilled are dropped at most
+    once a minute. The backend's version (backend/middleware.py) adds
+    per-route policies and a shared MongoDB store.
+    """
     
     def __init__(self, app, requests_per_minute: int = 60):
         super().__init__(app)
         self.requests_per_minute = requests_per_minute
-        self.requests = {}  # In production, use Redis
+        self.rate = requests_per_minute / 60.0  # tokens per second
+        self.buckets = {}  # ip -> [tokens, last refill time]
+        self.next_sweep = time.monotonic() + 60
     
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         # Skip rate limiting for health checks
@@ -80,35 +87,34 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             return await call_next(request)
         
         client_ip = request.client.host if request.client else "unknown"
-        current_time = time.time()
-        
-        # Clean old entries (older than 1 minute)
-        self.requests = {
-            ip: timestamps
-            for ip, timestamps in self.requests.items()
-            if any(t > current_time - 60 for t in timestamps)
-        }
-        
-        # Get request timestamps for this IP
-        if client_ip not in self.requests:
-            self.requests[client_ip] = []
+        current_time = time.monotonic()
+        
+        # Drop full buckets (same as no bucket) now and then, not per request
+        if current_time >= self.next_sweep:
+            # An empty bucket refills in one minute
+            self.next_sweep = current_time + 60
+            self.buckets = {
+                ip: bucket
+                for ip, bucket in self.buckets.items()
+                if current_time - bucket[1] < 60
+            }
         
-        # Filter to last minute
-        self.requests[client_ip] = [
-            t for t in self.requests[client_ip]
-            if t > current_time - 60
-        ]
+        # Refill this client's bucket for the time since its last request
+        tokens, last = self.buckets.get(client_ip, (self.requests_per_minute, current_time))
+        tokens = min(self.requests_per_minute, tokens + (current_time - last) * self.rate)
         
         # Check rate limit
-        if len(self.requests[client_ip]) >= self.requests_per_minute:
+        if tokens < 1:
+            self.buckets[client_ip] = [tokens, current_time]
             from fastapi.responses import JSONResponse
             return JSONResponse(
                 status_code=429,
-                content={"detail": "Rate limit exceeded. Please try again later."}
+                content={"detail": "Rate limit exceeded. Please try again later."},
+                headers={"Retry-After": str(max(1, int((1 - tokens) / self.rate) + 1))}
             )
         
-        # Add current request
-        self.requests[client_ip].append(current_time)
+        # Take a token for this request
+        self.buckets[client_ip] = [tokens - 1, current_time]
         
         return await call_next(request)
 
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { MessageCircle, Send, Trash2, Mail, Phone, Clock, CheckCircle } from 'lucide-react';
 import axios from 'axios';
 import { getBackendURL } from '../../lib/utils';
@@ -11,21 +11,81 @@ const ChatManager = () => {
   const [loading, setLoading] = useState(true);
   const [replyText, setReplyText] = useState('');
   const [totalUnread, setTotalUnread] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // Set once a second page is loaded; refreshes then keep the loaded tail
+  const pagedPastFirst = useRef(false);
 
   useEffect(() => {
     fetchConversations();
-    // Poll for new messages every 30 seconds
-    const interval = setInterval(fetchConversations, 30000);
-    return () => clearInterval(interval);
+    // Live inbox over Server-Sent Events instead of polling. EventSource
+    // cannot send the bearer token, so each connection uses a single-use
+    // ticket; on a drop, reconnect with a fresh one.
+    let source = null;
+    let retryTimer = null;
+    let closed = false;
+
+    const connect = async () => {
+      try {
+        const token = localStorage.getItem('admin_token') || localStorage.getItem('adminToken');
+        const response = await axios.post(`${BACKEND_URL}/chat/stream-ticket`, {}, {
+          headers: { Authorization: `Bearer ${token}` }
+        });
+        if (closed) return;
+        source = new EventSource(
+          `${BACKEND_URL}/chat/conversations/stream?ticket=${encodeURIComponent(response.data.ticket)}`
+        );
+      } catch (error) {
+        console.error('Error opening chat stream:', error);
+        if (!closed) retryTimer = setTimeout(connect, 3000);
+        return;
+      }
+      source.addEventListener('message', (event) => {
+        const { conversationId, message } = JSON.parse(event.data);
+        setSelectedConv((prev) => {
+          if (!prev || prev.id !== conversationId || prev.messages.some((m) => m.id === message.id)) {
+            return prev;
+          }
+          return { ...prev, messages: [...prev.messages, message] };
+        });
+        fetchConversations();
+      });
+      // (Re)connected: resync the list
+      source.addEventListener('ready', fetchConversations);
+      source.onerror = () => {
+        // The browser would retry with the spent ticket
+        source.close();
+        if (!closed) retryTimer = setTimeout(connect, 3000);
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      if (source) source.close();
+    };
   }, []);
 
   const fetchConversations = async () => {
+    // Refresh the first page; pages already loaded below it are kept
     try {
       const token = localStorage.getItem('admin_token') || localStorage.getItem('adminToken');
       const response = await axios.get(`${BACKEND_URL}/chat/conversations`, {
+        params: { view: 'summary' },
         headers: { Authorization: `Bearer ${token}` }
       });
-      setConversations(response.data.conversations);
+      const page = response.data.conversations;
+      if (pagedPastFirst.current) {
+        const pageIds = new Set(page.map((conv) => conv.id));
+        setConversations((prev) => [
+          ...page,
+          ...prev.filter((conv) => !pageIds.has(conv.id))
+        ]);
+      } else {
+        setConversations(page);
+        setNextCursor(response.data.nextCursor);
+      }
       setTotalUnread(response.data.totalUnread);
     } catch (error) {
       console.error('Error fetching conversations:', error);
@@ -34,8 +94,41 @@ const ChatManager = () => {
     }
   };
 
+  const loadMoreConversations = async () => {
+    if (!nextCursor || loadingMore) return;
+
+    setLoadingMore(true);
+    try {
+      const token = localStorage.getItem('admin_token') || localStorage.getItem('adminToken');
+      const response = await axios.get(`${BACKEND_URL}/chat/conversations`, {
+        params: { view: 'summary', cursor: nextCursor },
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      pagedPastFirst.current = true;
+      setConversations((prev) => {
+        const loadedIds = new Set(prev.map((conv) => conv.id));
+        return [...prev, ...response.data.conversations.filter((conv) => !loadedIds.has(conv.id))];
+      });
+      setNextCursor(response.data.nextCursor);
+    } catch (error) {
+      console.error('Error loading more conversations:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const selectConversation = async (conv) => {
-    setSelectedConv(conv);
+    // The inbox only carries previews; load the history when a conversation is opened
+    try {
+      const token = localStorage.getItem('admin_token') || localStorage.getItem('adminToken');
+      const response = await axios.get(`${BACKEND_URL}/chat/conversations/${conv.id}`, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      setSelectedConv(response.data);
+    } catch (error) {
+      console.error('Error fetching conversation:', error);
+      return;
+    }
     
     // Mark as read if there are unread messages
     if (conv.unreadCount > 0) {
@@ -86,6 +179,7 @@ const ChatManager = () => {
       if (selectedConv && selectedConv.id === id) {
         setSelectedConv(null);
       }
+      setConversations((prev) => prev.filter((conv) => conv.id !== id));
       fetchConversations();
     } catch (error) {
       console.error('Error deleting conversation:', error);
@@ -168,6 +262,18 @@ const ChatManager = () => {
               </div>
             ))}
 
+            {nextCursor && (
+              <button
+                onClick={loadMoreConversations}
+                disabled={loadingMore}
+                className="admin-btn admin-btn-secondary"
+                style={{ width: 'calc(100% - 32px)', margin: '16px' }}
+                data-testid="load-more-conversations"
+              >
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            )}
+
             {conversations.length === 0 && (
               <div style={{ padding: '40px', textAlign: 'center', color: '#6b7280' }}>
                 <MessageCircle size={48} style={{ margin: '0 auto 16px' }} />
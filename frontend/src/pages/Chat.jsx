@@ -26,7 +26,7 @@ const Chat = () => {
   const [testimonialSubmitted, setTestimonialSubmitted] = useState(false);
   const [hoveredRating, setHoveredRating] = useState(0);
   const messagesEndRef = useRef(null);
-  const intervalRef = useRef(null);
+  const streamRef = useRef(null);
   const lastFetchRef = useRef(0);
 
   // Optimized scroll to bottom
@@ -78,26 +78,29 @@ const Chat = () => {
     }
   }, []);
 
-  // Auto-refresh with cleanup
+  // Live updates over Server-Sent Events once the conversation exists
   useEffect(() => {
-    if (isAuthenticated && userInfo.email) {
-      // Clear existing interval
-      if (intervalRef.current) {
-        clearInterval(intervalRef.current);
-      }
-      
-      // Set new interval for 5 seconds
-      intervalRef.current = setInterval(() => {
-        fetchConversation();
-      }, 5000);
-      
-      return () => {
-        if (intervalRef.current) {
-          clearInterval(intervalRef.current);
-        }
-      };
-    }
-  }, [isAuthenticated, userInfo.email, fetchConversation]);
+    if (!isAuthenticated || !userInfo.email || !conversation?.id) return;
+
+    const params = new URLSearchParams({ email: userInfo.email, phone: userInfo.phone || '' });
+    const source = new EventSource(`${BACKEND_URL}/chat/user-conversation/stream?${params}`);
+    streamRef.current = source;
+
+    source.addEventListener('message', (event) => {
+      const { message: newMessage } = JSON.parse(event.data);
+      setConversation((prev) => {
+        if (!prev || prev.messages.some((m) => m.id === newMessage.id)) return prev;
+        return { ...prev, messages: [...prev.messages, newMessage], lastMessageAt: newMessage.timestamp };
+      });
+    });
+    // Reconnected after a drop: refetch to pick up anything missed
+    source.addEventListener('ready', () => fetchConversation());
+
+    return () => {
+      source.close();
+      streamRef.current = null;
+    };
+  }, [isAuthenticated, userInfo.email, userInfo.phone, conversation?.id, fetchConversation]);
 
   // Scroll when conversation changes
   useEffect(() => {
@@ -196,8 +199,8 @@ const Chat = () => {
   };
 
   const handleLogout = () => {
-    if (intervalRef.current) {
-      clearInterval(intervalRef.current);
+    if (streamRef.current) {
+      streamRef.current.close();
     }
     localStorage.removeItem('chat_user_info');
     setIsAuthenticated(false);
@@ -0,0 +1,47 @@
+"""
+Shared setup for the backend unit tests.
+
+These tests run without a server or a database. The backend modules import
+``database.py``, which only needs ``MONGODB_URI`` to be set: nothing
+connects unless a query runs. Tests that do query get an in-memory
+database from the ``mongo`` fixture (mongomock-motor) and point the module
+under test at its collections.
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+BACKEND_DIR = Path(__file__).resolve().parents[2] / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+
+
+@pytest.fixture
+def mongo():
+    """An empty in-memory database"""
+    return AsyncMongoMockClient()["test"]
+
+
+class ProjectingCollection:
+    """Collection wrapper for code that claims with ``find_one_and_update``.
+
+    mongomock answers a projection plus ``ReturnDocument.AFTER`` by reading
+    the document again with the original filter, which no longer matches
+    once the update changed a filtered field. The wrapper projects the
+    returned document itself.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    async def find_one_and_update(self, filter, update, projection=None, **options):
+        doc = await self.collection.find_one_and_update(filter, update, **options)
+        if doc is not None and projection == {"_id": 0}:
+            doc.pop("_id")
+        return doc
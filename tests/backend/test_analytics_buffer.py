@@ -0,0 +1,132 @@
+"""Behavior tests for the analytics ingestion buffer in utils/analytics_buffer.py"""
+import asyncio
+
+from pymongo.errors import BulkWriteError
+
+from utils.analytics_buffer import AnalyticsBuffer
+
+
+def make_buffer(collection, **options):
+    options = {"batch_size": 10, "flush_interval": 0.01, **options}
+    return AnalyticsBuffer(collection, **options)
+
+
+def test_events_are_flushed_in_batches(mongo):
+    buffer = make_buffer(mongo.analytics)
+    batches = []
+
+    async def hook(batch):
+        batches.append(len(batch))
+
+    async def scenario():
+        buffer.add_flush_hook(hook)
+        for n in range(25):
+            assert buffer.enqueue({"n": n})
+        await buffer.stop()
+
+    asyncio.run(scenario())
+    assert asyncio.run(mongo.analytics.count_documents({})) == 25
+    assert sum(batches) == 25
+    assert max(batches) <= 10
+    stats = buffer.stats()
+    assert stats["enqueued"] == stats["flushed"] == 25
+    assert stats["failed"] == stats["dropped"] == 0
+    assert not stats["running"]
+
+
+def test_registering_a_hook_twice_applies_it_once(mongo):
+    buffer = make_buffer(mongo.analytics)
+    seen = []
+
+    async def hook(batch):
+        seen.extend(event["n"] for event in batch)
+
+    async def scenario():
+        # As after a second startup in the same process
+        buffer.add_flush_hook(hook)
+        buffer.add_flush_hook(hook)
+        for n in range(3):
+            buffer.enqueue({"n": n})
+        await buffer.stop()
+
+    asyncio.run(scenario())
+    assert sorted(seen) == [0, 1, 2]
+
+
+def test_load_shedding(mongo):
+    buffer = make_buffer(mongo.analytics, max_size=10, sample_rate=0.0, high_watermark=0.5)
+
+    async def scenario():
+        # The flusher does not run before the first await, so the queue fills up
+        return [buffer.enqueue({"n": n}) for n in range(20)]
+
+    accepted = asyncio.run(scenario())
+    # Above the watermark every event is sampled out with a zero sample rate
+    assert accepted == [True] * 5 + [False] * 15
+    assert buffer.sampled_out == 15
+
+    full = make_buffer(mongo.analytics, max_size=5, sample_rate=1.0)
+
+    async def overflow():
+        return [full.enqueue({"n": n}) for n in range(8)]
+
+    assert asyncio.run(overflow()) == [True] * 5 + [False] * 3
+    assert full.dropped == 3
+
+
+def test_events_after_stop_are_dropped(mongo):
+    buffer = make_buffer(mongo.analytics)
+
+    async def scenario():
+        buffer.enqueue({"n": 0})
+        await buffer.stop()
+        return buffer.enqueue({"n": 1})
+
+    assert asyncio.run(scenario()) is False
+    assert buffer.dropped == 1
+
+
+class PartlyFailing:
+    """insert_many that rejects the second event of every batch"""
+
+    async def insert_many(self, docs, ordered):
+        assert ordered is False
+        raise BulkWriteError({
+            "writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate key"}],
+            "nInserted": len(docs) - 1,
+            "writeConcernErrors": [],
+        })
+
+
+class Failing:
+    async def insert_many(self, docs, ordered):
+        raise ConnectionError("network is down")
+
+
+def test_partial_batch_counts_inserted_events_and_runs_hooks_on_them():
+    buffer = make_buffer(PartlyFailing())
+    seen = []
+
+    async def hook(batch):
+        seen.append([event["n"] for event in batch])
+
+    buffer.add_flush_hook(hook)
+    asyncio.run(buffer._flush([{"n": 0}, {"n": 1}, {"n": 2}]))
+    assert buffer.flushed == 2
+    assert buffer.failed == 1
+    assert seen == [[0, 2]]
+
+
+def test_failed_batch_skips_hooks():
+    buffer = make_buffer(Failing())
+    seen = []
+
+    async def hook(batch):
+        seen.append(batch)
+
+    buffer.add_flush_hook(hook)
+    asyncio.run(buffer._flush([{"n": 0}, {"n": 1}]))
+    assert buffer.failed == 2
+    assert buffer.flushed == 0
+    assert seen == []
+    assert buffer.flush_count == 1
@@ -0,0 +1,116 @@
+"""Behavior tests for the analytics rollup counters in utils/analytics_rollups.py"""
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils import analytics_rollups
+from utils.analytics_rollups import apply_rollups, bucket_start, rebuild_rollups, rollup_id, summarize_rollups
+
+
+class RawEvents:
+    """Raw events collection; groups like the rebuild pipeline ($dateTrunc is not in mongomock)"""
+
+    def __init__(self, events, during_rebuild=None):
+        self.events = events
+        self.during_rebuild = during_rebuild
+
+    async def aggregate(self, pipeline, allowDiskUse=False):
+        granularity = pipeline[1]["$group"]["_id"]["bucket"]["$dateTrunc"]["unit"]
+        counts = Counter(
+            (bucket_start(event["timestamp"], granularity), event["event_type"], event.get("page_name"))
+            for event in self.events
+        )
+        for (bucket, event_type, page_name), count in counts.items():
+            if self.during_rebuild:
+                await self.during_rebuild()
+            yield {
+                "_id": {"bucket": bucket, "event_type": event_type, "page_name": page_name, "blog_id": None},
+                "count": count,
+            }
+
+
+@pytest.fixture
+def rollups(mongo, monkeypatch):
+    monkeypatch.setattr(analytics_rollups, "analytics_rollups_collection", mongo.rollups)
+    return mongo.rollups
+
+
+def page_views(timestamp, n, page="home"):
+    return [{"timestamp": timestamp, "event_type": "page_view", "page_name": page} for _ in range(n)]
+
+
+def test_apply_rollups_folds_a_batch_into_hour_and_day_counters(rollups):
+    batch = page_views(datetime(2024, 1, 1, 10, 5), 3) + page_views(datetime(2024, 1, 1, 11, 0), 2)
+    asyncio.run(apply_rollups(batch))
+    asyncio.run(apply_rollups(page_views(datetime(2024, 1, 1, 10, 59), 1)))
+
+    counts = {doc["_id"]: doc["count"] for doc in asyncio.run(rollups.find().to_list(None))}
+    assert counts == {
+        rollup_id("hour", datetime(2024, 1, 1, 10), "page_view", "home", None): 4,
+        rollup_id("hour", datetime(2024, 1, 1, 11), "page_view", "home", None): 2,
+        rollup_id("day", datetime(2024, 1, 1), "page_view", "home", None): 6,
+    }
+
+
+def test_summary_reads_days_and_edge_hours(rollups):
+    now = datetime(2024, 1, 10, 12, 30)
+    asyncio.run(apply_rollups(
+        page_views(datetime(2024, 1, 7, 23, 10), 1)     # before the window
+        + page_views(datetime(2024, 1, 8, 13, 10), 2)   # partial first day
+        + page_views(datetime(2024, 1, 9, 8, 0), 3)     # whole day
+        + page_views(datetime(2024, 1, 10, 9, 0), 4)    # today
+    ))
+    [row] = asyncio.run(summarize_rollups(datetime(2024, 1, 8, 12, 30), now))
+    assert row["_id"]["event_type"] == "page_view"
+    assert row["count"] == 9
+
+
+def test_rebuild_replaces_buckets_in_place(rollups, monkeypatch):
+    now = datetime.utcnow()
+    current_hour = bucket_start(now, "hour")
+    closed = datetime(2024, 1, 1, 10, 5)
+    live_id = rollup_id("hour", current_hour, "page_view", "live", None)
+    wrong_id = rollup_id("hour", datetime(2024, 1, 1, 10), "page_view", "home", None)
+    stale_id = rollup_id("hour", datetime(2024, 1, 1, 9), "page_view", "gone", None)
+
+    asyncio.run(rollups.insert_many([
+        {"_id": wrong_id, "granularity": "hour", "bucket": datetime(2024, 1, 1, 10), "count": 7},
+        {"_id": stale_id, "granularity": "hour", "bucket": datetime(2024, 1, 1, 9), "count": 5},
+    ]))
+    seen_during_rebuild = []
+
+    async def live_flush():
+        # The summary still sees the old counter, and live increments are kept
+        doc = await rollups.find_one({"_id": wrong_id})
+        seen_during_rebuild.append(doc["count"] if doc else None)
+        await apply_rollups(page_views(now, 1, page="live"))
+
+    raw = page_views(closed, 3) + page_views(closed + timedelta(days=1), 2)
+    monkeypatch.setattr(analytics_rollups, "analytics_collection", RawEvents(raw, live_flush))
+    written = asyncio.run(rebuild_rollups())
+
+    assert written == 4
+    assert None not in seen_during_rebuild
+    docs = {doc["_id"]: doc for doc in asyncio.run(rollups.find().to_list(None))}
+    assert docs[wrong_id]["count"] == 3
+    assert stale_id not in docs
+    assert docs[live_id]["count"] == len(seen_during_rebuild)
+    assert docs[rollup_id("day", datetime(2024, 1, 2), "page_view", "home", None)]["count"] == 2
+
+    # Re-running gives the same counters
+    monkeypatch.setattr(analytics_rollups, "analytics_collection", RawEvents(raw))
+    asyncio.run(rebuild_rollups())
+    assert asyncio.run(rollups.find_one({"_id": wrong_id}))["count"] == 3
+    assert asyncio.run(rollups.find_one({"_id": live_id}))["count"] == len(seen_during_rebuild)
+
+
+def test_rebuild_range_leaves_other_days_alone(rollups, monkeypatch):
+    outside_id = rollup_id("day", datetime(2024, 2, 1), "page_view", "home", None)
+    asyncio.run(rollups.insert_one(
+        {"_id": outside_id, "granularity": "day", "bucket": datetime(2024, 2, 1), "count": 9}
+    ))
+    monkeypatch.setattr(analytics_rollups, "analytics_collection", RawEvents(page_views(datetime(2024, 1, 1, 10), 1)))
+    asyncio.run(rebuild_rollups(datetime(2024, 1, 1), datetime(2024, 1, 1)))
+    assert asyncio.run(rollups.find_one({"_id": outside_id}))["count"] == 9
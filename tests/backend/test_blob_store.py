@@ -0,0 +1,97 @@
+"""Behavior tests for the reference-counted blob store in utils/blob_store.py"""
+import asyncio
+import hashlib
+import threading
+
+import pytest
+
+from utils.blob_store import BlobStore, LocalBlobBackend
+
+DATA = b"logo bytes"
+KEY = hashlib.sha256(DATA).hexdigest()
+
+
+class SlowDeleteBackend(LocalBlobBackend):
+    """Local backend whose delete waits until the test lets it finish"""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.delete_started = threading.Event()
+        self.finish_delete = threading.Event()
+
+    def delete(self, key):
+        self.delete_started.set()
+        self.finish_delete.wait(5)
+        super().delete(key)
+
+
+@pytest.fixture
+def store(mongo, tmp_path):
+    return BlobStore(LocalBlobBackend(tmp_path / "blobs"), mongo.blobs, str(tmp_path / "staging"))
+
+
+def blob_files(store):
+    return [path for path in store.backend.root.rglob("*") if path.is_file()]
+
+
+def test_the_same_content_is_stored_once(store):
+    async def scenario():
+        first = await store.store_bytes(DATA, "image/png")
+        second = await store.store_bytes(DATA, "image/png")
+        return first, second, await store.info(KEY)
+
+    first, second, doc = asyncio.run(scenario())
+    assert first.key == second.key == KEY
+    assert (first.deduplicated, second.deduplicated) == (False, True)
+    assert doc["refs"] == 2
+    assert blob_files(store) == [store.backend.path(KEY)]
+    assert list(store.staging_dir.iterdir()) == []
+
+
+def test_releasing_the_last_reference_deletes_the_blob(store):
+    async def scenario():
+        await store.store_bytes(DATA)
+        await store.store_bytes(DATA)
+        return [await store.release(KEY), await store.release(KEY), await store.info(KEY)]
+
+    assert asyncio.run(scenario()) == [False, True, None]
+    assert blob_files(store) == []
+    assert store.stats()["deleted"] == 1
+
+
+def test_releasing_the_same_reference_twice_is_a_no_op(store):
+    async def scenario():
+        await store.store_bytes(DATA)
+        await store.store_bytes(DATA)
+        # A retried cleanup job releases its file's reference again
+        await store.release(KEY, release_id="cleanup:f1")
+        await store.release(KEY, release_id="cleanup:f1")
+        return await store.info(KEY)
+
+    assert asyncio.run(scenario())["refs"] == 1
+    assert blob_files(store) == [store.backend.path(KEY)]
+
+
+def test_an_upload_during_a_delete_keeps_its_content(mongo, tmp_path):
+    backend = SlowDeleteBackend(tmp_path / "blobs")
+    store = BlobStore(backend, mongo.blobs, str(tmp_path / "staging"))
+
+    async def scenario():
+        await store.store_bytes(DATA)
+        release = asyncio.create_task(store.release(KEY))
+        while not backend.delete_started.is_set():
+            await asyncio.sleep(0.01)
+        # The blob is tombstoned and its content is being deleted
+        upload = asyncio.create_task(store.store_bytes(DATA))
+        await asyncio.sleep(0.1)
+        assert not upload.done()
+        backend.finish_delete.set()
+        return await asyncio.gather(release, upload)
+
+    deleted, stored = asyncio.run(scenario())
+    assert deleted is False
+    assert stored.deduplicated is False
+    assert backend.path(KEY).read_bytes() == DATA
+    doc = asyncio.run(store.info(KEY))
+    assert doc["refs"] == 1
+    assert "deleting" not in doc
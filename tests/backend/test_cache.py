@@ -0,0 +1,150 @@
+"""Behavior tests for the read-through content cache in utils/cache.py"""
+import asyncio
+
+import pytest
+
+from utils import cache as cache_module
+from utils.cache import AsyncTTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+class Source:
+    """Loader returning the current value, optionally held until released"""
+
+    def __init__(self, value="v1"):
+        self.value = value
+        self.calls = 0
+        self.release = None
+
+    async def load(self):
+        self.calls += 1
+        value = self.value
+        if self.release is not None:
+            await self.release.wait()
+        return value
+
+
+def test_hit_miss_and_expiry(clock):
+    cache = AsyncTTLCache(default_ttl=60)
+    source = Source()
+
+    async def scenario():
+        assert await cache.get_or_load("about", source.load) == "v1"
+        source.value = "v2"
+        assert await cache.get_or_load("about", source.load) == "v1"
+        clock.now += 61
+        assert await cache.get_or_load("about", source.load) == "v2"
+
+    asyncio.run(scenario())
+    assert source.calls == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["loads"]) == (1, 2, 2)
+
+
+def test_concurrent_misses_share_one_load(clock):
+    cache = AsyncTTLCache()
+    source = Source()
+
+    async def scenario():
+        source.release = asyncio.Event()
+        readers = [asyncio.create_task(cache.get_or_load("content", source.load)) for _ in range(20)]
+        await asyncio.sleep(0)
+        source.release.set()
+        return await asyncio.gather(*readers)
+
+    assert asyncio.run(scenario()) == ["v1"] * 20
+    assert source.calls == 1
+    assert cache.stats()["coalesced"] == 19
+
+
+def test_a_failed_load_reaches_every_waiter_and_is_not_cached(clock):
+    cache = AsyncTTLCache()
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        raise ConnectionError("mongo down")
+
+    async def scenario():
+        results = await asyncio.gather(
+            *(cache.get_or_load("pricing", failing) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(result, ConnectionError) for result in results)
+        assert await cache.get_or_load("pricing", Source("ok").load) == "ok"
+
+    asyncio.run(scenario())
+    assert calls == 1
+
+
+def test_invalidate_drops_the_value(clock):
+    cache = AsyncTTLCache()
+    source = Source()
+
+    async def scenario():
+        await cache.get_or_load("pages:home", source.load)
+        source.value = "v2"
+        cache.invalidate("pages:home")
+        return await cache.get_or_load("pages:home", source.load)
+
+    assert asyncio.run(scenario()) == "v2"
+
+
+@pytest.mark.parametrize("invalidate", [
+    lambda cache: cache.invalidate("pages:home"),
+    lambda cache: cache.invalidate_prefix("pages:"),
+    lambda cache: cache.clear(),
+])
+def test_invalidation_during_a_load_keeps_the_old_value_out(clock, invalidate):
+    cache = AsyncTTLCache()
+    source = Source("old")
+
+    async def scenario():
+        source.release = asyncio.Event()
+        reader = asyncio.create_task(cache.get_or_load("pages:home", source.load))
+        await asyncio.sleep(0)
+        # An admin write lands while the old value is being read
+        source.value = "new"
+        invalidate(cache)
+        source.release.set()
+        assert await reader == "old"
+        source.release = None
+        return await cache.get_or_load("pages:home", source.load)
+
+    assert asyncio.run(scenario()) == "new"
+    assert source.calls == 2
+
+
+def test_set_refreshes_a_key(clock):
+    cache = AsyncTTLCache()
+    cache.set("settings", {"theme": "dark"})
+    value = asyncio.run(cache.get_or_load("settings", Source().load))
+    assert value == {"theme": "dark"}
+
+
+def test_eviction_prefers_expired_then_soonest_expiring(clock):
+    cache = AsyncTTLCache(default_ttl=60, max_entries=2)
+    cache.set("a", 1, ttl=10)
+    cache.set("b", 2, ttl=100)
+    cache.set("c", 3)
+    assert set(cache._entries) == {"b", "c"}
+
+    clock.now += 200
+    cache.set("d", 4)
+    assert set(cache._entries) == {"d"}
+    assert cache.stats()["evictions"] == 3
@@ -0,0 +1,36 @@
+"""Behavior tests for the live chat hub in utils/chat_hub.py"""
+import asyncio
+
+from utils.chat_hub import ChatHub
+
+
+async def connected():
+    return False
+
+
+def test_a_stream_subscribes_when_it_starts_and_unsubscribes_when_closed():
+    hub = ChatHub(heartbeat_interval=0.01)
+
+    async def scenario():
+        stream = hub.stream("inbox", connected)
+        # A response that is never sent holds no slot
+        assert hub.subscriber_count == 0
+        assert "event: ready" in await stream.__anext__()
+        assert hub.subscriber_count == 1
+        hub.publish("inbox", {"type": "message", "n": 1})
+        assert '"n": 1' in await stream.__anext__()
+        await stream.aclose()
+        return hub.subscriber_count
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_a_full_hub_ends_the_stream():
+    hub = ChatHub(max_subscribers=1)
+
+    async def scenario():
+        hub.subscribe("inbox")
+        assert hub.full
+        return [chunk async for chunk in hub.stream("inbox", connected)]
+
+    assert asyncio.run(scenario()) == []
@@ -0,0 +1,101 @@
+"""Behavior tests for marking conversations read in utils/chat_store.py"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils import chat_store
+from utils.chat_store import mark_conversation_read
+
+
+class Conversations:
+    """conversations collection; applies array filters itself (not in mongomock)"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    async def update_one(self, filter, update, array_filters=None):
+        if array_filters is None:
+            return await self.collection.update_one(filter, update)
+        doc = await self.collection.find_one(filter)
+        if doc is None:
+            return SimpleNamespace(matched_count=0, modified_count=0)
+        [conditions] = array_filters
+        for msg in doc["messages"]:
+            if all(msg.get(key.split(".", 1)[1]) == value for key, value in conditions.items()):
+                msg["read"] = True
+        doc["unread_count"] = update["$set"]["unread_count"]
+        await self.collection.replace_one({"_id": doc["_id"]}, doc)
+        return SimpleNamespace(matched_count=1, modified_count=1)
+
+
+@pytest.fixture
+def store(mongo, monkeypatch):
+    monkeypatch.setattr(chat_store, "conversations_collection", Conversations(mongo.conversations))
+    monkeypatch.setattr(chat_store, "chat_messages_collection", mongo.chat_messages)
+    return mongo
+
+
+def message(n, sender="customer", read=False, conversation_id="c1"):
+    return {"id": f"m{n}", "conversation_id": conversation_id, "sender": sender, "read": read, "message": "hi"}
+
+
+def unread_count(store, conversation_id="c1"):
+    return asyncio.run(store.conversations.find_one({"id": conversation_id}))["unread_count"]
+
+
+def test_marks_customer_messages_read(store):
+    asyncio.run(store.conversations.insert_one({"id": "c1", "unread_count": 2}))
+    asyncio.run(store.chat_messages.insert_many([
+        message(1), message(2), message(3, sender="admin"), message(4, conversation_id="c2"),
+    ]))
+
+    assert asyncio.run(mark_conversation_read("c1")) is True
+    assert unread_count(store) == 0
+    unread = asyncio.run(store.chat_messages.find({"read": False}, {"_id": 0, "id": 1}).to_list(None))
+    # Admin messages and other conversations are left alone
+    assert sorted(doc["id"] for doc in unread) == ["m3", "m4"]
+
+
+def test_a_message_landing_concurrently_stays_counted(store):
+    # The counter already includes a message that was not in the store when the flip ran
+    asyncio.run(store.conversations.insert_one({"id": "c1", "unread_count": 3}))
+    asyncio.run(store.chat_messages.insert_many([message(1), message(2)]))
+
+    asyncio.run(mark_conversation_read("c1"))
+    assert unread_count(store) == 1
+
+    # Nothing left to flip: the counter is untouched
+    asyncio.run(mark_conversation_read("c1"))
+    assert unread_count(store) == 1
+
+
+def test_unread_count_never_goes_below_zero(store):
+    asyncio.run(store.conversations.insert_one({"id": "c1", "unread_count": 0}))
+    asyncio.run(store.chat_messages.insert_many([message(1), message(2)]))
+    asyncio.run(mark_conversation_read("c1"))
+    assert unread_count(store) == 0
+
+
+def test_missing_conversation(store):
+    assert asyncio.run(mark_conversation_read("nope")) is False
+
+
+def test_legacy_conversation_is_flipped_in_place(store):
+    asyncio.run(store.conversations.insert_one({
+        "id": "c1",
+        "unread_count": 1,
+        "messages": [
+            {"id": "m1", "sender": "customer", "read": False},
+            {"id": "m2", "sender": "admin", "read": False},
+        ],
+    }))
+
+    assert asyncio.run(mark_conversation_read("c1")) is True
+    doc = asyncio.run(store.conversations.find_one({"id": "c1"}))
+    assert doc["unread_count"] == 0
+    assert [msg["read"] for msg in doc["messages"]] == [True, False]
+    assert asyncio.run(store.chat_messages.count_documents({})) == 0
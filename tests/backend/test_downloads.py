@@ -0,0 +1,51 @@
+"""Unit tests for ``Range`` header parsing in utils/downloads.py"""
+import pytest
+
+from utils.downloads import RangeNotSatisfiable, parse_range
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=999-999", (999, 999)),
+    ("BYTES = 10-20", (10, 20)),
+])
+def test_explicit_ranges(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=-100", (900, 999)),
+    ("bytes=-1", (999, 999)),
+    # A suffix longer than the file is the whole file
+    ("bytes=-5000", (0, 999)),
+])
+def test_suffix_ranges(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", 1000),
+    ("bytes=1500-2000", 1000),
+    ("bytes=-0", 1000),
+    ("bytes=-10", 0),
+    ("bytes=0-", 0),
+])
+def test_unsatisfiable_ranges(header, size):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, size)
+
+
+@pytest.mark.parametrize("header", [
+    "bytes=0-10,20-30",
+    "bytes=-10, 0-5",
+    "items=0-10",
+    "bytes=10",
+    "bytes=a-b",
+    "bytes=-x",
+    "bytes=50-10",
+    "",
+])
+def test_ignored_headers_send_the_full_file(header):
+    assert parse_range(header, 1000) is None
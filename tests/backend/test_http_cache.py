@@ -0,0 +1,111 @@
+"""Behavior tests for conditional GET handling in utils/http_cache.py"""
+from datetime import datetime
+
+import pytest
+from fastapi import Request, Response
+
+from utils.http_cache import (
+    PUBLIC_DETAIL_POLICY,
+    PUBLIC_LIST_POLICY,
+    CachePolicy,
+    ConditionalGet,
+    documents_etag,
+    documents_last_modified,
+)
+
+SERVICE = {"_id": "x", "id": "s1", "title": "Design", "updated_at": "2024-03-01T10:00:00.500000"}
+SERVICES = [
+    {"id": "s1", "title": "Design", "updated_at": "2024-03-01T10:00:00"},
+    {"id": "s2", "title": "Build", "updated_at": "2024-02-01T10:00:00"},
+]
+
+
+def conditional(headers=None, policy=PUBLIC_DETAIL_POLICY) -> ConditionalGet:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+    }
+    return ConditionalGet(Request(scope), Response(), policy)
+
+
+def test_validators_for_a_document():
+    cache = conditional()
+    assert not cache.is_fresh(SERVICE)
+    assert cache.response.headers["etag"] == documents_etag(SERVICE)
+    assert cache.response.headers["etag"].startswith('W/"')
+    assert cache.response.headers["last-modified"] == "Fri, 01 Mar 2024 10:00:00 GMT"
+    assert cache.response.headers["cache-control"] == "public, max-age=300, s-maxage=900, stale-while-revalidate=300"
+
+
+@pytest.mark.parametrize("if_none_match, fresh", [
+    (None, True),
+    ("*", True),
+    ('"other", {etag}', True),
+    ("{strong}", True),
+    ('W/"other"', False),
+])
+def test_if_none_match(if_none_match, fresh):
+    etag = documents_etag(SERVICE)
+    header = (if_none_match or etag).format(etag=etag, strong=etag[2:])
+    assert conditional({"If-None-Match": header}).is_fresh(SERVICE) is fresh
+
+
+def test_if_none_match_wins_over_if_modified_since():
+    headers = {"If-None-Match": 'W/"other"', "If-Modified-Since": "Fri, 01 Mar 2030 10:00:00 GMT"}
+    assert not conditional(headers).is_fresh(SERVICE)
+
+
+@pytest.mark.parametrize("since, fresh", [
+    ("Fri, 01 Mar 2024 10:00:00 GMT", True),
+    ("Sat, 02 Mar 2024 00:00:00 GMT", True),
+    ("Fri, 01 Mar 2024 09:59:59 GMT", False),
+    ("not a date", False),
+])
+def test_if_modified_since_for_a_document(since, fresh):
+    assert conditional({"If-Modified-Since": since}).is_fresh(SERVICE) is fresh
+
+
+def test_lists_have_no_last_modified():
+    cache = conditional(policy=PUBLIC_LIST_POLICY)
+    assert not cache.is_fresh(SERVICES)
+    assert "etag" in cache.response.headers
+    assert "last-modified" not in cache.response.headers
+
+
+def test_a_deleted_list_item_is_not_answered_with_304():
+    # The client cached the list before s2 was deleted; s1 is still the newest
+    cached = conditional(policy=PUBLIC_LIST_POLICY)
+    cached.is_fresh(SERVICES)
+    headers = {"If-Modified-Since": "Fri, 01 Mar 2024 10:00:00 GMT"}
+    assert not conditional(headers, PUBLIC_LIST_POLICY).is_fresh(SERVICES[:1])
+    headers = {"If-None-Match": cached.headers["ETag"]}
+    assert not conditional(headers, PUBLIC_LIST_POLICY).is_fresh(SERVICES[:1])
+    assert conditional(headers, PUBLIC_LIST_POLICY).is_fresh(SERVICES)
+
+
+def test_etag_follows_content_without_updated_at():
+    skills = [{"_id": "a", "name": "Python", "level": 90}]
+    changed = [{"_id": "b", "name": "Python", "level": 95}]
+    assert documents_etag(skills) == documents_etag([{"_id": "c", "name": "Python", "level": 90}])
+    assert documents_etag(skills) != documents_etag(changed)
+    assert documents_last_modified(skills) is None
+
+
+def test_last_modified_is_the_newest_timestamp():
+    assert documents_last_modified(SERVICES).replace(tzinfo=None) == datetime(2024, 3, 1, 10)
+    assert documents_last_modified(SERVICES + [{"id": "s3"}]) is None
+
+
+def test_not_modified_repeats_the_validators():
+    cache = conditional({"If-None-Match": documents_etag(SERVICE)})
+    assert cache.is_fresh(SERVICE)
+    response = cache.not_modified()
+    assert response.status_code == 304
+    assert response.headers["etag"] == documents_etag(SERVICE)
+    assert response.body == b""
+
+
+def test_private_policy():
+    assert CachePolicy(max_age=0, s_maxage=60, private=True).header() == "private, max-age=0"
@@ -0,0 +1,117 @@
+"""Tests for the retry backoff and the job queue in utils/jobs.py"""
+import asyncio
+from datetime import datetime
+
+import pytest
+from conftest import ProjectingCollection
+
+from utils import jobs
+from utils.jobs import JobQueue, backoff_delay
+
+
+@pytest.fixture
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(jobs.random, "uniform", lambda low, high: 1.0)
+
+
+@pytest.mark.parametrize("attempts, expected", [
+    (1, 10.0),
+    (2, 20.0),
+    (3, 40.0),
+    (6, 320.0),
+    # Capped at the maximum
+    (10, 1000.0),
+    (60, 1000.0),
+])
+def test_backoff_doubles_up_to_the_maximum(no_jitter, attempts, expected):
+    assert backoff_delay(attempts, base=10.0, maximum=1000.0) == expected
+
+
+@pytest.mark.parametrize("pick, factor", [(min, 0.8), (max, 1.2)])
+def test_backoff_jitter_bounds(monkeypatch, pick, factor):
+    monkeypatch.setattr(jobs.random, "uniform", lambda low, high: pick(low, high))
+    assert backoff_delay(3, base=10.0, maximum=1000.0) == pytest.approx(40.0 * factor)
+
+
+def test_backoff_jitter_stays_within_twenty_percent():
+    delays = [backoff_delay(4, base=10.0, maximum=1000.0) for _ in range(500)]
+    assert all(64.0 <= delay <= 96.0 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+@pytest.fixture
+def queue(mongo):
+    asyncio.run(mongo.jobs.create_index("idempotency_key", unique=True, sparse=True))
+    return JobQueue(ProjectingCollection(mongo.jobs), max_attempts=2)
+
+
+def run_next(queue):
+    async def scenario():
+        job = await queue._claim()
+        await queue.run_job(job)
+        return await queue.collection.find_one({"id": job["id"]}, {"_id": 0})
+
+    return asyncio.run(scenario())
+
+
+def test_an_idempotency_key_queues_one_job(queue):
+    async def scenario():
+        first = await queue.enqueue("email", {"to": "a"}, idempotency_key="welcome:a")
+        second = await queue.enqueue("email", {"to": "a"}, idempotency_key="welcome:a")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first["id"] == second["id"]
+    assert (queue.enqueued, queue.deduplicated) == (1, 1)
+
+
+def test_a_job_runs_through_its_handler(queue):
+    seen = []
+
+    @queue.handler("email")
+    async def send(payload):
+        seen.append(payload)
+
+    asyncio.run(queue.enqueue("email", {"to": "a"}))
+    job = run_next(queue)
+    assert seen == [{"to": "a"}]
+    assert job["status"] == "done"
+    assert "lease_until" not in job
+    assert isinstance(job["expires_at"], datetime)
+
+
+def test_a_failing_job_is_retried_then_parked_as_dead(queue, monkeypatch):
+    monkeypatch.setattr(jobs, "backoff_delay", lambda attempts: 0)
+
+    @queue.handler("cleanup")
+    async def cleanup(payload):
+        raise OSError("disk busy")
+
+    asyncio.run(queue.enqueue("cleanup", {}))
+    job = run_next(queue)
+    assert (job["status"], job["attempts"]) == ("pending", 1)
+    assert job["last_error"] == "OSError: disk busy"
+
+    job = run_next(queue)
+    assert (job["status"], job["attempts"]) == ("dead", 2)
+    assert [dead["id"] for dead in asyncio.run(queue.dead_letters())] == [job["id"]]
+
+    retried = asyncio.run(queue.retry(job["id"]))
+    assert (retried["status"], retried["attempts"]) == ("pending", 0)
+
+
+def test_an_outcome_after_the_lease_was_lost_is_discarded(queue):
+    @queue.handler("email")
+    async def send(payload):
+        # Meanwhile the lease ran out and another worker claimed the job
+        await queue.collection.update_many({}, {"$set": {"lease_until": "newer claim"}})
+
+    asyncio.run(queue.enqueue("email", {}))
+    job = run_next(queue)
+    assert job["status"] == "running"
+    assert queue.succeeded == 0
+
+
+def test_jobs_without_a_handler_are_left_queued(queue):
+    asyncio.run(queue.enqueue("unknown", {}))
+    assert asyncio.run(queue._claim()) is None
@@ -0,0 +1,57 @@
+"""Behavior tests for proxy header handling in middleware.py"""
+import asyncio
+import importlib
+
+import pytest
+
+import middleware
+from middleware import HTTPStackMiddleware
+
+
+async def echo_scheme(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": f"{scope['scheme']} {scope['server'][0]}".encode()})
+
+
+def call(stack):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "scheme": "http",
+        "server": ("app", 8001),
+        "headers": [(b"x-forwarded-proto", b"https"), (b"x-forwarded-host", b"example.com")],
+    }
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(stack(scope, None, send))
+    start, body = messages
+    return body["body"].decode(), {name: value for name, value in start["headers"]}
+
+
+def test_forwarded_headers_are_ignored_without_a_trusted_proxy():
+    seen, headers = call(HTTPStackMiddleware(echo_scheme, proxy_headers=False, log_requests=False))
+    assert seen == "http app"
+    assert b"strict-transport-security" not in headers
+
+
+def test_forwarded_headers_behind_a_trusted_proxy():
+    seen, headers = call(HTTPStackMiddleware(echo_scheme, proxy_headers=True, log_requests=False))
+    assert seen == "https example.com"
+    assert headers[b"strict-transport-security"].startswith(b"max-age=")
+
+
+@pytest.mark.parametrize("value, expected", [("true", True), ("false", False), (None, False)])
+def test_trust_proxy_setting(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv("TRUST_PROXY", raising=False)
+    else:
+        monkeypatch.setenv("TRUST_PROXY", value)
+    try:
+        assert importlib.reload(middleware).TRUST_PROXY is expected
+    finally:
+        monkeypatch.delenv("TRUST_PROXY", raising=False)
+        importlib.reload(middleware)
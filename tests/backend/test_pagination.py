@@ -0,0 +1,52 @@
+"""Unit tests for the keyset cursors in utils/pagination.py"""
+import base64
+
+import pytest
+
+from utils.pagination import clamp_limit, decode_cursor, encode_cursor, position_filter
+
+
+@pytest.mark.parametrize("sort_value, doc_id", [
+    ("2024-05-01T12:00:00.123456", "0b6f7c2e-2f7a-4a4e-9d3b-3f1c5b0e8a11"),
+    ("", ""),
+    ("naïve – ünïcode", "id|with|pipes"),
+])
+def test_cursor_round_trip(sort_value, doc_id):
+    cursor = encode_cursor(sort_value, doc_id)
+    assert decode_cursor(cursor) == (sort_value, doc_id)
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor("?" * 30, ">" * 30)
+    assert not set(cursor) & {"+", "/"}
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    "é",
+    base64.urlsafe_b64encode(b"no separator").decode("ascii"),
+    base64.urlsafe_b64encode(b"\xff\xfe|x").decode("ascii"),
+])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+def test_position_filter():
+    cursor = encode_cursor("2024-05-01", "abc")
+    assert position_filter(cursor, "$lt", "created_at") == {"$or": [
+        {"created_at": {"$lt": "2024-05-01"}},
+        {"created_at": "2024-05-01", "id": {"$lt": "abc"}},
+    ]}
+
+
+@pytest.mark.parametrize("limit, expected", [
+    (None, 50),
+    (0, 50),
+    (-3, 50),
+    (1, 1),
+    (200, 200),
+    (10000, 500),
+])
+def test_clamp_limit(limit, expected):
+    assert clamp_limit(limit, 50, 500) == expected
@@ -0,0 +1,97 @@
+"""Behavior tests for bcrypt hashing off the event loop in auth/password.py"""
+import asyncio
+import threading
+
+import bcrypt
+import pytest
+from fastapi import HTTPException
+
+from auth import password
+from auth.password import PasswordHasher, needs_rehash, verify_password_and_rehash
+
+
+@pytest.fixture(autouse=True)
+def cheap_rounds(monkeypatch):
+    monkeypatch.setattr(password, "BCRYPT_ROUNDS", 4)
+
+
+def hashed(secret, rounds):
+    return bcrypt.hashpw(secret.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+
+
+def test_hash_and_verify_on_the_pool():
+    async def scenario():
+        stored = await password.hash_password_async("s3cret")
+        checks = [await password.verify_password_async(guess, stored) for guess in ("s3cret", "wrong")]
+        return stored, checks
+
+    stored, (right, wrong) = asyncio.run(scenario())
+    assert stored.startswith("$2b$04$")
+    assert (right, wrong) == (True, False)
+
+
+def test_needs_rehash_compares_the_cost():
+    assert not needs_rehash(hashed("x", 4))
+    assert needs_rehash(hashed("x", 5))
+    assert not needs_rehash("not a bcrypt hash")
+
+
+def test_login_upgrades_the_cost(monkeypatch):
+    old = hashed("s3cret", 5)
+    ok, new_hash = asyncio.run(verify_password_and_rehash("s3cret", old))
+    assert ok
+    assert new_hash.startswith("$2b$04$")
+    assert bcrypt.checkpw(b"s3cret", new_hash.encode())
+
+    assert asyncio.run(verify_password_and_rehash("wrong", old)) == (False, None)
+    assert asyncio.run(verify_password_and_rehash("s3cret", hashed("s3cret", 4))) == (True, None)
+
+    monkeypatch.setattr(password, "BCRYPT_REHASH_ON_LOGIN", False)
+    assert asyncio.run(verify_password_and_rehash("s3cret", old)) == (True, None)
+
+
+def test_a_full_queue_is_turned_away():
+    hasher = PasswordHasher(threads=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        busy = asyncio.ensure_future(hasher.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        # The one thread is busy; one waiter fits in the queue
+        waiting = asyncio.ensure_future(hasher.run(lambda: "done"))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as rejected:
+            await hasher.run(lambda: "too many")
+        release.set()
+        return rejected.value, await waiting, await busy
+
+    rejected, waited, _ = asyncio.run(scenario())
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"] == "1"
+    assert waited == "done"
+    stats = hasher.stats()
+    assert (stats["rejected"], stats["completed"], stats["queue_depth"]) == (1, 2, 0)
+
+
+def test_a_cancelled_request_skips_work_that_has_not_started():
+    hasher = PasswordHasher(threads=1, max_queue=4)
+    release = threading.Event()
+    ran = []
+
+    async def scenario():
+        busy = asyncio.ensure_future(hasher.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(hasher.run(ran.append, "hashed"))
+        await asyncio.sleep(0)
+        # The client went away while waiting for a thread
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        assert hasher.queued == 0
+        release.set()
+        await busy
+        # Let the pool pick up (and skip) the cancelled call
+        await asyncio.get_running_loop().run_in_executor(hasher._executor, lambda: None)
+
+    asyncio.run(scenario())
+    assert ran == []
+    assert hasher.completed == 1
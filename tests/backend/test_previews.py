@@ -0,0 +1,125 @@
+"""Behavior tests for the preview worker pool in utils/previews.py"""
+import asyncio
+import io
+from datetime import datetime, timedelta
+
+import pytest
+from conftest import ProjectingCollection
+
+from utils import previews
+from utils.blob_store import BlobStore, LocalBlobBackend
+from utils.previews import PreviewWorkerPool
+
+PIL = pytest.importorskip("PIL.Image")
+
+
+def png_bytes() -> bytes:
+    buffer = io.BytesIO()
+    PIL.new("RGB", (64, 48), (200, 30, 30)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def blobs(mongo, tmp_path, monkeypatch):
+    store = BlobStore(LocalBlobBackend(tmp_path / "blobs"), mongo.blobs, str(tmp_path / "staging"))
+    monkeypatch.setattr(previews, "blob_store", store)
+    return store
+
+
+@pytest.fixture
+def pool(mongo, blobs, monkeypatch):
+    monkeypatch.setattr(previews, "client_projects_collection", mongo.projects)
+    return PreviewWorkerPool(ProjectingCollection(mongo.preview_jobs), workers=1, max_attempts=2, job_timeout=60)
+
+
+def upload_file(mongo, blobs, file_id="f1", content_type="image/png"):
+    stored = asyncio.run(blobs.store_bytes(png_bytes(), content_type))
+    file_info = {"id": file_id, "blob_key": stored.key, "file_type": content_type}
+    asyncio.run(mongo.projects.update_one({"id": "p1"}, {"$push": {"files": file_info}}, upsert=True))
+    return file_info
+
+
+def live_refs(mongo):
+    return {doc["_id"]: doc["refs"] for doc in asyncio.run(mongo.blobs.find().to_list(None))}
+
+
+def test_enqueue_only_previewable_files(pool, mongo):
+    async def scenario():
+        await pool.enqueue("p1", {"id": "f1", "blob_key": "k1", "file_type": "image/png"})
+        await pool.enqueue("p1", {"id": "f2", "blob_key": "k2", "file_type": "application/pdf"})
+        skipped = [
+            await pool.enqueue("p1", {"id": "f3", "blob_key": "k3", "file_type": "image/svg+xml"}),
+            await pool.enqueue("p1", {"id": "f4", "blob_key": "k4", "file_type": "text/plain"}),
+            await pool.enqueue("p1", {"id": "f5", "file_type": "image/png"}),
+        ]
+        await pool.discard("p1", "f2")
+        return skipped, await mongo.preview_jobs.distinct("file_id")
+
+    skipped, queued = asyncio.run(scenario())
+    assert skipped == [None, None, None]
+    assert queued == ["f1"]
+
+
+def test_a_claimed_job_attaches_its_previews(pool, mongo, blobs):
+    file_info = upload_file(mongo, blobs)
+
+    async def scenario():
+        await pool.enqueue("p1", file_info)
+        await pool.process(await pool._claim())
+        return await mongo.projects.find_one({"id": "p1"}), await mongo.preview_jobs.find_one({})
+
+    project, job = asyncio.run(scenario())
+    [entry] = project["files"]
+    assert job["status"] == "done"
+    assert (entry["thumbnail_key"], entry["preview_key"]) == (job["thumbnail_key"], job["preview_key"])
+    assert blobs.local_path(entry["thumbnail_key"]).read_bytes()[:2] == b"\xff\xd8"
+    assert pool.generated == 1
+
+
+def test_a_reclaimed_job_drops_its_result(pool, mongo, blobs):
+    file_info = upload_file(mongo, blobs)
+
+    async def scenario():
+        await pool.enqueue("p1", file_info)
+        job = await pool._claim()
+        # The render ran past the timeout: the job was put back and claimed again
+        await mongo.preview_jobs.update_one({"id": job["id"]}, {"$set": {"started_at": "later"}})
+        await pool.process(job)
+        return await mongo.projects.find_one({"id": "p1"}), await mongo.preview_jobs.find_one({})
+
+    project, job = asyncio.run(scenario())
+    assert "thumbnail_key" not in project["files"][0]
+    assert job["status"] == "running"
+    # Only the original upload is still referenced
+    assert live_refs(mongo) == {file_info["blob_key"]: 1}
+
+
+def test_a_file_deleted_while_rendering_releases_the_previews(pool, mongo, blobs):
+    file_info = upload_file(mongo, blobs)
+
+    async def scenario():
+        await pool.enqueue("p1", file_info)
+        job = await pool._claim()
+        await mongo.projects.update_one({"id": "p1"}, {"$pull": {"files": {"id": "f1"}}})
+        await pool.process(job)
+        return await mongo.preview_jobs.find_one({})
+
+    job = asyncio.run(scenario())
+    assert job["status"] == "skipped"
+    assert job["thumbnail_key"] is None
+    assert live_refs(mongo) == {file_info["blob_key"]: 1}
+
+
+def test_recover_stale_requeues_and_fails_exhausted_jobs(pool, mongo):
+    long_ago = (datetime.utcnow() - timedelta(seconds=120)).isoformat()
+    recently = datetime.utcnow().isoformat()
+    asyncio.run(mongo.preview_jobs.insert_many([
+        {"id": "retry", "status": "running", "attempts": 1, "started_at": long_ago},
+        {"id": "exhausted", "status": "running", "attempts": 2, "started_at": long_ago},
+        {"id": "busy", "status": "running", "attempts": 1, "started_at": recently},
+    ]))
+
+    assert asyncio.run(pool.recover_stale()) == 2
+    statuses = {doc["id"]: doc["status"] for doc in asyncio.run(mongo.preview_jobs.find().to_list(None))}
+    assert statuses == {"retry": "pending", "exhausted": "failed", "busy": "running"}
+    assert pool.failed == 1
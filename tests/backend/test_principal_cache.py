@@ -0,0 +1,101 @@
+"""Behavior tests for the cached admin and client lookups in auth/principal_cache.py"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from auth import admin_auth, client_auth, principal_cache
+from auth.jwt import create_access_token
+from auth.principal_cache import invalidate_admin, invalidate_client
+from utils.cache import AsyncTTLCache
+
+ADMIN_HEADER = f"Bearer {create_access_token({'id': 'a1'})}"
+CLIENT_HEADER = f"Bearer {create_access_token({'id': 'c1', 'type': 'client'})}"
+
+
+class CountingCollection:
+    def __init__(self, collection):
+        self.collection = collection
+        self.reads = 0
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    async def find_one(self, *args, **kwargs):
+        self.reads += 1
+        return await self.collection.find_one(*args, **kwargs)
+
+
+@pytest.fixture
+def accounts(mongo, monkeypatch):
+    cache = AsyncTTLCache(default_ttl=30)
+    for module in (principal_cache, admin_auth, client_auth):
+        monkeypatch.setattr(module, "principal_cache", cache)
+    admins = CountingCollection(mongo.admins)
+    monkeypatch.setattr(admin_auth, "admins_collection", admins)
+    monkeypatch.setattr(client_auth, "clients_collection", mongo.clients)
+    asyncio.run(mongo.admins.insert_one(
+        {"id": "a1", "username": "ops", "role": "admin", "permissions": {"canAccessChat": True}}
+    ))
+    asyncio.run(mongo.clients.insert_one(
+        {"id": "c1", "name": "Acme", "email": "a@acme.test", "is_active": True}
+    ))
+    return mongo, admins
+
+
+def current_admin():
+    return asyncio.run(admin_auth.get_current_admin(ADMIN_HEADER))
+
+
+def current_client():
+    return asyncio.run(client_auth.get_current_client(CLIENT_HEADER))
+
+
+def test_an_admin_is_read_once(accounts):
+    _, admins = accounts
+    first = current_admin()
+    # Callers get their own copy of the cached principal
+    first["role"] = "super_admin"
+    assert current_admin()["role"] == "admin"
+    assert admins.reads == 1
+
+
+def test_an_admin_update_applies_after_invalidation(accounts):
+    mongo, admins = accounts
+    current_admin()
+    asyncio.run(mongo.admins.update_one({"id": "a1"}, {"$set": {"permissions": {}}}))
+    assert current_admin()["permissions"] == {"canAccessChat": True}
+
+    invalidate_admin("a1")
+    assert current_admin()["permissions"] == {}
+    assert admins.reads == 2
+
+
+def test_a_deleted_admin_is_refused_after_invalidation(accounts):
+    mongo, _ = accounts
+    current_admin()
+    asyncio.run(mongo.admins.delete_one({"id": "a1"}))
+    invalidate_admin("a1")
+    with pytest.raises(HTTPException) as refused:
+        current_admin()
+    assert refused.value.status_code == 401
+
+
+def test_a_missing_admin_is_not_cached(accounts):
+    mongo, _ = accounts
+    asyncio.run(mongo.admins.delete_one({"id": "a1"}))
+    with pytest.raises(HTTPException):
+        current_admin()
+    asyncio.run(mongo.admins.insert_one({"id": "a1", "username": "ops", "role": "admin"}))
+    assert current_admin()["id"] == "a1"
+
+
+def test_a_deactivated_client_is_refused_after_invalidation(accounts):
+    mongo, _ = accounts
+    client = current_client()
+    assert "is_active" not in client
+    asyncio.run(mongo.clients.update_one({"id": "c1"}, {"$set": {"is_active": False}}))
+    invalidate_client("c1")
+    with pytest.raises(HTTPException) as refused:
+        current_client()
+    assert refused.value.status_code == 403
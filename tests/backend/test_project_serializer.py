@@ -0,0 +1,127 @@
+"""Unit tests for the client project converter in utils/project_serializer.py"""
+import json
+from datetime import date, datetime
+
+import pytest
+
+from schemas.client_project import ClientProjectResponse
+from utils import project_serializer
+from utils.project_serializer import (
+    ADMIN_PROJECTS_PATH,
+    FILE_FIELDS,
+    TASK_FIELDS,
+    ProjectJSONResponse,
+    convert_entries,
+    convert_entry,
+    convert_project_to_response,
+)
+
+
+def make_project(**fields):
+    project = {
+        "_id": "mongo-id",
+        "id": "p1",
+        "name": "Website",
+        "client_id": "c1",
+        "status": "in_progress",
+        "progress": 40,
+        "start_date": date(2024, 1, 15),
+        "created_at": datetime(2024, 1, 1, 9, 30),
+        "updated_at": "2024-02-01T10:00:00",
+        "last_activity_at": "2024-02-02T10:00:00",
+        "milestones": [{"id": "m1", "title": "Design", "due_date": date(2024, 2, 1)}],
+        "tasks": [{"id": "t1", "title": "Wireframes", "created_at": "2024-01-02T00:00:00"}],
+        "files": [
+            {"id": "f1", "filename": "logo.png", "file_path": "blob:abc", "uploaded_by": "a1",
+             "uploaded_at": "2024-01-03T00:00:00", "thumbnail_key": "t-key", "preview_key": "p-key"},
+            {"id": "f2", "filename": "notes.txt", "file_path": "blob:def", "uploaded_by": "a1",
+             "uploaded_at": "2024-01-04T00:00:00"},
+        ],
+        "activity_log": [{"id": "a1", "action": "created", "timestamp": "2024-01-01T09:30:00"}],
+        "budget": {"total_amount": 5000.0, "paid_amount": 1000.0},
+        "tags": ["web"],
+    }
+    project.update(fields)
+    return project
+
+
+def test_converted_project_matches_the_response_model():
+    converted = convert_project_to_response(make_project())
+    assert ClientProjectResponse(**converted).model_dump(mode="json") == json.loads(
+        ProjectJSONResponse(converted).body
+    )
+
+
+def test_field_order_follows_the_response_model():
+    converted = convert_project_to_response(make_project())
+    assert list(converted) == list(ClientProjectResponse.model_fields)
+
+
+def test_values_are_converted():
+    converted = convert_project_to_response(make_project())
+    assert "_id" not in converted
+    assert converted["start_date"] == "2024-01-15"
+    assert converted["created_at"] == "2024-01-01T09:30:00"
+    assert converted["milestones"][0]["due_date"] == "2024-02-01"
+    assert converted["budget"] == {
+        "total_amount": 5000.0, "currency": "USD", "paid_amount": 1000.0,
+        "pending_amount": 0.0, "payment_terms": None,
+    }
+
+
+def test_legacy_documents_get_defaults():
+    converted = convert_project_to_response({"id": "old", "tasks": [{"title": "untitled"}, {}]})
+    assert converted["name"] == ""
+    assert converted["status"] == "pending"
+    assert converted["priority"] == "medium"
+    assert converted["progress"] == 0
+    assert converted["budget"] is None
+    assert converted["tags"] == []
+    assert converted["comments"] == []
+    # Entries without ids get their position
+    assert [task["id"] for task in converted["tasks"]] == ["0", "1"]
+    assert converted["tasks"][1]["status"] == "todo"
+    # Missing timestamps all get the same conversion time
+    assert converted["created_at"] == converted["tasks"][0]["created_at"]
+    datetime.fromisoformat(converted["created_at"])
+
+
+def test_stored_none_gets_the_default():
+    entry = convert_entry(TASK_FIELDS, {"id": "t1", "title": None, "priority": None})
+    assert entry["title"] == ""
+    assert entry["priority"] == "medium"
+
+
+@pytest.mark.parametrize("projects_path, expected", [
+    (None, "/api/client/projects/p1/files/f1"),
+    (ADMIN_PROJECTS_PATH, "/api/admin/client-projects/p1/files/f1"),
+])
+def test_preview_urls_follow_the_audience(projects_path, expected):
+    project = make_project()
+    converted = (
+        convert_project_to_response(project)
+        if projects_path is None else convert_project_to_response(project, projects_path)
+    )
+    with_previews, without_previews = converted["files"]
+    assert with_previews["thumbnail_url"] == f"{expected}/thumbnail"
+    assert with_previews["preview_url"] == f"{expected}/preview"
+    assert without_previews["thumbnail_url"] is None
+    assert without_previews["preview_url"] is None
+    assert "thumbnail_key" not in with_previews
+
+
+def test_preview_urls_need_a_files_path():
+    [entry] = convert_entries(FILE_FIELDS, [{"id": "f1", "thumbnail_key": "k"}])
+    assert entry["thumbnail_url"] is None
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_json_response_encoders(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(project_serializer, "orjson", None)
+    elif project_serializer.orjson is None:
+        pytest.skip("orjson is not installed")
+    content = {"name": "Café", "progress": 40, "budget": None, "tags": ["a"]}
+    response = ProjectJSONResponse(content)
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == content
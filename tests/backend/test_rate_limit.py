@@ -0,0 +1,183 @@
+"""Unit tests for the sliding-window and token bucket math in utils/rate_limit.py"""
+import asyncio
+import math
+
+import pytest
+
+from utils import rate_limit
+from utils.rate_limit import (
+    ADMIN_READ_POLICY,
+    ANALYTICS_EVENT_POLICY,
+    DEFAULT_POLICY,
+    PUBLIC_WRITE_POLICY,
+    MemoryBucketStore,
+    RateLimiter,
+    _evaluate,
+    _take,
+    per_minute,
+)
+
+
+def _count_after(current: int, previous: int, elapsed: float, window: float, wait: float) -> float:
+    """Weighted count of one more event ``wait`` seconds later"""
+    offset = elapsed * window + wait
+    if offset < window:
+        previous, current, elapsed = previous, current, offset / window
+    elif offset < 2 * window:
+        previous, current, elapsed = current, 0, offset / window - 1
+    else:
+        previous, current, elapsed = 0, 0, 0.0
+    return previous * (1 - elapsed) + current + 1
+
+
+# ---------------- SLIDING WINDOW ----------------
+def test_evaluate_within_limit():
+    result = _evaluate(3, 4, 0.5, limit=10, window=60)
+    assert result.allowed
+    assert result.count == 5
+    assert result.retry_after == 0
+
+
+def test_evaluate_weights_the_previous_window():
+    # 10 events last window, a quarter of this one gone: 7.5 + 3
+    assert not _evaluate(3, 10, 0.25, limit=10, window=60).allowed
+    assert _evaluate(3, 10, 0.9, limit=10, window=60).allowed
+
+
+@pytest.mark.parametrize("current, previous, elapsed, limit, window", [
+    # Over the limit in this window alone: wait for the next one
+    (11, 0, 0.1, 10, 60),
+    (20, 5, 0.5, 10, 60),
+    (10, 10, 0.99, 10, 900),
+    # Only over because of the previous window: wait for it to decay
+    (2, 20, 0.1, 10, 60),
+    (9, 10, 0.2, 10, 300),
+    (1, 100, 0.0, 5, 60),
+])
+def test_evaluate_retry_after_is_enough(current, previous, elapsed, limit, window):
+    result = _evaluate(current, previous, elapsed, limit, window)
+    assert not result.allowed
+    assert result.retry_after >= 1
+    # Retrying after Retry-After seconds is allowed
+    assert _count_after(current, previous, elapsed, window, result.retry_after) <= limit + 1e-9
+
+
+def test_evaluate_retry_after_is_not_excessive():
+    current, previous, elapsed, limit, window = 2, 20, 0.1, 10, 60
+    result = _evaluate(current, previous, elapsed, limit, window)
+    # One second earlier would still have been rejected
+    assert _count_after(current, previous, elapsed, window, result.retry_after - 1) > limit
+
+
+# ---------------- TOKEN BUCKETS ----------------
+POLICY = per_minute("test", 60, 5)
+
+
+def test_per_minute():
+    assert POLICY.rate == 1.0
+    assert POLICY.burst == 5
+
+
+def test_take_with_tokens_left():
+    allowed, tokens, result = _take(2.5, POLICY)
+    assert allowed
+    assert tokens == 1.5
+    assert result == (True, 1, 0)
+
+
+@pytest.mark.parametrize("tokens, rate", [(0.0, 1.0), (0.5, 1.0), (0.99, 0.1), (0.0, 10 / 60)])
+def test_take_retry_after_refills_one_token(tokens, rate):
+    policy = rate_limit.RateLimitPolicy("test", rate, 5)
+    allowed, left, result = _take(tokens, policy)
+    assert not allowed
+    assert left == tokens
+    assert result.remaining == 0
+    assert result.retry_after == max(1, math.ceil((1 - tokens) / rate))
+    assert tokens + result.retry_after * rate >= 1
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+def test_memory_bucket_burst_then_refill(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    store = MemoryBucketStore()
+
+    async def take():
+        return await store.take("ip", POLICY)
+
+    results = [asyncio.run(take()) for _ in range(POLICY.burst)]
+    assert [result.remaining for result in results] == [4, 3, 2, 1, 0]
+    rejected = asyncio.run(take())
+    assert not rejected.allowed
+    assert rejected.retry_after == 1
+
+    clock.now += rejected.retry_after
+    assert asyncio.run(take()).allowed
+    assert not asyncio.run(take()).allowed
+
+    # Idle long enough to refill completely: swept, and a full burst again
+    clock.now += POLICY.burst / POLICY.rate
+    asyncio.run(store.sweep())
+    assert store.stats()["keys"] == 0
+    assert asyncio.run(take()).remaining == POLICY.burst - 1
+
+
+# ---------------- POLICIES ----------------
+@pytest.mark.parametrize("method, path, policy, rule_path", [
+    ("GET", "/api", None, "/api"),
+    ("OPTIONS", "/api/contacts", None, "/"),
+    ("POST", "/api/contacts", PUBLIC_WRITE_POLICY, "/api/contacts"),
+    ("POST", "/api/contacts/", PUBLIC_WRITE_POLICY, "/api/contacts"),
+    ("POST", "/api/analytics/event", ANALYTICS_EVENT_POLICY, "/api/analytics/event"),
+    ("GET", "/api/admin/client-projects/", ADMIN_READ_POLICY, "/api/admin/"),
+    ("GET", "/api/contacts/admin/all", ADMIN_READ_POLICY, "/api/contacts/admin/"),
+    ("GET", "/api/newsletter/admin/export", ADMIN_READ_POLICY, "/api/newsletter/admin/"),
+    ("GET", "/api/analytics/summary", ADMIN_READ_POLICY, "/api/analytics/"),
+    ("GET", "/api/chat/conversations", ADMIN_READ_POLICY, "/api/chat/conversations"),
+    ("GET", "/api/notes/", ADMIN_READ_POLICY, "/api/notes"),
+    ("GET", "/api/notesx", DEFAULT_POLICY, ""),
+    ("GET", "/api/chat/user-conversation", DEFAULT_POLICY, ""),
+    ("POST", "/api/admin/client-projects/", DEFAULT_POLICY, ""),
+])
+def test_policy_for(method, path, policy, rule_path):
+    assert RateLimiter(MemoryBucketStore()).policy_for(method, path) == (policy, rule_path)
+
+
+def exhaust(limiter, method, path, ip="203.0.113.7"):
+    """Send requests until one is rejected; returns how many were allowed"""
+    async def scenario():
+        allowed = 0
+        while (await limiter.check(method, path, ip)).allowed:
+            allowed += 1
+        return allowed
+
+    return asyncio.run(scenario())
+
+
+def test_analytics_traffic_does_not_block_the_contact_form(monkeypatch):
+    monkeypatch.setattr(rate_limit, "time", FakeTime())
+    limiter = RateLimiter(MemoryBucketStore())
+
+    assert exhaust(limiter, "POST", "/api/analytics/event") == ANALYTICS_EVENT_POLICY.burst
+    assert asyncio.run(limiter.check("POST", "/api/contacts", "203.0.113.7")).allowed
+
+
+def test_routes_sharing_a_policy_have_their_own_buckets(monkeypatch):
+    monkeypatch.setattr(rate_limit, "time", FakeTime())
+    limiter = RateLimiter(MemoryBucketStore())
+
+    assert exhaust(limiter, "POST", "/api/contacts") == PUBLIC_WRITE_POLICY.burst
+    assert asyncio.run(limiter.check("POST", "/api/chat/messages", "203.0.113.7")).allowed
+    # Another client is not affected either
+    assert asyncio.run(limiter.check("POST", "/api/contacts", "198.51.100.1")).allowed
+    assert limiter.rejected == {"public_write": 1}
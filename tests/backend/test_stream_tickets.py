@@ -0,0 +1,58 @@
+"""Behavior tests for the admin stream tickets in auth/stream_tickets.py"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from auth import admin_auth, stream_tickets
+from auth.stream_tickets import issue_stream_ticket, redeem_stream_ticket
+
+
+@pytest.fixture
+def tickets(mongo, monkeypatch):
+    monkeypatch.setattr(stream_tickets, "stream_tickets_collection", mongo.stream_tickets)
+    return mongo.stream_tickets
+
+
+def test_a_ticket_is_redeemed_once(tickets):
+    async def scenario():
+        ticket = await issue_stream_ticket("admin-1")
+        return ticket, await redeem_stream_ticket(ticket), await redeem_stream_ticket(ticket)
+
+    ticket, first, second = asyncio.run(scenario())
+    assert (first, second) == ("admin-1", None)
+    assert asyncio.run(tickets.count_documents({})) == 0
+
+
+def test_only_the_hash_is_stored(tickets):
+    ticket = asyncio.run(issue_stream_ticket("admin-1"))
+    doc = asyncio.run(tickets.find_one({}))
+    assert ticket not in str(doc)
+
+
+def test_an_expired_ticket_is_refused(tickets):
+    async def scenario():
+        ticket = await issue_stream_ticket("admin-1")
+        await tickets.update_many({}, {"$set": {"expires_at": datetime.utcnow() - timedelta(seconds=1)}})
+        return await redeem_stream_ticket(ticket)
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_stream_admin_from_a_ticket(tickets, monkeypatch):
+    async def principal(admin_id):
+        return {"id": admin_id, "role": "admin"}
+
+    monkeypatch.setattr(admin_auth, "_principal", principal)
+
+    async def scenario():
+        ticket = await issue_stream_ticket("admin-1")
+        admin = await admin_auth.get_stream_admin(ticket=ticket, authorization=None)
+        with pytest.raises(HTTPException) as replayed:
+            await admin_auth.get_stream_admin(ticket=ticket, authorization=None)
+        return admin, replayed.value
+
+    admin, replayed = asyncio.run(scenario())
+    assert admin["id"] == "admin-1"
+    assert replayed.status_code == 401
@@ -0,0 +1,75 @@
+"""Behavior tests for the streaming upload writer in utils/uploads.py"""
+import asyncio
+import hashlib
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from utils import uploads
+from utils.uploads import UploadMetrics, UploadTooLarge, save_upload
+
+DATA = b"0123456789" * 10
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    metrics = UploadMetrics()
+    monkeypatch.setattr(uploads, "upload_metrics", metrics)
+    return metrics
+
+
+def upload(data=DATA, size="known"):
+    return UploadFile(io.BytesIO(data), filename="file.bin", size=len(data) if size == "known" else size)
+
+
+class BrokenFile(io.BytesIO):
+    """Fails after the first chunk, as when the client goes away"""
+
+    def read(self, size=-1):
+        if self.tell():
+            raise ConnectionResetError("client disconnected")
+        return super().read(size)
+
+
+def save(upload_file, tmp_path, max_bytes=len(DATA)):
+    return asyncio.run(save_upload(upload_file, tmp_path / "file.bin", max_bytes, "test", chunk_size=16))
+
+
+def test_stores_the_upload_in_chunks(tmp_path, metrics):
+    stored = save(upload(), tmp_path)
+    assert stored.path.read_bytes() == DATA
+    assert stored.size == len(DATA)
+    assert stored.sha256 == hashlib.sha256(DATA).hexdigest()
+    assert [path.name for path in tmp_path.iterdir()] == ["file.bin"]
+    assert metrics.stats()["routes"]["test"]["uploads"] == 1
+
+
+def test_a_known_size_over_the_limit_is_rejected_before_writing(tmp_path, metrics):
+    with pytest.raises(UploadTooLarge, match="upload limit"):
+        save(upload(), tmp_path, max_bytes=len(DATA) - 1)
+    assert list(tmp_path.iterdir()) == []
+    assert metrics.stats()["routes"]["test"]["rejected"] == 1
+
+
+def test_an_unknown_size_is_capped_while_streaming(tmp_path, metrics):
+    with pytest.raises(UploadTooLarge):
+        save(upload(size=None), tmp_path, max_bytes=len(DATA) - 1)
+    # The partial file is removed
+    assert list(tmp_path.iterdir()) == []
+    assert metrics.stats()["routes"]["test"]["rejected"] == 1
+
+
+def test_a_failed_upload_leaves_nothing_behind(tmp_path, metrics):
+    with pytest.raises(ConnectionResetError):
+        save(UploadFile(BrokenFile(DATA), filename="file.bin"), tmp_path)
+    assert list(tmp_path.iterdir()) == []
+    assert metrics.stats()["routes"]["test"]["failed"] == 1
+
+
+@pytest.mark.parametrize("max_bytes, message", [
+    (25 * 1024 * 1024, "25 MB"),
+    (512 * 1024, "512 KB"),
+])
+def test_limit_in_the_message(max_bytes, message):
+    assert str(UploadTooLarge(max_bytes)) == f"File exceeds the {message} upload limit"